@@ -0,0 +1,278 @@
+"""
+AFFICHAGE DE L'OVERLAY (DÉCIMÉ, HORS DE LA BOUCLE DE DÉTECTION)
+===============================================================
+
+Le dessin de l'overlay (textes, barre de progression, contours des yeux)
+et cv2.imshow/waitKey coûtent plusieurs millisecondes par frame. Ici:
+
+    - l'overlay est rafraîchi à sa propre cadence (OVERLAY_FPS), plus basse
+      que celle de la détection
+    - les parties fixes (libellés, cadre de la barre) sont dessinées une
+      seule fois dans un calque, puis recopiées zone par zone
+    - le rendu et la fenêtre tournent dans un thread dédié: la boucle de
+      détection ne fait que recopier la frame quand le thread est libre
+      (jamais d'attente), et ne ralentit donc pas
+
+Sous macOS, HighGUI exige le thread principal: le rendu y est fait dans la
+boucle de détection, mais seulement à la cadence de l'overlay.
+
+En mode sans affichage (HEADLESS, ou aucun écran détecté sous Linux),
+main() ne crée pas d'OverlayDisplay: aucun dessin, aucune fenêtre.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import config_advanced
+from config import CONFIG
+from journalisation import get_logger
+
+
+log = get_logger("display")
+
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+GREEN = (0, 255, 0)
+RED = (0, 0, 255)
+GREY = (200, 200, 200)
+
+
+def display_available():
+    """Vrai si un écran est disponible pour cv2.imshow"""
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+class OverlayRenderer:
+    """Dessine l'overlay de main() sur une frame (calque fixe pré-rendu)"""
+
+    def __init__(self, closed_frames_threshold=None, show_landmarks=None, show_fps=None):
+        """
+        Args:
+            closed_frames_threshold: Seuil affiché sous la barre (défaut: config.py)
+            show_landmarks: Dessiner le contour des yeux (défaut: SHOW_LANDMARKS)
+            show_fps: Afficher les FPS de détection (défaut: SHOW_FPS)
+        """
+        if closed_frames_threshold is None:
+            closed_frames_threshold = CONFIG['eyes_closed_frames_threshold']
+        self.threshold = max(closed_frames_threshold, 1)
+        self.show_landmarks = config_advanced.SHOW_LANDMARKS if show_landmarks is None else show_landmarks
+        self.show_fps = config_advanced.SHOW_FPS if show_fps is None else show_fps
+
+        self._shape = None
+        self._patches = []
+
+    def _build_static(self, shape):
+        """Pré-rend les libellés et le cadre de la barre pour une taille de frame"""
+        h, w = shape[:2]
+        layer = np.zeros((h, w, 3), dtype=np.uint8)
+
+        label = "Frames fermees: "
+        cv2.putText(layer, label, (10, 70), FONT, 0.6, GREY, 2)
+        self._counter_x = 10 + cv2.getTextSize(label, FONT, 0.6, 2)[0][0]
+
+        cv2.rectangle(layer, (10, 90), (210, 110), GREY, 2)
+
+        self._fps_x = 10
+        if self.show_fps:
+            label = "FPS: "
+            cv2.putText(layer, label, (10, h - 20), FONT, 0.6, GREY, 2)
+            self._fps_x = 10 + cv2.getTextSize(label, FONT, 0.6, 2)[0][0]
+
+        # Zones non vides du calque: seules elles sont recopiées
+        self._patches = []
+        for y0, y1, x0, x1 in ((50, 115, 0, 230), (h - 45, h, 0, 100)):
+            y0, x1 = max(y0, 0), min(x1, w)
+            patch = layer[y0:y1, x0:x1].copy()
+            mask = patch.any(axis=2)
+            if mask.any():
+                self._patches.append((slice(y0, y1), slice(x0, x1), patch, mask))
+        self._shape = shape
+
+    def render(self, frame, state, fps=0.0):
+        """
+        Dessine l'overlay sur la frame (en place)
+
+        Args:
+            frame: Image BGR
+            state: Résultat de process_frame (DetectionResult ou dict)
+            fps: FPS de la détection
+        """
+        if frame.shape != self._shape:
+            self._build_static(frame.shape)
+        w = frame.shape[1]
+
+        for rows, cols, patch, mask in self._patches:
+            np.copyto(frame[rows, cols], patch, where=mask[..., None])
+
+        alarm = state['alarm']
+        color = RED if alarm else GREEN
+
+        eye_pts = state['eye_points']
+        if self.show_landmarks and eye_pts is not None:
+            eye_color = RED if state['eyes_closed'] else GREEN
+            cv2.polylines(frame, [eye_pts[0], eye_pts[1]], True, eye_color, 2)
+
+        if state['face_detected']:
+            info_text = f"EAR L:{state['left_ear']:.2f} R:{state['right_ear']:.2f} Moy:{state['ear_smooth']:.2f}"
+            cv2.putText(frame, info_text, (10, 30), FONT, 0.6, GREEN, 2)
+        else:
+            cv2.putText(frame, "Aucun visage détecte", (10, 30), FONT, 0.6, RED, 2)
+
+        cv2.putText(frame, "ALARME ACTIVE!" if alarm else "NORMAL", (w - 300, 30), FONT, 1, color, 3)
+
+        count = state['eyes_closed_frames']
+        cv2.putText(frame, f"{count}/{self.threshold}", (self._counter_x, 70), FONT, 0.6, color, 2)
+        bar_width = int(min(count / self.threshold, 1.0) * 200)
+        if bar_width > 0:
+            cv2.rectangle(frame, (10, 90), (10 + bar_width, 110), color, -1)
+
+        if self.show_fps:
+            cv2.putText(frame, f"{int(fps)}", (self._fps_x, frame.shape[0] - 20), FONT, 0.6, GREEN, 2)
+        return frame
+
+
+class OverlaySnapshot:
+    """Copie de la frame et de l'état d'overlay dans des buffers réutilisés"""
+
+    STATE_KEYS = ('eyes_closed', 'left_ear', 'right_ear', 'ear_smooth', 'eyes_closed_frames',
+                  'alarm', 'face_detected')
+
+    def __init__(self):
+        self.frame = None
+        self._eye_pts = np.zeros((2, 6, 2), dtype=np.int32)
+
+    def take(self, frame, result):
+        """
+        Recopie la frame et l'état utile à OverlayRenderer.render
+
+        La frame de détection et les points des yeux (réécrits par le
+        détecteur à la frame suivante) peuvent ensuite être rendus par un
+        autre thread.
+
+        Args:
+            frame: Frame BGR (non modifiée)
+            result: Résultat de process_frame
+
+        Returns:
+            tuple: (copie de la frame, état)
+        """
+        if self.frame is None or self.frame.shape != frame.shape:
+            self.frame = np.empty_like(frame)
+        np.copyto(self.frame, frame)
+
+        state = {key: result[key] for key in self.STATE_KEYS}
+        eye_pts = result['eye_points']
+        if eye_pts is not None:
+            np.copyto(self._eye_pts, eye_pts)
+        state['eye_points'] = self._eye_pts if eye_pts is not None else None
+        return self.frame, state
+
+
+class OverlayDisplay:
+    """Fenêtre OpenCV rafraîchie à cadence réduite, sans bloquer la détection"""
+
+    STATE_KEYS = OverlaySnapshot.STATE_KEYS
+
+    def __init__(self, window_name, overlay_fps=None, threaded=None, renderer=None):
+        """
+        Args:
+            window_name: Titre de la fenêtre
+            overlay_fps: Cadence max de l'overlay (défaut: OVERLAY_FPS)
+            threaded: Rendu dans un thread dédié (défaut: sauf sous macOS)
+            renderer: OverlayRenderer (défaut: paramètres de config)
+        """
+        self.window_name = window_name
+        overlay_fps = overlay_fps or config_advanced.OVERLAY_FPS
+        self.interval = 1.0 / overlay_fps if overlay_fps > 0 else 0.0
+        self.threaded = sys.platform != "darwin" if threaded is None else threaded
+        self.renderer = renderer or OverlayRenderer()
+
+        self.quit_requested = False
+        self.rendered = 0
+        self._next = 0.0
+
+        # Copie de la frame et de l'état pour le thread de rendu
+        self._snapshot = OverlaySnapshot()
+        self._frame = None
+        self._state = {}
+        self._fps = 0.0
+        self._busy = False
+        self._pending = threading.Event()
+        self._stopped = False
+        self._thread = None
+        if self.threaded:
+            self._thread = threading.Thread(target=self._render_loop, daemon=True)
+            self._thread.start()
+
+    def submit(self, frame, result, fps=0.0):
+        """
+        Propose une frame à l'affichage (appelé à chaque frame de détection)
+
+        Ne fait rien tant que la cadence de l'overlay n'est pas atteinte ou
+        que le thread de rendu est occupé.
+
+        Args:
+            frame: Frame BGR (non modifiée en mode threadé)
+            result: Résultat de process_frame
+            fps: FPS de la détection
+
+        Returns:
+            bool: False si l'utilisateur a demandé à quitter ('q')
+        """
+        now = time.perf_counter()
+        if now < self._next or self._busy:
+            return not self.quit_requested
+        self._next = now + self.interval
+
+        if not self.threaded:
+            state = {key: result[key] for key in self.STATE_KEYS}
+            state['eye_points'] = result['eye_points']
+            self._show(self.renderer.render(frame, state, fps))
+            return not self.quit_requested
+
+        self._frame, self._state = self._snapshot.take(frame, result)
+        self._fps = fps
+        self._busy = True
+        self._pending.set()
+        return not self.quit_requested
+
+    def _show(self, frame):
+        cv2.imshow(self.window_name, frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.quit_requested = True
+        self.rendered += 1
+
+    def _render_loop(self):
+        while not self._stopped:
+            if not self._pending.wait(timeout=0.05):
+                # Garde la fenêtre réactive entre deux rendus
+                if self.rendered and cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.quit_requested = True
+                continue
+            self._pending.clear()
+            if self._stopped:
+                break
+            # Une erreur de rendu ne doit pas laisser _busy levé (submit
+            # ignorerait alors toutes les frames suivantes)
+            try:
+                self._show(self.renderer.render(self._frame, self._state, self._fps))
+            except Exception as e:
+                log.error("✗ Erreur d'affichage: %s", e, extra={'rate_limit': True})
+            finally:
+                self._busy = False
+
+    def close(self):
+        """Arrête le thread de rendu et ferme la fenêtre"""
+        self._stopped = True
+        self._pending.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self.rendered:
+            cv2.destroyWindow(self.window_name)
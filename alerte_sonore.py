@@ -0,0 +1,216 @@
+"""
+ALERTE SONORE LOCALE (LOCAL_SOUND / ALERT_SOUND_FILE)
+=====================================================
+
+Joue ALERT_SOUND_FILE sur la carte son locale pendant l'alarme, en plus
+du buzzer Arduino:
+
+    - le WAV est décodé une seule fois au démarrage (module wave) dans un
+      tableau int16 en mémoire; rien n'est relu ni décodé par alarme
+    - la sortie reste ouverte: le thread audio (callback PortAudio, ou
+      thread dédié du périphérique nul) remplit des blocs de
+      AUDIO_BLOCK_SIZE échantillons, du silence hors alarme
+    - start()/stop() ne font que basculer un drapeau: le son démarre et
+      s'arrête au bloc suivant (~6 ms à 44,1 kHz, bien moins qu'une frame)
+    - NullAudioOutput consomme les blocs au rythme réel sans carte son,
+      pour les tests et les boîtiers sans sortie audio
+
+Dépendance optionnelle: sounddevice (pip install sounddevice).
+"""
+
+import threading
+import time
+import wave
+
+import numpy as np
+
+import config_advanced
+from bus_evenements import ALARM_ON, ALARM_OFF
+
+try:
+    import sounddevice
+except (ImportError, OSError):
+    # Module absent ou bibliothèque PortAudio introuvable
+    sounddevice = None
+
+
+def audio_available():
+    """True si la sortie audio (sounddevice + PortAudio) est utilisable"""
+    return sounddevice is not None
+
+
+def load_wav(path):
+    """
+    Décode un fichier WAV PCM 8 ou 16 bits
+
+    Returns:
+        tuple: (échantillons int16 de forme (n, canaux), fréquence en Hz)
+
+    Raises:
+        OSError, wave.Error: Fichier absent ou illisible
+        ValueError: Format d'échantillon non pris en charge, fichier vide
+    """
+    with wave.open(path, "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.int16)
+    elif width == 1:
+        samples = ((np.frombuffer(raw, dtype=np.uint8).astype(np.int16) - 128) << 8).astype(np.int16)
+    else:
+        raise ValueError(f"WAV {8 * width} bits non pris en charge (8 ou 16 bits)")
+    if not len(samples):
+        raise ValueError(f"WAV vide: {path}")
+    return samples.reshape(-1, channels), rate
+
+
+class SoundDeviceOutput:
+    """Sortie PortAudio ouverte en permanence (callback dans le thread audio)"""
+
+    def __init__(self, rate, channels, blocksize, fill):
+        if sounddevice is None:
+            raise RuntimeError("sounddevice non disponible. Veuillez installer: pip install sounddevice")
+        self._stream = sounddevice.OutputStream(
+            samplerate=rate, channels=channels, dtype="int16", blocksize=blocksize,
+            latency="low", callback=lambda outdata, frames, t, status: fill(outdata))
+        self._stream.start()
+
+    def close(self):
+        self._stream.stop()
+        self._stream.close()
+
+
+class NullAudioOutput:
+    """Périphérique nul: consomme les blocs au rythme réel, sans son"""
+
+    def __init__(self, rate, channels, blocksize, fill):
+        self.period = blocksize / rate
+        self.blocks = 0
+        self.sound_blocks = 0
+        self._block = np.zeros((blocksize, channels), dtype=np.int16)
+        self._fill = fill
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audio-null", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        next_time = time.perf_counter()
+        while not self._stopped.is_set():
+            self._fill(self._block)
+            self.blocks += 1
+            if self._block.any():
+                self.sound_blocks += 1
+            next_time += self.period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                self._stopped.wait(delay)
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+class AudioAlert:
+    """Son d'alarme préchargé, démarré et arrêté au bloc près"""
+
+    def __init__(self, path=None, output=None, blocksize=None, loop=True):
+        """
+        Args:
+            path: Fichier WAV (défaut: ALERT_SOUND_FILE)
+            output: Classe de sortie (défaut: SoundDeviceOutput; NullAudioOutput pour les tests)
+            blocksize: Échantillons par bloc (défaut: AUDIO_BLOCK_SIZE)
+            loop: Répéter le son tant que l'alarme dure
+
+        Raises:
+            OSError, wave.Error, ValueError: WAV illisible
+            RuntimeError: sounddevice non disponible
+        """
+        self.path = path or config_advanced.ALERT_SOUND_FILE
+        self.samples, self.rate = load_wav(self.path)
+        self.loop = loop
+        self.blocksize = blocksize or config_advanced.AUDIO_BLOCK_SIZE
+
+        self._playing = False
+        self._restart = False
+        self._pos = 0
+        self._requested = 0.0
+
+        self.plays = 0
+        self.last_start_latency = 0.0
+        self.max_start_latency = 0.0
+
+        output = output or SoundDeviceOutput
+        self.output = output(self.rate, self.samples.shape[1], self.blocksize, self._fill)
+
+    @property
+    def playing(self):
+        return self._playing
+
+    def __call__(self, event):
+        """Abonné du bus: son pendant l'alarme"""
+        if event.type == ALARM_ON:
+            self.start()
+        elif event.type == ALARM_OFF:
+            self.stop()
+
+    def start(self):
+        """Démarre le son depuis le début (au prochain bloc)"""
+        self._requested = time.perf_counter()
+        self._restart = True
+        self._playing = True
+        self.plays += 1
+
+    def stop(self):
+        """Coupe le son (au prochain bloc)"""
+        self._playing = False
+
+    def _fill(self, out):
+        """Remplit un bloc de sortie (thread audio)"""
+        if not self._playing:
+            out.fill(0)
+            return
+        if self._restart:
+            self._restart = False
+            self._pos = 0
+            self.last_start_latency = time.perf_counter() - self._requested
+            self.max_start_latency = max(self.max_start_latency, self.last_start_latency)
+
+        samples = self.samples
+        if not len(samples):
+            # Aucun échantillon: la boucle ne progresserait jamais
+            self._playing = False
+            out.fill(0)
+            return
+        n = len(out)
+        filled = 0
+        while filled < n:
+            chunk = min(n - filled, len(samples) - self._pos)
+            out[filled:filled + chunk] = samples[self._pos:self._pos + chunk]
+            filled += chunk
+            self._pos += chunk
+            if self._pos >= len(samples):
+                self._pos = 0
+                if not self.loop:
+                    self._playing = False
+                    out[filled:] = 0
+                    break
+
+    def stats(self):
+        """
+        Returns:
+            dict: plays, start_latency_ms (dernière), max_start_latency_ms, block_ms
+        """
+        return {
+            'plays': self.plays,
+            'start_latency_ms': 1000 * self.last_start_latency,
+            'max_start_latency_ms': 1000 * self.max_start_latency,
+            'block_ms': 1000 * self.blocksize / self.rate,
+        }
+
+    def close(self):
+        """Coupe le son et ferme la sortie"""
+        self._playing = False
+        self.output.close()
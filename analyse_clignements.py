@@ -0,0 +1,158 @@
+"""
+PERCLOS ET ANALYSE DES CLIGNEMENTS
+==================================
+
+Indicateurs de somnolence calculés frame par frame, en temps constant,
+à partir de l'EAR brut (non lissé: le lissage effacerait les clignements):
+
+    - PERCLOS: proportion des frames yeux fermés sur les PERCLOS_WINDOW
+      dernières secondes
+    - fréquence des clignements (par minute, même fenêtre)
+    - histogramme des durées de fermeture (BLINK_HISTOGRAM_EDGES)
+    - plus longue fermeture de la session (fermeture en cours comprise)
+
+Une fermeture plus courte que BLINK_MAX_DURATION compte comme clignement;
+les plus longues (micro-sommeils) n'entrent que dans l'histogramme et la
+plus longue fermeture. Les frames sans visage sont ignorées.
+
+Les fenêtres glissantes sont des tableaux circulaires de taille fixe
+(aucune liste qui grandit): chaque frame ajoute une entrée et retire
+celles sorties de la fenêtre, les sommes sont tenues à jour.
+"""
+
+import numpy as np
+
+import config_advanced
+from config import CONFIG
+
+
+class _TimeRing:
+    """Fenêtre glissante (horodatage, valeur 0/1) sur tableaux circulaires"""
+
+    def __init__(self, capacity, window):
+        self.window = window
+        self.capacity = capacity
+        self.ts = np.zeros(capacity)
+        self.values = np.zeros(capacity, dtype=np.int8)
+        self.start = 0
+        self.count = 0
+        self.total = 0
+
+    def push(self, timestamp, value=1):
+        # Retire la plus ancienne entrée si plein, puis celles sorties de la fenêtre
+        if self.count == self.capacity:
+            self._pop()
+        self.expire(timestamp)
+        i = (self.start + self.count) % self.capacity
+        self.ts[i] = timestamp
+        self.values[i] = value
+        self.total += value
+        self.count += 1
+
+    def expire(self, timestamp):
+        """Retire les entrées sorties de la fenêtre sans rien ajouter"""
+        while self.count and timestamp - float(self.ts[self.start]) > self.window:
+            self._pop()
+
+    def _pop(self):
+        self.total -= int(self.values[self.start])
+        self.start = (self.start + 1) % self.capacity
+        self.count -= 1
+
+    def span(self, timestamp):
+        """Durée couverte par la fenêtre (s)"""
+        return timestamp - float(self.ts[self.start]) if self.count else 0.0
+
+
+class BlinkAnalytics:
+    """PERCLOS, clignements et fermetures, mis à jour à chaque frame"""
+
+    def __init__(self, window=None, fps=None, blink_max_duration=None, edges=None, max_blinks=256):
+        """
+        Args:
+            window: Fenêtre glissante (s) (défaut: PERCLOS_WINDOW)
+            fps: Cadence nominale, dimensionne la fenêtre PERCLOS (défaut: VIDEO_FPS)
+            blink_max_duration: Durée max d'un clignement (s) (défaut: BLINK_MAX_DURATION)
+            edges: Bornes de l'histogramme des durées (s) (défaut: BLINK_HISTOGRAM_EDGES)
+            max_blinks: Clignements gardés dans la fenêtre de fréquence
+        """
+        cfg = config_advanced
+        self.window = window or cfg.PERCLOS_WINDOW
+        fps = fps or CONFIG['video_fps']
+        self.blink_max_duration = blink_max_duration or cfg.BLINK_MAX_DURATION
+        self.edges = np.asarray(edges or cfg.BLINK_HISTOGRAM_EDGES, dtype=np.float64)
+
+        # Marge x2: la cadence réelle peut dépasser la cadence nominale
+        self._frames = _TimeRing(int(self.window * fps * 2) + 1, self.window)
+        self._blinks = _TimeRing(max_blinks, self.window)
+        self.histogram = np.zeros(len(self.edges) + 1, dtype=np.int64)
+
+        self._closure_start = None
+        self.perclos = 0.0
+        self.blink_rate = 0.0
+        self.blinks = 0
+        self.closures = 0
+        self.longest_closure = 0.0
+
+    def update(self, timestamp, ear, threshold):
+        """
+        Traite une frame
+
+        Args:
+            timestamp: Horodatage (s)
+            ear: EAR moyen brut, None si aucun visage
+            threshold: Seuil EAR yeux fermés
+        """
+        if ear is None:
+            return
+        closed = ear < threshold
+
+        frames = self._frames
+        frames.push(timestamp, 1 if closed else 0)
+        self.perclos = frames.total / frames.count
+
+        # Fermeture en cours / terminée
+        if closed:
+            if self._closure_start is None:
+                self._closure_start = timestamp
+            else:
+                self.longest_closure = max(self.longest_closure, timestamp - self._closure_start)
+        elif self._closure_start is not None:
+            duration = timestamp - self._closure_start
+            self._closure_start = None
+            self.closures += 1
+            self.longest_closure = max(self.longest_closure, duration)
+            self.histogram[np.searchsorted(self.edges, duration, side='right')] += 1
+            if duration < self.blink_max_duration:
+                self.blinks += 1
+                self._blinks.push(timestamp)
+
+        blinks = self._blinks
+        blinks.expire(timestamp)
+        span = frames.span(timestamp)
+        self.blink_rate = 60.0 * blinks.total / span if span >= 1.0 else 0.0
+
+    def histogram_labels(self):
+        """Libellés des classes de l'histogramme ("<0.1s", "0.1-0.2s", ..., ">=2s")"""
+        edges = [f"{e:g}" for e in self.edges]
+        labels = [f"<{edges[0]}s"]
+        labels += [f"{a}-{b}s" for a, b in zip(edges, edges[1:])]
+        labels.append(f">={edges[-1]}s")
+        return labels
+
+    def snapshot(self):
+        """
+        Indicateurs courants (surface de métriques)
+
+        Returns:
+            dict: perclos, blink_rate, blinks, closures, longest_closure_s,
+                  histogram {libellé: nombre}
+        """
+        return {
+            'perclos': self.perclos,
+            'blink_rate': self.blink_rate,
+            'blinks': self.blinks,
+            'closures': self.closures,
+            'longest_closure_s': self.longest_closure,
+            'histogram': dict(zip(self.histogram_labels(), self.histogram.tolist())),
+        }
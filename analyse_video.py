@@ -0,0 +1,229 @@
+"""
+ANALYSE HORS-LIGNE DE VIDÉOS ENREGISTRÉES
+=========================================
+
+Analyse sans affichage des heures de vidéo embarquée, plus vite que le
+temps réel:
+
+    1. chaque vidéo est découpée en segments de N secondes
+    2. les segments sont traités par un pool de processus, avec une seule
+       instance Face Mesh par processus
+    3. chaque segment commence quelques frames plus tôt (préchauffage du
+       suivi Face Mesh); ces frames sont traitées puis écartées
+    4. les séries EAR des segments sont recollées dans l'ordre, puis la
+       chronologie d'alarmes est calculée en une passe (moteur_decision)
+       sur la série complète: aucune discontinuité aux frontières
+
+Le résultat est un fichier .npz compressé par vidéo (timestamps, EAR des
+deux yeux, EAR moyen et lissé, compteur de frames fermées, alarme),
+directement utilisable par reglage_seuils.py, accompagné de l'index des
+événements (.events.json, voir index_evenements.py).
+
+Utilisation:
+    python analyse_video.py trajet1.mp4 trajet2.mp4 --workers 4
+    python analyse_video.py trajet.mp4 --segment-seconds 120 --output-dir resultats
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from index_evenements import build_index
+from moteur_decision import alarm_episodes, decide_batch
+
+
+# Détecteur du processus de travail (un par processus)
+_detector = None
+
+
+def _init_worker():
+    """Crée l'instance Face Mesh du processus de travail"""
+    global _detector
+    from detection_yeux_fermes_arduino import EyeClosureDetector
+
+    # Le parallélisme vient du pool: un thread OpenCV par processus
+    cv2.setNumThreads(1)
+    _detector = EyeClosureDetector()
+
+
+def plan_segments(n_frames, segment_frames, warmup_frames):
+    """
+    Découpe une vidéo en segments
+
+    Args:
+        n_frames: Nombre de frames de la vidéo
+        segment_frames: Taille d'un segment (frames)
+        warmup_frames: Frames de préchauffage lues avant chaque segment
+
+    Returns:
+        list: [(read_start, start, end), ...] où end vaut None pour le dernier
+              segment (lecture jusqu'à la fin du fichier)
+    """
+    segments = []
+    for start in range(0, max(n_frames, 1), segment_frames):
+        end = start + segment_frames
+        if end >= n_frames:
+            end = None
+        segments.append((max(0, start - warmup_frames), start, end))
+        if end is None:
+            break
+    return segments
+
+
+def analyse_segment(path, read_start, start, end):
+    """
+    Calcule l'EAR des deux yeux sur un segment (processus de travail)
+
+    Args:
+        path: Fichier vidéo
+        read_start: Première frame lue (préchauffage inclus)
+        start: Première frame conservée
+        end: Frame de fin exclue (None = fin du fichier)
+
+    Returns:
+        tuple: (start, ears) avec ears de forme (n, 2), NaN sans visage
+    """
+    from detection_yeux_fermes_arduino import eye_aspect_ratios
+
+    cap = cv2.VideoCapture(path)
+    if read_start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, read_start)
+
+    eye_points = []
+    face = []
+    index = read_start
+    try:
+        while end is None or index < end:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            eye_pts = _detector.detect_eye_points(frame)
+            if index >= start:
+                face.append(eye_pts is not None)
+                eye_points.append(eye_pts if eye_pts is not None else np.zeros((2, 6, 2), np.int32))
+            index += 1
+    finally:
+        cap.release()
+
+    # Longueur attendue même si la lecture s'arrête tôt: l'alignement est conservé
+    n = len(face) if end is None else end - start
+    ears = np.full((n, 2), np.nan)
+    if face:
+        face = np.array(face)
+        ears[:len(face)][face] = eye_aspect_ratios(np.stack(eye_points)[face])
+    return start, ears
+
+
+def save_results(path, timestamps, ears, decision, fps, source):
+    """Écrit les chronologies d'une vidéo dans un .npz compressé"""
+    np.savez_compressed(
+        path,
+        timestamps=timestamps,
+        left_ear=ears[:, 0].astype(np.float32),
+        right_ear=ears[:, 1].astype(np.float32),
+        ear=(ears[:, 0] + ears[:, 1]) / 2.0,
+        ear_smooth=decision['ear_smooth'].astype(np.float32),
+        eyes_closed_frames=decision['eyes_closed_frames'].astype(np.int32),
+        alarm=decision['alarm'],
+        fps=fps,
+        source=source,
+    )
+
+
+def analyse_videos(paths, workers=None, segment_seconds=60.0, warmup_frames=15, output_dir=None):
+    """
+    Analyse plusieurs vidéos en parallèle
+
+    Args:
+        paths: Fichiers vidéo
+        workers: Nombre de processus (défaut: nombre de cœurs)
+        segment_seconds: Durée d'un segment
+        warmup_frames: Frames de préchauffage par segment
+        output_dir: Dossier des .npz (défaut: à côté de chaque vidéo)
+
+    Returns:
+        dict: {vidéo: chemin du .npz}
+    """
+    videos = {}
+    jobs = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print(f"✗ Impossible d'ouvrir: {path}")
+            continue
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        segment_frames = max(1, int(segment_seconds * fps))
+        segments = plan_segments(n_frames, segment_frames, warmup_frames)
+        videos[path] = {'fps': fps, 'segments': {}}
+        jobs.extend((path, *segment) for segment in segments)
+        print(f"  {os.path.basename(path)}: {n_frames} frames, {fps:.1f} FPS, {len(segments)} segments")
+
+    if not jobs:
+        return {}
+
+    start_time = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = [(path, pool.submit(analyse_segment, path, *segment)) for path, *segment in jobs]
+        for done, (path, future) in enumerate(futures, 1):
+            seg_start, ears = future.result()
+            videos[path]['segments'][seg_start] = ears
+            print(f"\r  Segments traités: {done}/{len(futures)}", end="", flush=True)
+    print()
+
+    outputs = {}
+    video_seconds = 0.0
+    for path, video in videos.items():
+        # Recolle les segments dans l'ordre, puis décide sur la série complète
+        ears = np.concatenate([video['segments'][k] for k in sorted(video['segments'])])
+        fps = video['fps']
+        timestamps = np.arange(len(ears)) / fps
+        decision = decide_batch((ears[:, 0] + ears[:, 1]) / 2.0)
+        video_seconds += len(ears) / fps
+
+        base = os.path.splitext(os.path.basename(path))[0] + ".analyse.npz"
+        out_path = os.path.join(output_dir or os.path.dirname(path), base)
+        save_results(out_path, timestamps, ears, decision, fps, path)
+        index_path = build_index(out_path)
+        outputs[path] = out_path
+
+        n_alarm = len(alarm_episodes(decision['alarm']))
+        print(f"✓ {os.path.basename(path)}: {len(ears)} frames, {n_alarm} alarme(s) → {out_path}")
+        print(f"  Index des événements: {index_path}")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\n✓ {video_seconds:.0f}s de vidéo en {elapsed:.1f}s "
+          f"({video_seconds / max(elapsed, 1e-9):.1f}s vidéo / s)")
+    return outputs
+
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Analyse hors-ligne parallèle de vidéos")
+    parser.add_argument("videos", nargs="+", help="Fichiers vidéo à analyser")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut: nb de cœurs)")
+    parser.add_argument("--segment-seconds", type=float, default=60.0, help="Durée d'un segment (s)")
+    parser.add_argument("--warmup-frames", type=int, default=15, help="Frames de préchauffage par segment")
+    parser.add_argument("--output-dir", default=None, help="Dossier des résultats (.npz)")
+    args = parser.parse_args()
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    print("\n" + "=" * 60)
+    print("ANALYSE HORS-LIGNE")
+    print("=" * 60)
+    analyse_videos(args.videos, args.workers, args.segment_seconds, args.warmup_frames, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+APERÇU MJPEG PAR HTTP
+=====================
+
+Aperçu à distance du flux annoté (overlay de main()) pour le débogage des
+boîtiers déployés, sans écran local: un navigateur ouvert sur
+http://<hôte>:<port>/ affiche le flux MJPEG.
+
+Coût maîtrisé:
+    - tant qu'aucun client n'est connecté, submit() ne fait qu'un test
+      d'entier: pas de copie, pas de rendu, pas d'encodage
+    - avec des clients, la frame est copiée au plus PREVIEW_FPS fois par
+      seconde, et seulement si l'encodeur est libre (jamais d'attente)
+    - overlay et encodage JPEG (PREVIEW_QUALITY) se font dans un thread
+      dédié; chaque JPEG est partagé par tous les clients
+
+Par défaut le serveur n'écoute qu'en local (PREVIEW_HOST = "127.0.0.1"):
+passer par un tunnel SSH, ou mettre "0.0.0.0" sur un réseau de confiance.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+import config_advanced
+from affichage import OverlayRenderer, OverlaySnapshot
+from journalisation import get_logger
+
+
+log = get_logger("preview")
+
+
+BOUNDARY = "frame"
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>SafeDrive - Apercu</title></head>
+<body style="margin:0;background:#000">
+<img src="/stream" style="display:block;margin:auto;max-width:100%">
+</body></html>
+"""
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    """Requêtes HTTP: page d'accueil et flux multipart"""
+
+    preview = None
+
+    def do_GET(self):
+        if self.path in ("/", "/index.html"):
+            body = PAGE.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/stream":
+            self._stream()
+        else:
+            self.send_error(404)
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache, private")
+        self.send_header("Pragma", "no-cache")
+        self.end_headers()
+
+        try:
+            for jpeg in self.preview.frames():
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PreviewServer:
+    """Serveur MJPEG qui n'encode que lorsqu'un client regarde"""
+
+    def __init__(self, host=None, port=None, fps=None, quality=None, renderer=None):
+        """
+        Args:
+            host: Adresse d'écoute (défaut: PREVIEW_HOST)
+            port: Port HTTP (défaut: PREVIEW_PORT)
+            fps: Cadence max du flux (défaut: PREVIEW_FPS)
+            quality: Qualité JPEG 0-100 (défaut: PREVIEW_QUALITY)
+            renderer: OverlayRenderer (défaut: paramètres de config)
+
+        Raises:
+            OSError: Port déjà utilisé ou adresse invalide
+        """
+        host = config_advanced.PREVIEW_HOST if host is None else host
+        port = config_advanced.PREVIEW_PORT if port is None else port
+        fps = fps or config_advanced.PREVIEW_FPS
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.quality = int(config_advanced.PREVIEW_QUALITY if quality is None else quality)
+        self.renderer = renderer or OverlayRenderer()
+
+        self.clients = 0
+        self.encoded = 0
+        self._next = 0.0
+
+        # Dernier JPEG, partagé par tous les clients
+        self._cond = threading.Condition()
+        self._jpeg = None
+        self._seq = 0
+
+        # Copie de la frame et de l'état pour l'encodeur
+        self._snapshot = OverlaySnapshot()
+        self._frame = None
+        self._state = {}
+        self._fps = 0.0
+        self._busy = False
+        self._pending = threading.Event()
+        self._stopped = False
+
+        handler = type("PreviewHandler", (_PreviewHandler,), {"preview": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._encode_loop, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def url(self):
+        host, port = self.address[:2]
+        return f"http://{host}:{port}/"
+
+    def submit(self, frame, result, fps=0.0):
+        """
+        Propose une frame annotée au flux (appelé à chaque frame de détection)
+
+        Args:
+            frame: Frame BGR (non modifiée)
+            result: Résultat de process_frame
+            fps: FPS de la détection
+        """
+        if not self.clients:
+            return
+        now = time.perf_counter()
+        if now < self._next or self._busy:
+            return
+        self._next = now + self.interval
+
+        self._frame, self._state = self._snapshot.take(frame, result)
+        self._fps = fps
+        self._busy = True
+        self._pending.set()
+
+    def _encode_loop(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while not self._stopped:
+            if not self._pending.wait(timeout=0.5):
+                continue
+            self._pending.clear()
+            if self._stopped:
+                break
+
+            # Une erreur de rendu ou d'encodage ne doit pas laisser _busy levé
+            # (submit ignorerait alors toutes les frames suivantes)
+            try:
+                frame = self.renderer.render(self._frame, self._state, self._fps)
+                ok, buf = cv2.imencode(".jpg", frame, params)
+            except Exception as e:
+                ok = False
+                log.error("✗ Erreur d'aperçu: %s", e, extra={'rate_limit': True})
+            finally:
+                self._busy = False
+            if not ok:
+                continue
+
+            with self._cond:
+                self._jpeg = buf.tobytes()
+                self._seq += 1
+                self.encoded += 1
+                self._cond.notify_all()
+
+    def frames(self):
+        """
+        JPEG successifs pour un client (bloquant, compte le client connecté)
+
+        Yields:
+            bytes: Image JPEG
+        """
+        with self._cond:
+            self.clients += 1
+        try:
+            seen = self._seq
+            while not self._stopped:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != seen or self._stopped, timeout=1.0)
+                    if self._stopped:
+                        break
+                    if self._seq == seen:
+                        continue
+                    seen = self._seq
+                    jpeg = self._jpeg
+                yield jpeg
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+    def close(self):
+        """Arrête le serveur et l'encodeur"""
+        self._stopped = True
+        self._pending.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+        for t in self._threads:
+            t.join(timeout=1.0)
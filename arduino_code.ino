@@ -20,6 +20,9 @@
  * PROTOCOLE SÉRIE:
  * ----------------
  * Réception: "ON\n" ou "OFF\n"
+ *            "FAULT\n": détection interrompue côté Python (chien de garde);
+ *            LED et buzzer clignotent jusqu'au prochain ON ou OFF,
+ *            sans timeout (un pipeline bloqué n'envoie plus rien)
  * Envoi: "LED:ON\n" ou "LED:OFF\n"
  * Vitesse: 9600 baud
  */
@@ -33,6 +36,10 @@ bool alarm_active = false;
 unsigned long last_command_time = 0;
 const unsigned long COMMAND_TIMEOUT = 5000;  // Timeout 5 secondes
 
+// Défaut signalé par le chien de garde (motif clignotant, distinct de l'alarme)
+bool fault_active = false;
+const unsigned long FAULT_BLINK_MS = 150;
+
 // ============= SETUP =============
 void setup() {
   // Initialise les broches
@@ -76,11 +83,21 @@ void loop() {
     else if (command == "TEST") {
       testAlarm();
     }
+    else if (command == "FAULT") {
+      activateFault();
+    }
     else {
-      Serial.println("ERREUR: Commande inconnue - Utilisez ON, OFF, STATUS ou TEST");
+      Serial.println("ERREUR: Commande inconnue - Utilisez ON, OFF, FAULT, STATUS ou TEST");
     }
   }
   
+  // Défaut: LED et buzzer clignotent ensemble (pas de timeout)
+  if (fault_active) {
+    bool on = (millis() / FAULT_BLINK_MS) % 2 == 0;
+    digitalWrite(LED_PIN, on ? HIGH : LOW);
+    digitalWrite(BUZZER_PIN, on ? HIGH : LOW);
+  }
+  
   // Sécurité: désactive l'alarme si pas de commande depuis longtemps
   if (alarm_active && (millis() - last_command_time) > COMMAND_TIMEOUT) {
     Serial.println("TIMEOUT: Alarme désactivée automatiquement");
@@ -93,6 +110,7 @@ void loop() {
 // ============= FONCTIONS =============
 
 void activateAlarm() {
+  clearFault();
   if (!alarm_active) {
     digitalWrite(LED_PIN, HIGH);      // Allume la LED
     digitalWrite(BUZZER_PIN, HIGH);   // Active le buzzer
@@ -105,6 +123,7 @@ void activateAlarm() {
 }
 
 void deactivateAlarm() {
+  clearFault();
   if (alarm_active) {
     digitalWrite(LED_PIN, LOW);       // Éteint la LED
     digitalWrite(BUZZER_PIN, LOW);    // Désactive le buzzer
@@ -116,7 +135,30 @@ void deactivateAlarm() {
   }
 }
 
+void activateFault() {
+  if (!fault_active) {
+    fault_active = true;
+    alarm_active = false;
+    Serial.println("DEFAUT_ACTIF");
+    Serial.print("LED: CLIGNOTE | BUZZER: CLIGNOTE | Temps: ");
+    Serial.println(millis());
+  }
+}
+
+void clearFault() {
+  if (fault_active) {
+    fault_active = false;
+    digitalWrite(LED_PIN, LOW);
+    digitalWrite(BUZZER_PIN, LOW);
+    Serial.println("DEFAUT_INACTIF");
+  }
+}
+
 void sendStatus() {
+  if (fault_active) {
+    Serial.println("STATUS: DEFAUT");
+    return;
+  }
   Serial.print("STATUS: ");
   Serial.print("LED=");
   Serial.print(digitalRead(LED_PIN) ? "ON" : "OFF");
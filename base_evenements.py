@@ -0,0 +1,330 @@
+"""
+BASE D'ÉVÉNEMENTS SQLITE (USE_DATABASE / SQLITE_DB)
+===================================================
+
+Enregistre dans SQLite un résumé par frame (EAR, visage, yeux fermés,
+alarme) et les épisodes d'alarme, sans toucher à la latence des frames:
+
+    - record() ne fait que du calcul en mémoire et un put_nowait dans une
+      file bornée (ligne écartée et comptée si la file est pleine; les
+      épisodes, rares, ont leur propre file et ne sont jamais écartés)
+    - les lignes par frame sont sous-échantillonnées (DB_SAMPLE_HZ par
+      flux); les épisodes sont suivis sur toutes les frames
+    - un thread d'écriture groupe les insertions dans des transactions
+      (executemany sur des requêtes constantes, préparées une seule fois
+      par sqlite3), en mode WAL avec synchronous=NORMAL
+    - les lectures (plages horaires, épisodes) passent par des index et
+      une connexion séparée: WAL permet de lire pendant l'écriture
+
+Plusieurs flux (flotte.py) partagent la même base, distingués par "stream".
+
+Utilisation:
+    python base_evenements.py episodes --db detections.db --since 3600
+    python base_evenements.py frames --db detections.db --stream cam0 --from 1700000000 --to 1700000060
+"""
+
+import argparse
+import contextlib
+import queue
+import sqlite3
+import threading
+import time
+
+import config_advanced
+from journalisation import get_logger
+
+
+log = get_logger("database")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    stream TEXT NOT NULL,
+    ts REAL NOT NULL,
+    ear REAL,
+    face INTEGER NOT NULL,
+    closed INTEGER NOT NULL,
+    alarm INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frames_stream_ts ON frames (stream, ts);
+CREATE INDEX IF NOT EXISTS frames_ts ON frames (ts);
+
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY,
+    stream TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    duration_s REAL NOT NULL,
+    frames INTEGER NOT NULL,
+    min_ear REAL
+);
+CREATE INDEX IF NOT EXISTS episodes_stream_start ON episodes (stream, start_ts);
+CREATE INDEX IF NOT EXISTS episodes_start ON episodes (start_ts);
+"""
+
+INSERT_FRAME = "INSERT INTO frames (stream, ts, ear, face, closed, alarm) VALUES (?, ?, ?, ?, ?, ?)"
+INSERT_EPISODE = ("INSERT INTO episodes (stream, start_ts, end_ts, duration_s, frames, min_ear) "
+                  "VALUES (?, ?, ?, ?, ?, ?)")
+
+
+def connect(path):
+    """Ouvre la base en mode WAL et crée le schéma si besoin"""
+    conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class _StreamState:
+    """Sous-échantillonnage et épisode en cours d'un flux"""
+
+    __slots__ = ('next_ts', 'last_ts', 'alarm', 'start_ts', 'frames', 'min_ear')
+
+    def __init__(self):
+        self.next_ts = float('-inf')
+        self.last_ts = 0.0
+        self.alarm = False
+        self.start_ts = 0.0
+        self.frames = 0
+        self.min_ear = None
+
+
+class EventStore:
+    """Écriture en arrière-plan, par lots, des frames et épisodes"""
+
+    def __init__(self, path=None, sample_hz=None, batch_size=None, flush_interval=None, queue_size=None):
+        """
+        Args:
+            path: Fichier SQLite (défaut: SQLITE_DB)
+            sample_hz: Lignes par frame et par seconde et par flux, 0 = aucune
+                       (défaut: DB_SAMPLE_HZ)
+            batch_size: Lignes max par transaction (défaut: DB_BATCH_SIZE)
+            flush_interval: Délai max avant écriture (s) (défaut: DB_FLUSH_INTERVAL)
+            queue_size: Lignes en attente max (défaut: DB_QUEUE_SIZE)
+        """
+        cfg = config_advanced
+        self.path = path or cfg.SQLITE_DB
+        sample_hz = cfg.DB_SAMPLE_HZ if sample_hz is None else sample_hz
+        self.sample_period = 1.0 / sample_hz if sample_hz > 0 else None
+        self.batch_size = batch_size or cfg.DB_BATCH_SIZE
+        self.flush_interval = cfg.DB_FLUSH_INTERVAL if flush_interval is None else flush_interval
+
+        # Schéma créé tout de suite: les erreurs d'ouverture remontent ici
+        connect(self.path).close()
+
+        self._queue = queue.Queue(maxsize=queue_size or cfg.DB_QUEUE_SIZE)
+        self._episodes = queue.SimpleQueue()
+        self._streams = {}
+        self.frames_written = 0
+        self.episodes_written = 0
+        self.dropped = 0
+        self.transactions = 0
+
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def record(self, stream, timestamp, ear, closed, alarm):
+        """
+        Enregistre une frame (appelé à chaque frame, jamais bloquant)
+
+        Args:
+            stream: Nom du flux
+            timestamp: Horodatage (s)
+            ear: EAR moyen, None si aucun visage
+            closed: Yeux fermés
+            alarm: État de l'alarme
+        """
+        state = self._streams.get(stream)
+        if state is None:
+            state = self._streams[stream] = _StreamState()
+        state.last_ts = timestamp
+
+        # Épisode d'alarme: suivi sur toutes les frames
+        if alarm:
+            if not state.alarm:
+                state.alarm = True
+                state.start_ts = timestamp
+                state.frames = 0
+                state.min_ear = None
+            state.frames += 1
+            if ear is not None and (state.min_ear is None or ear < state.min_ear):
+                state.min_ear = ear
+        elif state.alarm:
+            state.alarm = False
+            self._episodes.put((stream, state.start_ts, timestamp, timestamp - state.start_ts,
+                                state.frames, state.min_ear))
+
+        # Lignes par frame: sous-échantillonnées
+        if self.sample_period is not None and timestamp >= state.next_ts:
+            state.next_ts = timestamp + self.sample_period
+            try:
+                self._queue.put_nowait((stream, timestamp, ear, ear is not None, bool(closed), bool(alarm)))
+            except queue.Full:
+                self.dropped += 1
+
+    def record_result(self, result, timestamp=None, stream="default"):
+        """Enregistre un résultat de process_frame"""
+        self.record(stream, time.time() if timestamp is None else timestamp,
+                    result['ear_avg'], result['eyes_closed'], result['alarm'])
+
+    def _writer(self):
+        conn = connect(self.path)
+        stop = False
+        try:
+            while not stop:
+                # Lot: tout ce qui est en file, jusqu'à batch_size lignes
+                frames = []
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                    while True:
+                        if item is None:
+                            stop = True
+                            break
+                        frames.append(item)
+                        if len(frames) >= self.batch_size:
+                            break
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+                episodes = []
+                while True:
+                    try:
+                        episodes.append(self._episodes.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if not frames and not episodes:
+                    continue
+                try:
+                    with conn:
+                        if frames:
+                            conn.executemany(INSERT_FRAME, frames)
+                        if episodes:
+                            conn.executemany(INSERT_EPISODE, episodes)
+                except sqlite3.Error as e:
+                    log.error("✗ Erreur base de données: %s", e)
+                    continue
+                self.transactions += 1
+                self.frames_written += len(frames)
+                self.episodes_written += len(episodes)
+        finally:
+            conn.close()
+
+    def close(self):
+        """Clôt les épisodes en cours, écrit les lignes en attente et ferme la base"""
+        for stream, state in self._streams.items():
+            if state.alarm:
+                self._episodes.put((stream, state.start_ts, state.last_ts,
+                                    state.last_ts - state.start_ts, state.frames, state.min_ear))
+                state.alarm = False
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        """
+        Compteurs d'écriture
+
+        Returns:
+            dict: frames_written, episodes_written, transactions, dropped, pending
+        """
+        return {
+            'frames_written': self.frames_written,
+            'episodes_written': self.episodes_written,
+            'transactions': self.transactions,
+            'dropped': self.dropped,
+            'pending': self._queue.qsize(),
+        }
+
+    # ----- Lectures (connexion séparée, index sur stream/ts) -----
+
+    def query_frames(self, start, end, stream=None):
+        """Frames d'une plage horaire: [(stream, ts, ear, face, closed, alarm), ...]"""
+        return query_frames(self.path, start, end, stream)
+
+    def query_episodes(self, start=None, end=None, stream=None):
+        """Épisodes commençant dans une plage horaire (voir query_episodes)"""
+        return query_episodes(self.path, start, end, stream)
+
+
+def query_frames(path, start, end, stream=None):
+    """
+    Lignes par frame entre deux horodatages
+
+    Returns:
+        list: [(stream, ts, ear, face, closed, alarm), ...] triées par ts
+    """
+    sql = "SELECT stream, ts, ear, face, closed, alarm FROM frames WHERE ts >= ? AND ts < ?"
+    args = [start, end]
+    if stream is not None:
+        sql = ("SELECT stream, ts, ear, face, closed, alarm FROM frames "
+               "WHERE stream = ? AND ts >= ? AND ts < ?")
+        args = [stream, start, end]
+    # "with conn" ne fait que valider la transaction: closing() ferme la connexion
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        return conn.execute(sql + " ORDER BY ts", args).fetchall()
+
+
+def query_episodes(path, start=None, end=None, stream=None):
+    """
+    Épisodes d'alarme commençant dans [start, end)
+
+    Returns:
+        list: [(stream, start_ts, end_ts, duration_s, frames, min_ear), ...]
+    """
+    clauses, args = [], []
+    if stream is not None:
+        clauses.append("stream = ?")
+        args.append(stream)
+    if start is not None:
+        clauses.append("start_ts >= ?")
+        args.append(start)
+    if end is not None:
+        clauses.append("start_ts < ?")
+        args.append(end)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    sql = f"SELECT stream, start_ts, end_ts, duration_s, frames, min_ear FROM episodes{where} ORDER BY start_ts"
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        return conn.execute(sql, args).fetchall()
+
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Consultation de la base d'événements")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ep = sub.add_parser("episodes", help="Liste les épisodes d'alarme")
+    fr = sub.add_parser("frames", help="Résumé des frames d'une plage horaire")
+    for p in (ep, fr):
+        p.add_argument("--db", default=config_advanced.SQLITE_DB)
+        p.add_argument("--stream", default=None)
+        p.add_argument("--from", dest="start", type=float, default=None, help="Horodatage de début (s)")
+        p.add_argument("--to", dest="end", type=float, default=None, help="Horodatage de fin (s)")
+        p.add_argument("--since", type=float, default=None, help="Dernières N secondes")
+    args = parser.parse_args()
+
+    start, end = args.start, args.end
+    if args.since is not None:
+        end = time.time()
+        start = end - args.since
+
+    if args.command == "episodes":
+        rows = query_episodes(args.db, start, end, args.stream)
+        print(f"{'Flux':<16} {'Début':<20} {'Durée':>8} {'Frames':>7} {'EAR min':>8}")
+        for stream, start_ts, _, duration, frames, min_ear in rows:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start_ts))
+            ear_text = f"{min_ear:.3f}" if min_ear is not None else "-"
+            print(f"{stream:<16} {when:<20} {duration:>7.1f}s {frames:>7} {ear_text:>8}")
+        print(f"✓ {len(rows)} épisode(s)")
+    else:
+        rows = query_frames(args.db, start if start is not None else float('-inf'),
+                            end if end is not None else float('inf'), args.stream)
+        faces = sum(r[3] for r in rows)
+        closed = sum(r[4] for r in rows)
+        alarms = sum(r[5] for r in rows)
+        print(f"✓ {len(rows)} ligne(s): {faces} avec visage, {closed} yeux fermés, {alarms} en alarme")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+BUS D'ÉVÉNEMENTS DES ALARMES
+============================
+
+La boucle de détection publie des événements (alarme activée/désactivée,
+visage perdu/retrouvé, bâillement, résumé d'épisode, défaut du pipeline
+signalé par chien_de_garde.py) au lieu d'appeler elle-même la
+liaison série, le journal, l'enregistreur de clips, etc.
+
+    boucle ──publish()──> [file "serial"]  ──thread──> arduino
+                      ├─> [file "journal"] ──thread──> logger
+                      └─> [file "clips"]   ──thread──> recorder.trigger()
+
+    - chaque abonné a son thread et sa file bornée: un abonné lent (port
+      série bloqué, disque saturé) ne retarde ni les autres ni la boucle
+    - publish() ne bloque jamais; si la file d'un abonné est pleine, sa
+      politique décide: "drop_old" écarte l'événement le plus ancien (l'état
+      le plus récent compte: alarme, série), "drop_new" écarte le nouveau
+    - retard visible par abonné (stats()): profondeur de file, retard entre
+      publication et traitement, événements écartés, erreurs
+
+Utilisation:
+    bus = EventBus()
+    bus.subscribe("serial", on_alarm, types=(ALARM_ON, ALARM_OFF), queue_size=4)
+    events = DetectionEvents(bus)
+    events.update(result)            # à chaque frame
+    bus.close()
+"""
+
+import threading
+import time
+from collections import deque
+
+import config_advanced
+from journalisation import get_logger
+
+
+log = get_logger("events")
+
+
+# Types d'événements
+ALARM_ON = "alarm_on"
+ALARM_OFF = "alarm_off"
+FACE_LOST = "face_lost"
+FACE_FOUND = "face_found"
+EPISODE = "episode"
+YAWN = "yawn"
+FAULT = "fault"
+FAULT_CLEARED = "fault_cleared"
+
+EVENT_TYPES = (ALARM_ON, ALARM_OFF, FACE_LOST, FACE_FOUND, EPISODE, YAWN, FAULT, FAULT_CLEARED)
+OVERFLOW_POLICIES = ("drop_old", "drop_new")
+
+
+class Event:
+    """Événement publié sur le bus"""
+
+    __slots__ = ('type', 'timestamp', 'stream', 'data', 'published')
+
+    def __init__(self, event_type, timestamp, stream, data):
+        self.type = event_type
+        self.timestamp = timestamp
+        self.stream = stream
+        self.data = data
+        self.published = time.perf_counter()
+
+    def __repr__(self):
+        return f"Event({self.type!r}, {self.timestamp:.3f}, {self.stream!r}, {self.data!r})"
+
+
+class _Subscriber:
+    """File bornée et thread d'un abonné"""
+
+    def __init__(self, name, handler, types, queue_size, overflow):
+        self.name = name
+        self.handler = handler
+        self.types = None if types is None else frozenset(types)
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.handler_time = 0.0
+
+        self.thread = threading.Thread(target=self._run, name=f"bus-{name}", daemon=True)
+        self.thread.start()
+
+    def put(self, event):
+        with self.cond:
+            if len(self.queue) >= self.queue_size:
+                self.dropped += 1
+                if self.overflow == "drop_new":
+                    return False
+                self.queue.popleft()
+            self.queue.append(event)
+            self.max_depth = max(self.max_depth, len(self.queue))
+            self.cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.closed:
+                    self.cond.wait()
+                if not self.queue:
+                    return
+                event = self.queue.popleft()
+
+            start = time.perf_counter()
+            self.lag_last = start - event.published
+            self.lag_max = max(self.lag_max, self.lag_last)
+            try:
+                self.handler(event)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                log.error("✗ Erreur abonné '%s' (%s): %s", self.name, event.type, e, extra={'rate_limit': True})
+            self.handler_time += time.perf_counter() - start
+
+
+class EventBus:
+    """Diffusion des événements vers des abonnés indépendants"""
+
+    def __init__(self, queue_size=None):
+        """
+        Args:
+            queue_size: Taille de file par défaut des abonnés (défaut: EVENT_QUEUE_SIZE)
+        """
+        self.queue_size = queue_size or config_advanced.EVENT_QUEUE_SIZE
+        self._subscribers = []
+        self.published = 0
+
+    def subscribe(self, name, handler, types=None, queue_size=None, overflow="drop_old"):
+        """
+        Abonne un récepteur (appelé dans son propre thread)
+
+        Args:
+            name: Nom de l'abonné (stats, journal)
+            handler: Fonction handler(event)
+            types: Types d'événements reçus (défaut: tous)
+            queue_size: Événements en attente max (défaut: celle du bus)
+            overflow: "drop_old" ou "drop_new" quand la file est pleine
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Politique inconnue: {overflow} (choix: {', '.join(OVERFLOW_POLICIES)})")
+        if types is not None:
+            unknown = set(types) - set(EVENT_TYPES)
+            if unknown:
+                raise ValueError(f"Types d'événements inconnus: {', '.join(sorted(unknown))}")
+        subscriber = _Subscriber(name, handler, types, max(1, queue_size or self.queue_size), overflow)
+        self._subscribers.append(subscriber)
+
+    def publish(self, event_type, timestamp=None, stream="default", **data):
+        """
+        Publie un événement (jamais bloquant)
+
+        Args:
+            event_type: Un des EVENT_TYPES
+            timestamp: Horodatage (défaut: time.time())
+            stream: Nom du flux
+            **data: Champs de l'événement
+
+        Returns:
+            Event: L'événement publié
+        """
+        event = Event(event_type, time.time() if timestamp is None else timestamp, stream, data)
+        self.published += 1
+        for subscriber in self._subscribers:
+            if subscriber.types is None or event_type in subscriber.types:
+                subscriber.put(event)
+        return event
+
+    def stats(self):
+        """
+        Retard et compteurs par abonné
+
+        Returns:
+            dict: {nom: {'pending', 'max_depth', 'delivered', 'dropped', 'errors',
+                   'lag_ms', 'max_lag_ms', 'handler_ms'}}
+        """
+        stats = {}
+        for s in self._subscribers:
+            stats[s.name] = {
+                'pending': len(s.queue),
+                'max_depth': s.max_depth,
+                'delivered': s.delivered,
+                'dropped': s.dropped,
+                'errors': s.errors,
+                'lag_ms': 1000 * s.lag_last,
+                'max_lag_ms': 1000 * s.lag_max,
+                'handler_ms': 1000 * s.handler_time / max(s.delivered + s.errors, 1),
+            }
+        return stats
+
+    def print_stats(self):
+        """Affiche le retard de chaque abonné"""
+        print(f"{'Abonné':<12} {'Traités':>8} {'Écartés':>8} {'Erreurs':>8} {'File max':>9} {'Retard max':>11}")
+        for name, s in self.stats().items():
+            print(f"{name:<12} {s['delivered']:>8} {s['dropped']:>8} {s['errors']:>8} "
+                  f"{s['max_depth']:>9} {s['max_lag_ms']:>9.1f}ms")
+
+    def close(self, timeout=2.0):
+        """
+        Traite les événements en attente puis arrête les abonnés
+
+        Args:
+            timeout: Attente max par abonné (s); un abonné bloqué est abandonné
+        """
+        for s in self._subscribers:
+            with s.cond:
+                s.closed = True
+                s.cond.notify()
+        deadline = time.monotonic() + timeout
+        for s in self._subscribers:
+            s.thread.join(max(0.0, deadline - time.monotonic()))
+            if s.thread.is_alive():
+                log.warning("⚠️  Abonné '%s' bloqué: %d événement(s) abandonné(s)", s.name, len(s.queue))
+
+
+class DetectionEvents:
+    """Transforme les résultats frame par frame en événements"""
+
+    def __init__(self, bus, stream="default", face_lost_frames=None):
+        """
+        Args:
+            bus: EventBus
+            stream: Nom du flux
+            face_lost_frames: Frames sans visage avant FACE_LOST (défaut: FACE_LOST_FRAMES)
+        """
+        self.bus = bus
+        self.stream = stream
+        self.face_lost_frames = max(1, face_lost_frames or config_advanced.FACE_LOST_FRAMES)
+        self.face_present = None
+        self.missing_frames = 0
+        self.alarm = False
+        self.yawning = False
+        self._episode = None
+        self.last_timestamp = 0.0
+
+    def update(self, result, timestamp=None):
+        """
+        Publie les transitions d'un résultat de process_frame
+
+        Args:
+            result: Résultat de process_frame
+            timestamp: Horodatage (défaut: time.time())
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self.last_timestamp = timestamp
+
+        # Visage: perdu après face_lost_frames frames sans visage
+        if result['face_detected']:
+            self.missing_frames = 0
+            if self.face_present is not True:
+                if self.face_present is False:
+                    self.bus.publish(FACE_FOUND, timestamp, self.stream)
+                self.face_present = True
+        else:
+            self.missing_frames += 1
+            if self.face_present and self.missing_frames >= self.face_lost_frames:
+                self.face_present = False
+                self.bus.publish(FACE_LOST, timestamp, self.stream, missing_frames=self.missing_frames)
+
+        # Alarme et épisode
+        alarm = bool(result['alarm'])
+        ear = result['ear_avg']
+        if alarm and not self.alarm:
+            self.alarm = True
+            self._episode = [timestamp, 0, ear]
+            self.bus.publish(ALARM_ON, timestamp, self.stream,
+                             closed_frames=result['eyes_closed_frames'], ear_smooth=result['ear_smooth'],
+                             head_alarm=bool(result.get('head_alarm', False)))
+        elif not alarm and self.alarm:
+            self.alarm = False
+            self.bus.publish(ALARM_OFF, timestamp, self.stream)
+            self._publish_episode(timestamp)
+
+        # Bâillement (un événement par bâillement)
+        yawning = bool(result.get('yawning', False))
+        if yawning and not self.yawning:
+            self.bus.publish(YAWN, timestamp, self.stream, mar=result['mar'])
+        self.yawning = yawning
+
+        if self.alarm:
+            episode = self._episode
+            episode[1] += 1
+            if ear is not None and (episode[2] is None or ear < episode[2]):
+                episode[2] = ear
+
+    def _publish_episode(self, end_ts):
+        start_ts, frames, min_ear = self._episode
+        self._episode = None
+        self.bus.publish(EPISODE, end_ts, self.stream, start_ts=start_ts, duration_s=end_ts - start_ts,
+                         frames=frames, min_ear=min_ear)
+
+    def close(self):
+        """Publie le résumé de l'épisode en cours (fin de session)"""
+        if self.alarm:
+            self.alarm = False
+            self._publish_episode(self.last_timestamp)
+
+
+def log_event(event):
+    """Abonné "journal": une ligne par événement (jamais limitée, voir RateLimitFilter)"""
+    fields = dict(event.data, event=event.type, stream=event.stream)
+    if event.type == ALARM_ON:
+        if event.data.get('head_alarm'):
+            log.warning("🔴 ALARME: Tête penchée!", extra={'fields': fields})
+        else:
+            log.warning("🔴 ALARME: Yeux fermes detectes (%d frames)!", event.data['closed_frames'],
+                        extra={'fields': fields})
+    elif event.type == ALARM_OFF:
+        log.info("🟢 Yeux ouverts: Alarme désactivee", extra={'fields': fields})
+    elif event.type == FACE_LOST:
+        log.info("⚠️  Visage perdu", extra={'fields': fields})
+    elif event.type == FACE_FOUND:
+        log.info("✓ Visage retrouvé", extra={'fields': fields})
+    elif event.type == YAWN:
+        log.info("⚠️  Bâillement détecté (MAR %.2f)", event.data['mar'], extra={'fields': fields})
+    elif event.type == FAULT:
+        log.error("🔴 DÉFAUT: détection interrompue (étape '%s')", event.data['stage'], extra={'fields': fields})
+    elif event.type == FAULT_CLEARED:
+        log.info("🟢 Détection reprise après %.1fs", event.data['duration_s'], extra={'fields': fields})
+    elif event.type == EPISODE:
+        log.info("Épisode d'alarme: %.1fs (%d frames)", event.data['duration_s'], event.data['frames'],
+                 extra={'fields': fields})
+
+
+class EventCounters:
+    """Abonné "metrics": compteurs par type et temps total en alarme"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(EVENT_TYPES, 0)
+        self.alarm_seconds = 0.0
+        self.longest_episode = 0.0
+
+    def __call__(self, event):
+        self.counts[event.type] += 1
+        if event.type == EPISODE:
+            duration = event.data['duration_s']
+            self.alarm_seconds += duration
+            self.longest_episode = max(self.longest_episode, duration)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Compteurs par type, alarm_seconds, longest_episode_s
+        """
+        snapshot = dict(self.counts)
+        snapshot['alarm_seconds'] = self.alarm_seconds
+        snapshot['longest_episode_s'] = self.longest_episode
+        return snapshot
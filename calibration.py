@@ -0,0 +1,228 @@
+"""
+CALIBRATION AUTOMATIQUE PAR CONDUCTEUR (AUTO_CALIBRATION)
+=========================================================
+
+Le seuil global EYE_CLOSED_THRESHOLD ne convient pas à toutes les formes
+d'yeux. La calibration estime l'EAR "yeux ouverts" de chaque conducteur
+et en déduit un seuil personnel:
+
+    seuil = CALIBRATION_RATIO x médiane de l'EAR yeux ouverts
+            (borné par CALIBRATION_MIN_THRESHOLD / CALIBRATION_MAX_THRESHOLD)
+
+    - phase de calibration (CALIBRATION_DURATION s de visage détecté): la
+      médiane est estimée en flux par l'algorithme P² (Jain & Chlamtac,
+      cinq marqueurs, mémoire constante, aucun historique gardé); les
+      clignements, minoritaires, ne la déplacent pas
+    - pendant la conduite, la médiane suit lentement le conducteur
+      (approximation stochastique, pas relatif CALIBRATION_ADAPT_RATE) sur
+      les frames yeux ouverts hors alarme
+    - les profils sont gardés dans CALIBRATION_FILE (JSON, par DRIVER_ID) et
+      rechargés au démarrage: pas de nouvelle calibration à chaque trajet
+
+Pendant la calibration, le seuil de config.py reste appliqué.
+"""
+
+import json
+import os
+import time
+
+import config_advanced
+from journalisation import get_logger
+
+
+log = get_logger("calibration")
+
+
+class P2Quantile:
+    """Quantile en flux, mémoire constante (algorithme P²)"""
+
+    def __init__(self, p=0.5):
+        """
+        Args:
+            p: Quantile estimé (0 < p < 1)
+        """
+        self.p = p
+        self.count = 0
+        self._q = []
+        self._n = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._step = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x):
+        """Ajoute une observation"""
+        self.count += 1
+        q = self._q
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self._n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._step[i]
+
+        # Ajuste les trois marqueurs centraux (parabolique, sinon linéaire)
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    @property
+    def value(self):
+        """Estimation courante (None sans observation)"""
+        if not self.count:
+            return None
+        if self.count <= 5:
+            return self._q[min(int(self.p * self.count), self.count - 1)]
+        return self._q[2]
+
+
+def load_profiles(path=None):
+    """Profils calibrés {conducteur: {...}} (vide si le fichier n'existe pas)"""
+    path = path or config_advanced.CALIBRATION_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_profiles(profiles, path=None):
+    """Écrit les profils (fichier temporaire puis remplacement atomique)"""
+    path = path or config_advanced.CALIBRATION_FILE
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class DriverCalibration:
+    """Seuil EAR personnel d'un conducteur: calibration puis adaptation lente"""
+
+    def __init__(self, driver=None, duration=None, ratio=None, adapt_rate=None, path=None,
+                 min_threshold=None, max_threshold=None, min_samples=30):
+        """
+        Args:
+            driver: Identifiant du conducteur (défaut: DRIVER_ID)
+            duration: Durée de calibration, visage détecté (s) (défaut: CALIBRATION_DURATION)
+            ratio: Seuil / médiane yeux ouverts (défaut: CALIBRATION_RATIO)
+            adapt_rate: Pas relatif de l'adaptation par frame (défaut: CALIBRATION_ADAPT_RATE)
+            path: Fichier des profils (défaut: CALIBRATION_FILE)
+            min_threshold, max_threshold: Bornes du seuil (défaut: config)
+            min_samples: Frames avec visage minimum pour conclure la calibration
+        """
+        cfg = config_advanced
+        self.driver = driver or cfg.DRIVER_ID
+        self.duration = cfg.CALIBRATION_DURATION if duration is None else duration
+        self.ratio = ratio or cfg.CALIBRATION_RATIO
+        self.adapt_rate = cfg.CALIBRATION_ADAPT_RATE if adapt_rate is None else adapt_rate
+        self.path = path or cfg.CALIBRATION_FILE
+        self.min_threshold = cfg.CALIBRATION_MIN_THRESHOLD if min_threshold is None else min_threshold
+        self.max_threshold = cfg.CALIBRATION_MAX_THRESHOLD if max_threshold is None else max_threshold
+        self.min_samples = min_samples
+
+        self._estimator = P2Quantile(0.5)
+        self._elapsed = 0.0
+        self._last_ts = None
+        self.open_median = None
+        self.threshold = None
+        self.samples = 0
+
+        # Profil déjà calibré: seuil disponible tout de suite
+        profile = load_profiles(self.path).get(self.driver)
+        self.loaded = profile is not None
+        if profile is not None:
+            self.open_median = profile['open_ear_median']
+            self.samples = profile.get('samples', 0)
+            self.threshold = self._derive(self.open_median)
+
+    @property
+    def calibrated(self):
+        return self.threshold is not None
+
+    @property
+    def progress(self):
+        """Avancement de la calibration (0 à 1)"""
+        if self.calibrated:
+            return 1.0
+        return min(self._elapsed / self.duration, 1.0) if self.duration > 0 else 1.0
+
+    def _derive(self, median):
+        return min(max(self.ratio * median, self.min_threshold), self.max_threshold)
+
+    def update(self, ear, alarm=False, timestamp=None):
+        """
+        Traite l'EAR d'une frame
+
+        Args:
+            ear: EAR moyen, None si aucun visage
+            alarm: Alarme active (pas d'adaptation pendant l'alarme)
+            timestamp: Horodatage (défaut: time.time())
+
+        Returns:
+            bool: True si le seuil vient de changer (calibration terminée ou adaptation)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        last, self._last_ts = self._last_ts, timestamp
+        if ear is None:
+            return False
+
+        if not self.calibrated:
+            if last is not None:
+                self._elapsed += timestamp - last
+            self._estimator.add(ear)
+            self.samples += 1
+            if self._elapsed >= self.duration and self._estimator.count >= self.min_samples:
+                self.open_median = self._estimator.value
+                self.threshold = self._derive(self.open_median)
+                log.info("✓ Calibration '%s' terminée: EAR yeux ouverts %.3f, seuil %.3f",
+                         self.driver, self.open_median, self.threshold,
+                         extra={'fields': {'event': 'calibration', 'driver': self.driver,
+                                           'open_ear_median': self.open_median, 'threshold': self.threshold}})
+                return True
+            return False
+
+        # Adaptation lente sur les frames yeux ouverts
+        if alarm or ear < self.threshold:
+            return False
+        self.samples += 1
+        step = self.adapt_rate * self.open_median
+        self.open_median += step if ear > self.open_median else -step
+        threshold = self._derive(self.open_median)
+        changed = threshold != self.threshold
+        self.threshold = threshold
+        return changed
+
+    def save(self):
+        """Enregistre le profil du conducteur (s'il est calibré)"""
+        if not self.calibrated:
+            return
+        profiles = load_profiles(self.path)
+        profiles[self.driver] = {
+            'open_ear_median': round(self.open_median, 5),
+            'threshold': round(self.threshold, 5),
+            'samples': self.samples,
+            'updated': time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        save_profiles(profiles, self.path)
@@ -0,0 +1,142 @@
+"""
+CARACTÉRISTIQUES DU VISAGE EN UNE PASSE (EAR, MAR, POSE DE LA TÊTE)
+===================================================================
+
+Face Mesh renvoie déjà tous les points nécessaires: un seul appel à
+FeatureExtractor.extract() calcule, à partir du même tableau de landmarks
+(yeux + bouche + points de pose, extraits ensemble par le détecteur):
+
+    - l'EAR des deux yeux (même calcul, au bit près, que eye_aspect_ratios)
+    - le MAR (Mouth Aspect Ratio) pour les bâillements:
+          MAR = (||81-178|| + ||13-14|| + ||311-402||) / (2 * ||78-308||)
+    - l'inclinaison de la tête (tangage, lacet, roulis en degrés) par
+      cv2.solvePnP sur six points (nez, menton, coins des yeux et de la
+      bouche) et un modèle 3D générique
+
+Les dix distances (EAR + MAR) sont calculées en une opération vectorisée.
+La matrice de la caméra (focale ~ largeur de l'image) est calculée une fois
+par taille d'image, et solvePnP repart de la pose de la frame précédente
+(useExtrinsicGuess): quelques itérations suffisent d'une frame à l'autre.
+
+Activé par DETECT_HEAD_MOVEMENT (MAX_HEAD_ANGLE) ou DETECT_YAWN; les
+indices qui en découlent (bâillement, tête penchée) sont décidés par
+CueEngine dans moteur_decision.py.
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+# Contour intérieur de la bouche: coin gauche, haut (3), coin droit, bas (3)
+MOUTH_IDX = [78, 81, 13, 311, 308, 402, 14, 178]
+
+# Points de pose: nez, menton, coin externe des yeux, coins de la bouche
+POSE_IDX = [1, 152, 33, 263, 61, 291]
+
+# Modèle 3D générique (mm), repère caméra: x à droite, y vers le bas,
+# z vers l'avant (le nez est le point le plus proche de la caméra)
+POSE_MODEL = np.array([
+    [0.0, 0.0, 0.0],          # nez
+    [0.0, 330.0, 65.0],       # menton
+    [-225.0, -170.0, 135.0],  # coin externe de l'œil (à gauche dans l'image)
+    [225.0, -170.0, 135.0],   # coin externe de l'œil (à droite dans l'image)
+    [-150.0, 150.0, 125.0],   # coin de la bouche (à gauche dans l'image)
+    [150.0, 150.0, 125.0],    # coin de la bouche (à droite dans l'image)
+])
+
+
+class FeatureExtractor:
+    """EAR, MAR et pose de la tête à partir d'un seul tableau de landmarks"""
+
+    def __init__(self, eye_idx):
+        """
+        Args:
+            eye_idx: Indices des deux yeux (12, ordre LEFT_EYE_IDX + RIGHT_EYE_IDX)
+        """
+        # Landmarks à extraire: les yeux d'abord (points des yeux = 12 premiers)
+        self.landmark_idx = list(eye_idx)
+        for i in MOUTH_IDX + POSE_IDX:
+            if i not in self.landmark_idx:
+                self.landmark_idx.append(i)
+        pos = {i: k for k, i in enumerate(self.landmark_idx)}
+
+        # Segments: (p2-p6), (p3-p5), (p1-p4) de chaque œil, puis la bouche
+        a, b = [], []
+        for eye in (eye_idx[:6], eye_idx[6:]):
+            for i, j in ((1, 5), (2, 4), (0, 3)):
+                a.append(pos[eye[i]])
+                b.append(pos[eye[j]])
+        for i, j in ((81, 178), (13, 14), (311, 402), (78, 308)):
+            a.append(pos[i])
+            b.append(pos[j])
+        self._seg_a = np.array(a)
+        self._seg_b = np.array(b)
+        self._pose = np.array([pos[i] for i in POSE_IDX])
+
+        # Matrice caméra (par taille d'image) et pose précédente
+        self._size = None
+        self._camera = None
+        self._dist_coeffs = np.zeros((4, 1))
+        self._rvec = None
+        self._tvec = None
+
+    def _camera_matrix(self, width, height):
+        if self._size != (width, height):
+            self._size = (width, height)
+            focal = float(width)
+            self._camera = np.array([[focal, 0.0, width / 2.0],
+                                     [0.0, focal, height / 2.0],
+                                     [0.0, 0.0, 1.0]])
+            self.reset()
+        return self._camera
+
+    def reset(self):
+        """Oublie la pose précédente (visage perdu)"""
+        self._rvec = None
+        self._tvec = None
+
+    def extract(self, points, width, height):
+        """
+        Calcule toutes les caractéristiques d'un visage
+
+        Args:
+            points: Landmarks (len(landmark_idx), 2) en pixels
+            width, height: Taille de l'image
+
+        Returns:
+            tuple: (ear_gauche, ear_droit, mar, tangage, lacet, roulis);
+                   angles en degrés, None si solvePnP échoue
+        """
+        p = np.asarray(points, dtype=np.float64)
+
+        # EAR et MAR: dix distances en une passe
+        d = p[self._seg_a] - p[self._seg_b]
+        dist = np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]).tolist()
+        ratios = []
+        for k in (0, 3):
+            horizontal = 2.0 * dist[k + 2]
+            ratios.append(0.0 if horizontal == 0 else (dist[k] + dist[k + 1]) / horizontal)
+        horizontal = 2.0 * dist[9]
+        mar = 0.0 if horizontal == 0 else (dist[6] + dist[7] + dist[8]) / horizontal
+
+        pitch, yaw, roll = self._head_pose(p[self._pose], width, height)
+        return ratios[0], ratios[1], mar, pitch, yaw, roll
+
+    def _head_pose(self, image_points, width, height):
+        camera = self._camera_matrix(width, height)
+        guess = self._rvec is not None
+        ok, rvec, tvec = cv2.solvePnP(
+            POSE_MODEL, image_points, camera, self._dist_coeffs,
+            rvec=self._rvec, tvec=self._tvec, useExtrinsicGuess=guess, flags=cv2.SOLVEPNP_ITERATIVE)
+        if not ok or tvec[2, 0] <= 0:
+            self.reset()
+            return None, None, None
+        self._rvec, self._tvec = rvec, tvec
+
+        r = cv2.Rodrigues(rvec)[0]
+        pitch = math.degrees(math.atan2(r[2, 1], r[2, 2]))
+        yaw = math.degrees(math.atan2(-r[2, 0], math.hypot(r[0, 0], r[1, 0])))
+        roll = math.degrees(math.atan2(r[1, 0], r[0, 0]))
+        return pitch, yaw, roll
@@ -0,0 +1,214 @@
+"""
+CHIEN DE GARDE DU PIPELINE (WATCHDOG)
+=====================================
+
+Si face_mesh.process() se bloque, si le pilote de la caméra ne rend plus
+de frame ou si la boucle est affamée, main() ne produit plus de résultat:
+l'Arduino, sans commande, finit par couper l'alarme. C'est le mauvais sens
+pour la sécurité. Le chien de garde transforme ce silence en défaut visible:
+
+    boucle:  enter("capture") ... enter("inference") ... enter("output")
+    thread:  toutes les WATCHDOG_INTERVAL s, étape en cours depuis plus de
+             WATCHDOG_DEADLINES[étape] s ?
+                 -> FAULT sur le bus (série: commande "FAULT", l'Arduino
+                    passe en alarme de défaut et n'en sort que sur ON/OFF)
+                 -> action hors boucle de l'étape (on_stall, ex: débloquer
+                    la lecture de la capture)
+                 -> reprise demandée: la boucle, dès qu'elle reprend la
+                    main, reconstruit le détecteur ou la source (recovery)
+             l'étape se termine -> FAULT_CLEARED avec la durée du blocage
+
+enter() ne fait qu'une affectation (aucun verrou): le coût par frame est
+négligeable. La première exécution de chaque étape (chargement du graphe
+MediaPipe, ouverture de la caméra) bénéficie de WATCHDOG_STARTUP_GRACE s
+supplémentaires.
+
+Pour les essais, inject_stall(étape, durée) bloque artificiellement la
+prochaine exécution de l'étape (voir benchmark_watchdog dans
+test_performance.py).
+"""
+
+import threading
+import time
+
+import config_advanced
+from bus_evenements import FAULT, FAULT_CLEARED
+from journalisation import get_logger
+
+
+log = get_logger("watchdog")
+
+
+class PipelineWatchdog:
+    """Surveille les étapes de la boucle et signale les blocages"""
+
+    def __init__(self, bus=None, deadlines=None, interval=None, startup_grace=None, stream="default",
+                 clock=time.monotonic):
+        """
+        Args:
+            bus: EventBus qui reçoit FAULT / FAULT_CLEARED (optionnel)
+            deadlines: Durée max par étape (s) (défaut: WATCHDOG_DEADLINES)
+            interval: Période de vérification (s) (défaut: WATCHDOG_INTERVAL)
+            startup_grace: Délai supplémentaire de la première exécution de
+                           chaque étape (s) (défaut: WATCHDOG_STARTUP_GRACE)
+            stream: Nom du flux (événements)
+            clock: Horloge monotone (secondes)
+        """
+        cfg = config_advanced
+        self.bus = bus
+        self.deadlines = dict(cfg.WATCHDOG_DEADLINES if deadlines is None else deadlines)
+        self.interval = cfg.WATCHDOG_INTERVAL if interval is None else interval
+        self.startup_grace = cfg.WATCHDOG_STARTUP_GRACE if startup_grace is None else startup_grace
+        self.stream = stream
+        self._clock = clock
+
+        # Étape en cours: (nom, début), remplacée d'un bloc par enter()
+        self._current = None
+        self._seen = None
+        self._completed = set()
+        self._on_stall = {}
+        self._injected = {}
+
+        # Blocage en cours, reprise à faire par la boucle, historique
+        self.stall = None
+        self.recovery = None
+        self.faults = 0
+        self.recoveries = 0
+        self.stalls = []
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self._thread.start()
+
+    def enter(self, stage):
+        """Début d'une étape (termine la précédente)"""
+        self._current = (stage, self._clock())
+        if self._injected:
+            duration = self._injected.pop(stage, None)
+            if duration:
+                time.sleep(duration)
+
+    def pause(self):
+        """Suspend la surveillance (attente volontaire, fin de boucle)"""
+        self._current = None
+
+    def on_stall(self, stage, callback):
+        """
+        Action exécutée par le thread du chien de garde quand l'étape se bloque
+
+        Elle ne doit pas attendre l'étape bloquée (ex: débloquer une
+        lecture, pas reconstruire un objet utilisé par la boucle).
+        """
+        self._on_stall[stage] = callback
+
+    def inject_stall(self, stage, duration):
+        """Bloque artificiellement la prochaine exécution de l'étape (essais)"""
+        self._injected[stage] = duration
+
+    def take_recovery(self):
+        """
+        Étape à reconstruire (appelé par la boucle, entre deux frames)
+
+        Returns:
+            str: Nom de l'étape bloquée depuis la dernière reprise, ou None
+        """
+        stage, self.recovery = self.recovery, None
+        if stage is not None:
+            self.recoveries += 1
+        return stage
+
+    def check(self, now=None):
+        """
+        Une vérification (appelée par le thread, ou directement pour les essais)
+
+        Returns:
+            str: Étape bloquée, None si tout va bien
+        """
+        now = self._clock() if now is None else now
+        current = self._current
+
+        if current is not self._seen:
+            if self._seen is not None:
+                self._completed.add(self._seen[0])
+            self._seen = current
+
+        # Blocage terminé: l'étape bloquée a laissé la place (ou pause)
+        stall = self.stall
+        if stall is not None and current is not stall:
+            end = now if current is None else current[1]
+            self._clear(stall, max(end - stall[1], 0.0))
+            stall = None
+
+        if current is None:
+            return None
+        if stall is not None:
+            return stall[0]
+
+        stage, start = current
+        deadline = self.deadlines.get(stage)
+        if deadline is None:
+            return None
+        if stage not in self._completed:
+            deadline += self.startup_grace
+        if now - start <= deadline:
+            return None
+
+        self._fault(current, now - start, deadline)
+        return stage
+
+    def _fault(self, current, elapsed, deadline):
+        stage, start = current
+        self.stall = current
+        self.recovery = stage
+        self.faults += 1
+        log.error("✗ Pipeline bloqué: étape '%s' depuis %.1fs (limite %.1fs)", stage, elapsed, deadline,
+                  extra={'fields': {'event': 'watchdog_fault', 'stage': stage, 'stalled_s': elapsed}})
+        if self.bus is not None:
+            self.bus.publish(FAULT, time.time(), self.stream, stage=stage, stalled_s=elapsed)
+        callback = self._on_stall.get(stage)
+        if callback is not None:
+            try:
+                callback()
+            except Exception as e:
+                log.error("✗ Action de déblocage '%s': %s", stage, e)
+
+    def _clear(self, stall, duration):
+        stage = stall[0]
+        self.stall = None
+        self.stalls.append((stage, duration))
+        log.warning("⚠️  Pipeline repris: étape '%s' bloquée %.1fs", stage, duration,
+                    extra={'fields': {'event': 'watchdog_clear', 'stage': stage, 'duration_s': duration}})
+        if self.bus is not None:
+            self.bus.publish(FAULT_CLEARED, time.time(), self.stream, stage=stage, duration_s=duration)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                log.error("✗ Erreur du chien de garde: %s", e)
+
+    def stats(self):
+        """
+        Returns:
+            dict: faults, recoveries, stalled (blocage en cours), total_stall_s,
+                  longest_stall_s, by_stage {étape: nombre}
+        """
+        durations = [duration for _, duration in self.stalls]
+        by_stage = {}
+        for stage, _ in self.stalls:
+            by_stage[stage] = by_stage.get(stage, 0) + 1
+        return {
+            'faults': self.faults,
+            'recoveries': self.recoveries,
+            'stalled': self.stall is not None,
+            'total_stall_s': sum(durations),
+            'longest_stall_s': max(durations, default=0.0),
+            'by_stage': by_stage,
+        }
+
+    def close(self):
+        """Arrête la surveillance (un blocage en cours est clos et enregistré)"""
+        self._stopped.set()
+        self._thread.join()
+        self.check()
@@ -25,6 +25,10 @@ EYES_CLOSED_FRAMES_THRESHOLD = 10  # ~0.3 secondes à 30 FPS
 # Fenêtre de lissage (nombre de frames pour moyenne mobile)
 SMOOTHING_WINDOW = 5
 
+# Nombre de frames ouvertes consécutives pour couper l'alarme
+# 1 = coupure dès que les yeux se rouvrent
+EYES_OPEN_FRAMES_RELEASE = 1
+
 # ============= VIDÉO =============
 # Résolution de la webcam
 VIDEO_WIDTH = 640
@@ -55,6 +59,7 @@ CONFIG = {
     'eye_closed_threshold': EYE_CLOSED_THRESHOLD,
     'eyes_closed_frames_threshold': EYES_CLOSED_FRAMES_THRESHOLD,
     'smoothing_window': SMOOTHING_WINDOW,
+    'eyes_open_frames_release': EYES_OPEN_FRAMES_RELEASE,
     'video_width': VIDEO_WIDTH,
     'video_height': VIDEO_HEIGHT,
     'video_fps': VIDEO_FPS,
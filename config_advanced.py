@@ -12,6 +12,18 @@ AUTO_CALIBRATION = False
 # Durée de calibration (secondes)
 CALIBRATION_DURATION = 10
 
+# Conducteur (clé du profil calibré) et fichier des profils
+DRIVER_ID = "default"
+CALIBRATION_FILE = "calibration_conducteurs.json"
+
+# Seuil personnel = ratio x médiane de l'EAR yeux ouverts, borné
+CALIBRATION_RATIO = 0.7
+CALIBRATION_MIN_THRESHOLD = 0.12
+CALIBRATION_MAX_THRESHOLD = 0.32
+
+# Adaptation pendant la conduite (pas relatif par frame, 0 = figé)
+CALIBRATION_ADAPT_RATE = 0.0002
+
 # ============= LOGGING =============
 # Activer les logs fichier?
 ENABLE_LOGGING = False
@@ -22,6 +34,16 @@ LOG_FILE = "detection_log.txt"
 # Niveau de log (DEBUG, INFO, WARNING, ERROR)
 LOG_LEVEL = "INFO"
 
+# Rotation du fichier de log (taille max en octets, nombre d'archives)
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUP_COUNT = 3
+
+# Messages répétitifs (erreurs série, webcam, ...) au plus une fois par intervalle (secondes, 0 = sans limite)
+LOG_RATE_LIMIT_SECONDS = 10.0
+
+# Entrées en attente max (au-delà: entrées écartées)
+LOG_QUEUE_SIZE = 10000
+
 # ============= DÉTECTION AVANCÉE =============
 # Utiliser la main pour détecter aussi?
 DETECT_HAND_GESTURES = False
@@ -29,9 +51,30 @@ DETECT_HAND_GESTURES = False
 # Détecter les mouvements de tête?
 DETECT_HEAD_MOVEMENT = False
 
-# Angle max toléré (degrés)
+# Angle max toléré (degrés): tangage ou roulis au-delà = tête penchée
 MAX_HEAD_ANGLE = 45
 
+# Frames consécutives tête penchée avant l'alarme
+HEAD_DOWN_FRAMES = 15
+
+# Détecter les bâillements (ouverture de la bouche, MAR)?
+DETECT_YAWN = False
+
+# MAR au-dessus duquel la bouche est grande ouverte
+YAWN_MAR_THRESHOLD = 0.6
+
+# Frames consécutives bouche ouverte pour compter un bâillement
+YAWN_MIN_FRAMES = 15
+
+# PERCLOS et fréquence des clignements: fenêtre glissante (s)
+PERCLOS_WINDOW = 60
+
+# Fermeture plus courte = clignement (s); au-delà: fermeture longue
+BLINK_MAX_DURATION = 0.5
+
+# Bornes de l'histogramme des durées de fermeture (s)
+BLINK_HISTOGRAM_EDGES = (0.1, 0.2, 0.3, 0.4, 0.5, 1.0, 2.0)
+
 # ============= PERFORMANCE =============
 # Réduire la résolution pour plus de FPS?
 REDUCE_RESOLUTION = False
@@ -42,9 +85,55 @@ RESOLUTION_FACTOR = 2
 # Traiter que 1 frame sur N
 SKIP_FRAMES = 1
 
-# Nb de threads pour traitement
+# Nb de threads pour traitement (OpenCV, BLAS; 0 = valeurs des bibliothèques)
 NUM_THREADS = 1
 
+# Cœurs du thread d'inférence et de MediaPipe, ex: (2, 3) (None = tous, Linux)
+INFERENCE_CPUS = None
+
+# Cœurs des threads d'entrées/sorties et de la capture, ex: (0, 1) (None = tous)
+IO_CPUS = None
+
+# Capture dans un processus séparé (frames en mémoire partagée)?
+MULTIPROCESS_CAPTURE = False
+
+# Nombre de slots de l'anneau de mémoire partagée
+SHARED_FRAME_SLOTS = 4
+
+# Réutiliser les buffers d'une frame à l'autre (image RGB, points, résultat)?
+REUSE_BUFFERS = True
+
+# ============= MOTEUR DE SECOURS =============
+# Moteur OpenCV (cascades) si MediaPipe manque ou devient trop lent?
+FALLBACK_DETECTOR = True
+
+# Cascades du visage et des yeux (fichier, ou nom dans cv2.data.haarcascades;
+# LBP: "lbpcascade_frontalface_improved.xml", plus rapide)
+FALLBACK_FACE_CASCADE = "haarcascade_frontalface_default.xml"
+FALLBACK_EYE_CASCADE = "haarcascade_eye.xml"
+
+# Largeur de l'image de recherche du visage et de la bande des yeux (px)
+FALLBACK_DETECT_WIDTH = 320
+FALLBACK_EYE_ROI_WIDTH = 120
+
+# Ouverture (hauteur sombre / largeur de l'œil) -> échelle de l'EAR
+FALLBACK_OPENNESS_SCALE = 0.6
+
+# Latence max de Face Mesh (s, moyenne glissante) avant la bascule
+FALLBACK_LATENCY_BUDGET = 0.05
+
+# Frames Face Mesh ignorées au démarrage (initialisation du graphe)
+FALLBACK_WARMUP_FRAMES = 10
+
+# Durée (s) pendant laquelle la moyenne doit dépasser le budget avant la bascule
+FALLBACK_SUSTAIN_SECONDS = 2.0
+
+# Essai de MediaPipe pendant le secours toutes les N secondes
+FALLBACK_PROBE_INTERVAL = 5.0
+
+# Essais rapides consécutifs avant le retour à MediaPipe
+FALLBACK_RECOVERY_PROBES = 3
+
 # ============= PWM (Pour broches PWM) =============
 # Utiliser PWM pour contrôle graduel?
 USE_PWM = False
@@ -68,6 +157,25 @@ COMMAND_TIMEOUT = 5000
 # Désactiver l'alarme après X secondes (0 = jamais)
 AUTO_ALARM_TIMEOUT = 0
 
+# Chien de garde: défaut (commande série "FAULT") si la boucle se bloque
+WATCHDOG = True
+
+# Durée max de chaque étape de la boucle (s)
+WATCHDOG_DEADLINES = {'capture': 2.0, 'inference': 1.0, 'output': 1.0}
+
+# Période de vérification (s)
+WATCHDOG_INTERVAL = 0.1
+
+# Délai supplémentaire de la première frame (chargement du modèle, caméra) (s)
+WATCHDOG_STARTUP_GRACE = 10.0
+
+# ============= BUS D'ÉVÉNEMENTS =============
+# Événements en attente max par abonné (série, journal, clips, ...)
+EVENT_QUEUE_SIZE = 64
+
+# Frames sans visage avant l'événement "visage perdu"
+FACE_LOST_FRAMES = 15
+
 # ============= NOTIFICATIONS =============
 # Notifications desktop?
 DESKTOP_NOTIFICATIONS = True
@@ -75,12 +183,23 @@ DESKTOP_NOTIFICATIONS = True
 # Commande notification (Linux: notify-send, etc)
 NOTIFICATION_CMD = "notify-send"
 
+# Regroupement des alarmes rapprochées (s) et écart min entre notifications (s)
+NOTIFICATION_DEBOUNCE = 1.0
+NOTIFICATION_MIN_INTERVAL = 30.0
+
+# Durée max de la commande (s) et processus simultanés max
+NOTIFICATION_TIMEOUT = 2.0
+NOTIFICATION_WORKERS = 2
+
 # Sons d'alerte locaux?
 LOCAL_SOUND = False
 
 # Fichier son d'alerte
 ALERT_SOUND_FILE = "alarm.wav"
 
+# Échantillons par bloc audio (~6 ms à 44,1 kHz: délai max de démarrage/arrêt)
+AUDIO_BLOCK_SIZE = 256
+
 # ============= DATABASE =============
 # Enregistrer dans une base de données?
 USE_DATABASE = False
@@ -91,6 +210,14 @@ DATABASE_TYPE = "sqlite"
 # Fichier SQLite
 SQLITE_DB = "detections.db"
 
+# Lignes par frame enregistrées par seconde et par flux (0 = épisodes seulement)
+DB_SAMPLE_HZ = 5
+
+# Lignes max par transaction, délai max avant écriture (s), lignes en attente max
+DB_BATCH_SIZE = 1000
+DB_FLUSH_INTERVAL = 1.0
+DB_QUEUE_SIZE = 10000
+
 # Connexion MySQL
 MYSQL_HOST = "localhost"
 MYSQL_USER = "root"
@@ -124,6 +251,12 @@ PROFILES = {
 # Profil actif
 ACTIVE_PROFILE = "default"
 
+# Rechargement à chaud de config.py et du profil actif (sans redémarrer)
+HOT_RELOAD = False
+
+# Période de surveillance des fichiers (s)
+HOT_RELOAD_INTERVAL = 1.0
+
 # ============= EXPORT / IMPORT =============
 # Format export vidéo
 VIDEO_FORMAT = "mp4v"  # ou "MJPG", "X264"
@@ -135,7 +268,62 @@ EXPORT_FRAMES = False
 # Dossier export
 EXPORT_DIR = "./export"
 
+# Frames exportées: "every_n" (une sur N), "closed" (yeux fermés), "alarm" (en alarme)
+EXPORT_MODE = "closed"
+EXPORT_EVERY_N = 30
+
+# Format des images ("jpg" ou "png") et qualité JPEG
+EXPORT_FORMAT = "jpg"
+EXPORT_JPEG_QUALITY = 90
+
+# Threads d'encodage, frames en attente max (au-delà: frames écartées)
+EXPORT_WORKERS = 2
+EXPORT_QUEUE_SIZE = 16
+
+# Frames écrites par lot et fichiers par sous-dossier
+EXPORT_BATCH = 8
+EXPORT_FILES_PER_DIR = 1000
+
+# Enregistrer un clip autour de chaque alarme (tampon en mémoire)?
+EVENT_CLIPS = False
+
+# Dossier des clips
+CLIPS_DIR = "./clips"
+
+# Secondes gardées avant l'alarme / écrites après
+CLIP_PRE_SECONDS = 5
+CLIP_POST_SECONDS = 5
+
+# Qualité JPEG des frames du tampon (0 = brutes, ~1 Mo par frame 640x480)
+CLIP_JPEG_QUALITY = 80
+
+# Enregistrer les landmarks des yeux (rejeu hors-ligne sans MediaPipe)?
+RECORD_LANDMARKS = False
+
+# Fichier d'enregistrement des landmarks
+LANDMARKS_FILE = "session.sdlm"
+
+# Nombre de frames par bloc d'enregistrement
+LANDMARKS_CHUNK_FRAMES = 1024
+
 # ============= DEBUG DÉTAILLÉ =============
+# Mode sans affichage (aucun dessin ni fenêtre, boîtiers sans écran)?
+HEADLESS = False
+
+# Cadence max de rafraîchissement de l'overlay (images/s), indépendante de la détection
+OVERLAY_FPS = 10
+
+# Aperçu MJPEG par HTTP (débogage à distance, encode seulement si un client regarde)?
+PREVIEW_SERVER = False
+
+# Adresse d'écoute ("0.0.0.0" pour toutes les interfaces) et port
+PREVIEW_HOST = "127.0.0.1"
+PREVIEW_PORT = 8080
+
+# Cadence max (images/s) et qualité JPEG (0-100) de l'aperçu
+PREVIEW_FPS = 5
+PREVIEW_QUALITY = 70
+
 # Afficher les landmark points?
 SHOW_LANDMARKS = True
 
@@ -0,0 +1,457 @@
+"""
+DÉTECTEUR DE SECOURS OPENCV (MODE DÉGRADÉ)
+==========================================
+
+Sans MediaPipe, main() s'arrêtait; avec un CPU saturé, la boucle prenait
+du retard. Ce module fournit un moteur de secours uniquement OpenCV et la
+bascule automatique entre les deux moteurs.
+
+CascadeEyeDetector (même interface qu'EyeClosureDetector, dont il hérite):
+    - visage: cascade Haar ou LBP (FALLBACK_FACE_CASCADE) sur une image
+      réduite à FALLBACK_DETECT_WIDTH px, recherchée d'abord autour du
+      visage précédent
+    - yeux: cascade (FALLBACK_EYE_CASCADE) dans chaque moitié de la bande
+      des yeux du visage, réduite à FALLBACK_EYE_ROI_WIDTH px
+    - ouverture: hauteur de la zone sombre (iris, pupille) / largeur de
+      l'œil, x FALLBACK_OPENNESS_SCALE; un œil non trouvé par la cascade
+      (entraînée sur des yeux ouverts) compte comme fermé
+    - les deux yeux sont rendus sous forme de six points dont l'EAR vaut
+      cette ouverture: lissage, alarme, PERCLOS, enregistrement et
+      affichage restent ceux du détecteur MediaPipe
+
+EngineSelector choisit le moteur frame par frame:
+    - MediaPipe indisponible: moteur de secours en permanence
+    - latence de Face Mesh (moyenne glissante, après FALLBACK_WARMUP_FRAMES
+      frames d'initialisation) > FALLBACK_LATENCY_BUDGET pendant
+      FALLBACK_SUSTAIN_SECONDS: bascule sur le moteur de secours
+    - toutes les FALLBACK_PROBE_INTERVAL s, une frame passe par MediaPipe;
+      après FALLBACK_RECOVERY_PROBES essais sous le budget (avec marge),
+      retour à MediaPipe
+    - l'état de décision (compteurs, alarme en cours, PERCLOS) est unique
+      et survit aux bascules
+
+Comparaison des deux moteurs sur les mêmes clips (vitesse, détection du
+visage, accord avec MediaPipe frame par frame et sur l'alarme):
+    python detecteur_secours.py clips/*.mp4
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+import config_advanced
+from detection_yeux_fermes_arduino import EyeClosureDetector, mp_solutions
+from enregistreur_evenements import video_extension
+from journalisation import get_logger
+
+
+log = get_logger("fallback")
+
+
+def cascade_path(name):
+    """Chemin d'une cascade: fichier existant, sinon dans cv2.data.haarcascades"""
+    if os.path.isfile(name):
+        return name
+    data_dir = getattr(getattr(cv2, "data", None), "haarcascades", "")
+    return os.path.join(data_dir, name)
+
+
+def cascades_available(face_cascade=None, eye_cascade=None):
+    """True si les deux cascades du moteur de secours sont présentes"""
+    cfg = config_advanced
+    return all(os.path.isfile(cascade_path(name)) for name in
+               (face_cascade or cfg.FALLBACK_FACE_CASCADE, eye_cascade or cfg.FALLBACK_EYE_CASCADE))
+
+
+def _load_cascade(name):
+    classifier = cv2.CascadeClassifier(cascade_path(name))
+    if classifier.empty():
+        raise RuntimeError(f"Cascade introuvable ou invalide: {name}")
+    return classifier
+
+
+class CascadeEyeDetector(EyeClosureDetector):
+    """Détecteur de secours: cascades OpenCV et heuristique d'ouverture des yeux"""
+
+    # Bande des yeux dans la boîte du visage (fractions de la hauteur)
+    EYE_BAND = (0.2, 0.55)
+
+    def __init__(self, face_cascade=None, eye_cascade=None, detect_width=None, eye_roi_width=None,
+                 openness_scale=None, recorder=None, reuse_buffers=False):
+        """
+        Args:
+            face_cascade, eye_cascade: Fichiers ou noms dans cv2.data.haarcascades
+                                       (défaut: FALLBACK_FACE_CASCADE / FALLBACK_EYE_CASCADE)
+            detect_width: Largeur de l'image de recherche du visage (défaut: FALLBACK_DETECT_WIDTH)
+            eye_roi_width: Largeur de la bande des yeux réduite (défaut: FALLBACK_EYE_ROI_WIDTH)
+            openness_scale: Ouverture -> échelle EAR (défaut: FALLBACK_OPENNESS_SCALE)
+            recorder, reuse_buffers: Voir EyeClosureDetector
+
+        Raises:
+            RuntimeError: Cascade introuvable
+        """
+        super().__init__(use_mediapipe=False, recorder=recorder, reuse_buffers=reuse_buffers, features=False)
+        cfg = config_advanced
+        self.face_cascade = _load_cascade(face_cascade or cfg.FALLBACK_FACE_CASCADE)
+        self.eye_cascade = _load_cascade(eye_cascade or cfg.FALLBACK_EYE_CASCADE)
+        self.detect_width = detect_width or cfg.FALLBACK_DETECT_WIDTH
+        self.eye_roi_width = eye_roi_width or cfg.FALLBACK_EYE_ROI_WIDTH
+        self.openness_scale = cfg.FALLBACK_OPENNESS_SCALE if openness_scale is None else openness_scale
+        self._face = None
+
+    def rebuild(self):
+        """Oublie le visage suivi"""
+        super().rebuild()
+        self._face = None
+
+    def detect_all_eye_points(self, frame, rgb=None):
+        """
+        Cherche le visage et ses yeux avec les cascades
+
+        Returns:
+            np.ndarray: Points (n_visages, 2, 6, 2) int32, n_visages = 0 ou 1
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self.last_face_points = None
+        face = self._find_face(gray)
+        self._face = face
+        if face is None:
+            return np.empty((0, 2, 6, 2), dtype=np.int32)
+        return self._eye_points(gray, face)[None]
+
+    def _find_face(self, gray):
+        h, w = gray.shape[:2]
+        scale = min(1.0, self.detect_width / w)
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+        small = cv2.equalizeHist(small)
+        min_size = max(20, small.shape[1] // 8)
+
+        # Autour du visage précédent d'abord (zone plus petite), sinon toute l'image
+        faces = ()
+        if self._face is not None:
+            x, y, fw, fh = (np.array(self._face) * scale).astype(int)
+            x0, y0 = max(0, x - fw // 2), max(0, y - fh // 2)
+            x1, y1 = min(small.shape[1], x + fw + fw // 2), min(small.shape[0], y + fh + fh // 2)
+            faces = self.face_cascade.detectMultiScale(small[y0:y1, x0:x1], scaleFactor=1.1, minNeighbors=4,
+                                                       minSize=(min_size, min_size))
+            faces = [(fx + x0, fy + y0, fw_, fh_) for fx, fy, fw_, fh_ in faces]
+        if not len(faces):
+            faces = self.face_cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=4,
+                                                       minSize=(min_size, min_size))
+        if not len(faces):
+            return None
+
+        x, y, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        return tuple(int(round(v / scale)) for v in (x, y, fw, fh))
+
+    def _eye_points(self, gray, face):
+        x, y, w, h = face
+        top, bottom = y + int(self.EYE_BAND[0] * h), y + int(self.EYE_BAND[1] * h)
+        band = gray[max(top, 0):bottom, max(x, 0):x + w]
+        scale = self.eye_roi_width / max(band.shape[1], 1)
+        band = cv2.equalizeHist(cv2.resize(band, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+
+        half = band.shape[1] // 2
+        points = np.empty((2, 6, 2))
+        for k, (x0, region) in enumerate(((0, band[:, :half]), (half, band[:, half:]))):
+            points[k] = self._eye_contour(region)
+            points[k, :, 0] += x0
+        points = points / scale + (max(x, 0), max(top, 0))
+        return np.rint(points).astype(np.int32)
+
+    def _eye_contour(self, region):
+        """Six points (ordre p1..p6 de l'EAR) d'un œil dans la région, EAR = ouverture"""
+        rh, rw = region.shape[:2]
+        eyes = self.eye_cascade.detectMultiScale(region, scaleFactor=1.1, minNeighbors=3,
+                                                 minSize=(max(rw // 5, 8), max(rw // 5, 8)))
+        if len(eyes):
+            ex, ey, ew, eh = max(eyes, key=lambda e: e[2] * e[3])
+            cx, cy, width = ex + ew / 2.0, ey + eh / 2.0, 0.8 * ew
+            height = self._openness(region[ey:ey + eh, ex:ex + ew]) * width
+        else:
+            # Cascade muette: œil fermé (contour plat à la place attendue)
+            cx, cy, width, height = rw / 2.0, rh / 2.0, rw / 2.0, 0.0
+
+        dx, dy = width / 2.0, height / 2.0
+        return np.array([[cx - dx, cy], [cx - dx / 3, cy - dy], [cx + dx / 3, cy - dy],
+                         [cx + dx, cy], [cx + dx / 3, cy + dy], [cx - dx / 3, cy + dy]])
+
+    def _openness(self, patch):
+        """Hauteur de la zone sombre (iris, pupille) / largeur, à l'échelle de l'EAR"""
+        ph, pw = patch.shape[:2]
+        center = patch[:, pw // 5:pw - pw // 5]
+        if not center.size:
+            return 0.0
+        darkest, median = float(center.min()), float(np.median(center))
+        if median - darkest < 10:
+            return 0.0  # aucune zone sombre visible: paupière fermée
+        dark = center <= darkest + 0.35 * (median - darkest)
+        rows = np.flatnonzero(dark.mean(axis=1) > 0.15)
+        if not len(rows):
+            return 0.0
+        return self.openness_scale * (rows[-1] - rows[0] + 1) / pw
+
+
+class EngineSelector:
+    """
+    MediaPipe quand c'est possible, moteur de secours sinon
+
+    Interface d'EyeClosureDetector (process_frame, engine, analytics, ...):
+    les attributs non définis ici sont ceux du détecteur qui porte l'état
+    de décision (MediaPipe s'il existe).
+    """
+
+    def __init__(self, primary=None, fallback=None, budget=None, probe_interval=None,
+                 recovery_probes=None, smoothing=0.1, recovery_margin=0.7, warmup_frames=None,
+                 sustain=None):
+        """
+        Args:
+            primary: EyeClosureDetector MediaPipe (None: indisponible)
+            fallback: CascadeEyeDetector (défaut: nouveau, même mode de buffers)
+            budget: Latence max de Face Mesh (s) (défaut: FALLBACK_LATENCY_BUDGET)
+            probe_interval: Essai de MediaPipe pendant le secours (s) (défaut: FALLBACK_PROBE_INTERVAL)
+            recovery_probes: Essais réussis avant le retour (défaut: FALLBACK_RECOVERY_PROBES)
+            smoothing: Poids d'une frame dans la moyenne de latence
+            recovery_margin: Essai réussi si latence < budget x marge
+            warmup_frames: Frames Face Mesh ignorées au démarrage (défaut: FALLBACK_WARMUP_FRAMES)
+            sustain: Dépassement du budget (s) avant la bascule (défaut: FALLBACK_SUSTAIN_SECONDS)
+        """
+        cfg = config_advanced
+        reuse = primary.reuse_buffers if primary is not None else cfg.REUSE_BUFFERS
+        self.primary = primary
+        self.fallback = fallback if fallback is not None else CascadeEyeDetector(reuse_buffers=reuse)
+        self.budget = cfg.FALLBACK_LATENCY_BUDGET if budget is None else budget
+        self.probe_interval = cfg.FALLBACK_PROBE_INTERVAL if probe_interval is None else probe_interval
+        self.recovery_probes = cfg.FALLBACK_RECOVERY_PROBES if recovery_probes is None else recovery_probes
+        self.smoothing = smoothing
+        self.recovery_margin = recovery_margin
+        self.warmup_frames = cfg.FALLBACK_WARMUP_FRAMES if warmup_frames is None else warmup_frames
+        self.sustain = cfg.FALLBACK_SUSTAIN_SECONDS if sustain is None else sustain
+
+        # L'état de décision vit dans un seul détecteur
+        self.decider = primary if primary is not None else self.fallback
+        self.using_fallback = primary is None
+        self.latency = None
+        self._warmup = self.warmup_frames
+        self._over_since = None
+        self._next_probe = 0.0
+        self._good_probes = 0
+        self.switches = 0
+        self.frames = {'mediapipe': 0, 'opencv': 0}
+        self.time = {'mediapipe': 0.0, 'opencv': 0.0}
+
+    def __getattr__(self, name):
+        return getattr(self.decider, name)
+
+    @property
+    def engine_name(self):
+        return "opencv" if self.using_fallback else "mediapipe"
+
+    def process_frame(self, frame, timestamp=None, rgb=None, draw=True):
+        """Voir EyeClosureDetector.process_frame (moteur choisi pour cette frame)"""
+        now = time.monotonic()
+        probe = self.using_fallback and self.primary is not None and now >= self._next_probe
+
+        start = time.perf_counter()
+        if self.using_fallback and not probe:
+            eye_pts = self.fallback.detect_eye_points(frame)
+            face_points = None
+        else:
+            # Essai pendant le secours: les points de MediaPipe servent aussi
+            eye_pts = self.primary.detect_eye_points(frame, rgb)
+            face_points = self.primary.last_face_points
+        elapsed = time.perf_counter() - start
+
+        engine = "opencv" if self.using_fallback and not probe else "mediapipe"
+        self.frames[engine] += 1
+        self.time[engine] += elapsed
+        if engine == "mediapipe":
+            self._observe(elapsed, probe, now)
+
+        result = self.decider.process_eye_points(eye_pts, timestamp, face_points)
+        if draw and eye_pts is not None:
+            eye_color = (0, 0, 255) if result.eyes_closed else (0, 255, 0)
+            cv2.polylines(frame, [eye_pts[0], eye_pts[1]], True, eye_color, 2)
+        result.frame = frame
+        return result
+
+    def _observe(self, elapsed, probe, now):
+        if probe:
+            self._next_probe = now + self.probe_interval
+            if elapsed < self.budget * self.recovery_margin:
+                self._good_probes += 1
+                if self._good_probes >= self.recovery_probes:
+                    self.latency = elapsed
+                    self._switch(False, elapsed)
+            else:
+                self._good_probes = 0
+            return
+
+        # Premières frames: initialisation du graphe, hors moyenne
+        if self._warmup > 0:
+            self._warmup -= 1
+            return
+
+        self.latency = elapsed if self.latency is None else (
+            self.smoothing * elapsed + (1 - self.smoothing) * self.latency)
+        if self.latency <= self.budget:
+            self._over_since = None
+            return
+
+        # Bascule seulement si le dépassement dure (pas sur un pic isolé)
+        if self._over_since is None:
+            self._over_since = now
+        if now - self._over_since >= self.sustain:
+            self._over_since = None
+            self._next_probe = now + self.probe_interval
+            self._good_probes = 0
+            self._switch(True, self.latency)
+
+    def _switch(self, fallback, latency):
+        self.using_fallback = fallback
+        self.switches += 1
+        if self.primary.features is not None:
+            self.primary.features.reset()
+        if fallback:
+            self.fallback.rebuild()
+            log.warning("⚠️  Face Mesh trop lent (%.0f ms > %.0f ms): moteur de secours OpenCV",
+                        latency * 1000, self.budget * 1000,
+                        extra={'fields': {'event': 'engine_switch', 'engine': 'opencv', 'latency_s': latency}})
+        else:
+            log.info("✓ Face Mesh de nouveau rapide (%.0f ms): retour à MediaPipe", latency * 1000,
+                     extra={'fields': {'event': 'engine_switch', 'engine': 'mediapipe', 'latency_s': latency}})
+
+    def rebuild(self):
+        """Voir EyeClosureDetector.rebuild (les deux moteurs)"""
+        if self.primary is not None:
+            self.primary.rebuild()
+            # Nouveau graphe: nouvelle initialisation à ignorer
+            self._warmup = self.warmup_frames
+            self.latency = None
+            self._over_since = None
+        self.fallback.rebuild()
+
+    def stats(self):
+        """
+        Returns:
+            dict: engine (moteur courant), switches, frames et ms_per_frame par moteur
+        """
+        return {
+            'engine': self.engine_name,
+            'switches': self.switches,
+            'frames': dict(self.frames),
+            'ms_per_frame': {name: 1000 * self.time[name] / n if n else None
+                             for name, n in self.frames.items()},
+        }
+
+
+def _run_clip(detector, path):
+    """EAR, visage, alarme et temps de détection de chaque frame d'un clip"""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    ear, alarm, times = [], [], []
+    frame_index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        start = time.perf_counter()
+        eye_pts = detector.detect_eye_points(frame)
+        times.append(time.perf_counter() - start)
+        result = detector.process_eye_points(eye_pts, frame_index / fps)
+        ear.append(np.nan if result.ear_avg is None else result.ear_avg)
+        alarm.append(result.alarm)
+        frame_index += 1
+    cap.release()
+    return np.array(ear), np.array(alarm, dtype=bool), np.array(times)
+
+
+def compare_engines(paths):
+    """
+    Vitesse et précision des deux moteurs sur les mêmes clips
+
+    MediaPipe sert de référence (pas d'annotation): accord frame par frame
+    sur "yeux fermés" (EAR brut < seuil) et sur l'alarme.
+
+    Args:
+        paths: Fichiers vidéo
+
+    Returns:
+        dict: {moteur: {frames, ms_mean, ms_p95, face_rate, closed_agreement,
+              alarm_agreement}} (accords None sans MediaPipe)
+    """
+    engines = {}
+    if mp_solutions is not None:
+        engines['mediapipe'] = lambda: EyeClosureDetector(features=False)
+    if cascades_available():
+        engines['opencv'] = CascadeEyeDetector
+
+    runs = {name: [] for name in engines}
+    for path in paths:
+        for name, factory in engines.items():
+            runs[name].append(_run_clip(factory(), path))
+
+    threshold = EyeClosureDetector(use_mediapipe=False).engine.eye_closed_threshold
+    reference = runs.get('mediapipe')
+    report = {}
+    for name, clips in runs.items():
+        if not clips:
+            continue
+        ear = np.concatenate([c[0] for c in clips])
+        alarm = np.concatenate([c[1] for c in clips])
+        times = np.concatenate([c[2] for c in clips])
+        entry = {
+            'frames': len(ear),
+            'ms_mean': float(times.mean() * 1000) if len(times) else None,
+            'ms_p95': float(np.percentile(times, 95) * 1000) if len(times) else None,
+            'face_rate': float(np.mean(~np.isnan(ear))) if len(ear) else None,
+            'closed_agreement': None,
+            'alarm_agreement': None,
+        }
+        if reference is not None:
+            ref_ear = np.concatenate([c[0] for c in reference])
+            ref_alarm = np.concatenate([c[1] for c in reference])
+            both = ~np.isnan(ear) & ~np.isnan(ref_ear)
+            if both.any():
+                entry['closed_agreement'] = float(np.mean((ear[both] < threshold) == (ref_ear[both] < threshold)))
+            entry['alarm_agreement'] = float(np.mean(alarm == ref_alarm)) if len(alarm) else None
+        report[name] = entry
+    return report
+
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Compare MediaPipe et le moteur de secours OpenCV")
+    parser.add_argument("clips", nargs="*", help="Fichiers vidéo (défaut: clips de CLIPS_DIR)")
+    args = parser.parse_args()
+
+    pattern = os.path.join(config_advanced.CLIPS_DIR, "clip_*" + video_extension())
+    paths = args.clips or sorted(glob.glob(pattern))
+    if not paths:
+        print("✗ Aucun clip (voir EVENT_CLIPS / CLIPS_DIR)")
+        return
+    if mp_solutions is None:
+        print("⚠️  MediaPipe non disponible: pas de référence, vitesse et détection seulement")
+    if not cascades_available():
+        print("⚠️  Cascades OpenCV introuvables: moteur de secours ignoré")
+
+    report = compare_engines(paths)
+
+    def fmt(value, pattern):
+        return "-" if value is None else pattern.format(value)
+
+    print(f"✓ {len(paths)} clip(s)\n")
+    print(f"{'Moteur':<10} {'Frames':>7} {'Moyenne':>9} {'p95':>9} {'Visage':>7} {'Fermés':>7} {'Alarme':>7}")
+    for name, r in report.items():
+        print(f"{name:<10} {r['frames']:>7} {fmt(r['ms_mean'], '{:.1f}ms'):>9} {fmt(r['ms_p95'], '{:.1f}ms'):>9} "
+              f"{fmt(r['face_rate'], '{:.0%}'):>7} {fmt(r['closed_agreement'], '{:.0%}'):>7} "
+              f"{fmt(r['alarm_agreement'], '{:.0%}'):>7}")
+    print("\nFermés / Alarme: accord frame par frame avec MediaPipe")
+
+
+if __name__ == "__main__":
+    main()
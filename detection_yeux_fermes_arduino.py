@@ -18,18 +18,51 @@ Branchement Arduino:
 - Buzzer: Pin 12 (ou à modifier dans le code)
 """
 
+# Threads BLAS limités avant le chargement de numpy (voir politique_threads.py)
+from politique_threads import apply_thread_policy, pin_threads, print_thread_report, set_blas_env
+set_blas_env()
+
 import cv2
-import mediapipe as mp
 import numpy as np
 from serial import Serial
+import os
+import signal
 import time
 import sys
 import importlib
-from collections import deque
 from typing import List, Tuple
 from config import CONFIG
+import config_advanced
+from affichage import OverlayDisplay, display_available
+from alerte_sonore import AudioAlert, audio_available
+from analyse_clignements import BlinkAnalytics
+from apercu_mjpeg import PreviewServer
+from base_evenements import EventStore
+from bus_evenements import (ALARM_ON, ALARM_OFF, FAULT, FAULT_CLEARED, DetectionEvents, EventBus,
+                            EventCounters, log_event)
+from calibration import DriverCalibration
+from chien_de_garde import PipelineWatchdog
+from caracteristiques_visage import FeatureExtractor
+from enregistrement_landmarks import LandmarkRecorder
+from enregistreur_evenements import EventClipRecorder
+from export_frames import FrameExporter
+from journalisation import get_logger, setup_logging
+from moteur_decision import CueEngine, DecisionEngine, MultiDecisionEngine
+from notifications import DesktopNotifier, command_available
+from rechargement_config import ConfigWatcher
+from suivi_visages import FaceTracker, boxes_from_points
+from transport_memoire_partagee import SharedFrameCapture
+
+log = get_logger()
+arduino_log = get_logger("arduino")
+
+# Fallback pour mp.solutions (différentes versions de MediaPipe); sans
+# MediaPipe, main() passe au moteur de secours OpenCV (detecteur_secours.py)
+try:
+    import mediapipe as mp
+except ImportError:
+    mp = None
 
-# Fallback pour mp.solutions (différentes versions de MediaPipe)
 try:
     mp_solutions = mp.solutions
 except Exception:
@@ -75,120 +108,609 @@ def eye_aspect_ratio(landmarks: List[Tuple[float, float]], indices: List[int]) -
     return ear
 
 
+def eye_aspect_ratios(points) -> np.ndarray:
+    """
+    Calcule l'EAR de manière vectorisée sur un tableau de points d'yeux
+    
+    Args:
+        points: Tableau (..., 6, 2) contenant les 6 points de chaque œil,
+                dans l'ordre de LEFT_EYE_IDX / RIGHT_EYE_IDX
+        
+    Returns:
+        np.ndarray: EAR de forme (...), 0.0 quand la largeur de l'œil est nulle
+    """
+    p = np.asarray(points, dtype=np.float64)
+    
+    # (p2-p6), (p3-p5), (p1-p4)
+    d = p[..., [1, 2, 0], :] - p[..., [5, 4, 3], :]
+    dist = np.sqrt(d[..., 0] * d[..., 0] + d[..., 1] * d[..., 1])
+    
+    vertical = dist[..., 0] + dist[..., 1]
+    horizontal = 2.0 * dist[..., 2]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ear = np.where(horizontal == 0, 0.0, vertical / horizontal)
+    return ear
+
+
+class DetectionResult:
+    """
+    Résultat d'une frame
+    
+    Objet à attributs fixes (__slots__) plutôt qu'un dict créé à chaque
+    frame; l'accès par clé (result['alarm']) reste disponible.
+    """
+    
+    __slots__ = ('eyes_closed', 'left_ear', 'right_ear', 'ear_avg', 'ear_smooth',
+                 'eyes_closed_frames', 'alarm', 'alarm_changed', 'face_detected',
+                 'perclos', 'blink_rate', 'longest_closure', 'mar', 'yawning', 'head_pose',
+                 'head_alarm', 'eye_points', 'frame')
+    
+    def __init__(self):
+        self.eyes_closed = False
+        self.left_ear = None
+        self.right_ear = None
+        self.ear_avg = None
+        self.ear_smooth = None
+        self.eyes_closed_frames = 0
+        self.alarm = False
+        self.alarm_changed = False
+        self.face_detected = False
+        self.perclos = 0.0
+        self.blink_rate = 0.0
+        self.longest_closure = 0.0
+        self.mar = None
+        self.yawning = False
+        self.head_pose = None
+        self.head_alarm = False
+        self.eye_points = None
+        self.frame = None
+    
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+    
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+    
+    def __contains__(self, key):
+        return key in self.__slots__
+    
+    def keys(self):
+        return self.__slots__
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+    
+    def to_dict(self):
+        """Copie sous forme de dict (à conserver au-delà de la frame)"""
+        return {key: getattr(self, key) for key in self.__slots__}
+    
+    def __repr__(self):
+        return f"DetectionResult({self.to_dict()!r})"
+
+
 class EyeClosureDetector:
     """Détecteur de fermeture des yeux avec MediaPipe Face Mesh"""
     
-    def __init__(self, min_detection_confidence=0.5):
-        """Initialise le détecteur MediaPipe"""
-        
-        if mp_solutions is None:
-            raise RuntimeError(
-                "MediaPipe 'solutions' submodule not found. "
-                "Install mediapipe in the active environment."
-            )
-        
-        # MediaPipe Face Mesh
-        mp_face_mesh = mp_solutions.face_mesh
-        self.face_mesh = mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=0.5
-        )
+    # Indices MediaPipe pour les yeux (landmarks 468)
+    # Les meilleurs indices pour EAR stablement
+    LEFT_EYE_IDX = [33, 160, 158, 133, 153, 144]
+    RIGHT_EYE_IDX = [263, 387, 385, 362, 380, 373]
+    
+    # Points des segments de l'EAR dans l'ordre d'un œil: (p2-p6), (p3-p5), (p1-p4)
+    _EAR_POINTS = np.array([[1, 2, 0], [5, 4, 3]])
+    
+    def __init__(self, min_detection_confidence=0.5, use_mediapipe=True, recorder=None, max_faces=1,
+                 static_image_mode=False, reuse_buffers=False, features=None):
+        """
+        Initialise le détecteur MediaPipe
         
-        self.mp_drawing = mp_solutions.drawing_utils
+        Args:
+            min_detection_confidence: Confiance minimale de détection du visage
+            use_mediapipe: False pour un détecteur sans Face Mesh (rejeu
+                           d'enregistrements de landmarks)
+            recorder: LandmarkRecorder optionnel qui reçoit les points des yeux
+                      de chaque frame (voir enregistrement_landmarks.py)
+            max_faces: Nombre de visages suivis (> 1: utiliser process_frame_multi)
+            static_image_mode: True pour traiter chaque frame indépendamment
+                               (frames de plusieurs flux entrelacées)
+            reuse_buffers: Mode faible allocation: image RGB, points des yeux
+                           et résultat réutilisés d'une frame à l'autre (ils
+                           ne sont valides que jusqu'à la frame suivante)
+            features: Bouche et pose de la tête en plus des yeux (voir
+                      caracteristiques_visage.py) (défaut: DETECT_HEAD_MOVEMENT
+                      ou DETECT_YAWN)
+        """
         
-        # Indices MediaPipe pour les yeux (landmarks 468)
-        # Les meilleurs indices pour EAR stablement
-        self.LEFT_EYE_IDX = [33, 160, 158, 133, 153, 144]
-        self.RIGHT_EYE_IDX = [263, 387, 385, 362, 380, 373]
+        if use_mediapipe:
+            if mp_solutions is None:
+                raise RuntimeError(
+                    "MediaPipe 'solutions' submodule not found. "
+                    "Install mediapipe in the active environment."
+                )
+            
+            # MediaPipe Face Mesh
+            self._face_mesh_options = {
+                'static_image_mode': static_image_mode,
+                'max_num_faces': max_faces,
+                'refine_landmarks': True,
+                'min_detection_confidence': min_detection_confidence,
+                'min_tracking_confidence': 0.5,
+            }
+            self.face_mesh = mp_solutions.face_mesh.FaceMesh(**self._face_mesh_options)
+            
+            self.mp_drawing = mp_solutions.drawing_utils
+        else:
+            self.face_mesh = None
+            self.mp_drawing = None
         
-        # Buffer pour lissage (moyenne mobile)
-        self.ear_buffer = deque(maxlen=CONFIG['smoothing_window'])
+        # Indices des deux yeux concaténés (gauche puis droit)
+        self.EYE_IDX = self.LEFT_EYE_IDX + self.RIGHT_EYE_IDX
         
-        # Compteurs et état
-        self.eyes_closed_frames = 0
-        self.eyes_open_frames = 0
-        self.is_alarming = False
-        self.alarm_start_time = None
+        # Enregistrement optionnel des landmarks
+        self.recorder = recorder
+        
+        # Lissage, compteurs et alarme (partagés avec le traitement hors-ligne)
+        self.engine = DecisionEngine()
+        
+        # PERCLOS, clignements et fermetures (fenêtres glissantes)
+        self.analytics = BlinkAnalytics()
+        
+        # Bâillements et tête penchée: landmarks supplémentaires extraits
+        # avec ceux des yeux (les 12 premiers restent les points des yeux)
+        if features is None:
+            features = config_advanced.DETECT_HEAD_MOVEMENT or config_advanced.DETECT_YAWN
+        if features:
+            self.features = FeatureExtractor(self.EYE_IDX)
+            self.cues = CueEngine()
+            self.landmark_idx = self.features.landmark_idx
+        else:
+            self.features = None
+            self.cues = None
+            self.landmark_idx = self.EYE_IDX
+        self.last_face_points = None
+        self._alarm = False
+        
+        # Mode multi-visages: suivi par slots et état dans des tableaux
+        self.max_faces = max_faces
+        self.tracker = FaceTracker(max_faces)
+        self.multi_engine = MultiDecisionEngine(max_faces)
+        
+        # Buffers persistants du mode faible allocation
+        self.reuse_buffers = reuse_buffers
+        self._rgb = None
+        self._scale = np.ones(2)
+        self._coords = np.empty((max_faces, len(self.landmark_idx), 2))
+        self._points = np.zeros((max_faces, len(self.landmark_idx), 2), dtype=np.int32)
+        self._eye_pts = self._points[:, :len(self.EYE_IDX)].reshape(max_faces, 2, 6, 2)
+        self._polylines = [self._eye_pts[0, 0], self._eye_pts[0, 1]]
+        self._ear_pairs = np.empty((2, 2, 3, 2), dtype=np.int32)
+        self._ear_diff = np.empty((2, 3, 2))
+        self._ear_dist = np.empty((2, 3))
+        self._result = DetectionResult()
+    
+    @property
+    def eyes_closed_frames(self):
+        """Nombre de frames fermées consécutives"""
+        return self.engine.eyes_closed_frames
+    
+    @property
+    def eyes_open_frames(self):
+        """Nombre de frames ouvertes consécutives"""
+        return self.engine.eyes_open_frames
     
-    def process_frame(self, frame):
+    @property
+    def is_alarming(self):
+        """État courant de l'alarme (yeux fermés ou tête penchée)"""
+        return self._alarm
+    
+    def process_frame(self, frame, timestamp=None, rgb=None, draw=True):
         """
         Traite une frame pour détecter les yeux fermés
         
         Args:
             frame: Image OpenCV (BGR)
+            timestamp: Horodatage de la frame (secondes), utilisé pour
+                       l'enregistrement des landmarks (défaut: time.time())
+            rgb: Version RGB de la frame si elle est déjà disponible
+                 (évite la conversion, voir transport_memoire_partagee.py)
+            draw: Dessiner le contour des yeux sur la frame (False: sans
+                  affichage, ou overlay dessiné ailleurs, voir affichage.py)
             
         Returns:
-            dict: Résultats de la détection avec clés:
+            DetectionResult: Résultats de la détection (accès par attribut
+            ou par clé):
                 - eyes_closed: bool
                 - left_ear: float
                 - right_ear: float
                 - ear_avg: float
                 - ear_smooth: float
                 - eyes_closed_frames: int
+                - alarm: bool (état de l'alarme, voir moteur_decision.py)
+                - alarm_changed: bool (l'alarme vient de changer d'état)
                 - face_detected: bool
+                - perclos: float (proportion yeux fermés, PERCLOS_WINDOW)
+                - blink_rate: float (clignements par minute)
+                - longest_closure: float (plus longue fermeture, s)
+                - mar: float ou None (ouverture de la bouche, si activé)
+                - yawning: bool (bâillement en cours)
+                - head_pose: (tangage, lacet, roulis) en degrés ou None
+                - head_alarm: bool (tête penchée au-delà de MAX_HEAD_ANGLE)
+                - eye_points: np.ndarray (2, 6, 2) ou None
                 - frame: np.ndarray
         """
-        h, w, c = frame.shape
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        eye_pts = self.detect_eye_points(frame, rgb)
+        result = self.process_eye_points(eye_pts, timestamp, self.last_face_points)
+        
+        if draw and eye_pts is not None:
+            # Dessine les yeux pour debug
+            eye_color = (0, 0, 255) if result.eyes_closed else (0, 255, 0)
+            polylines = self._polylines if self.reuse_buffers else [eye_pts[0], eye_pts[1]]
+            cv2.polylines(frame, polylines, True, eye_color, 2)
+        
+        result.frame = frame
+        return result
+    
+    def rebuild(self):
+        """
+        Recrée le graphe Face Mesh (reprise après un blocage de l'inférence)
+        
+        L'état de décision (lissage, compteurs, alarme, PERCLOS, calibration)
+        est conservé; seul le suivi du visage repart de zéro.
+        """
+        if self.face_mesh is not None:
+            try:
+                self.face_mesh.close()
+            except Exception as e:
+                log.error("✗ Fermeture de Face Mesh: %s", e)
+            self.face_mesh = mp_solutions.face_mesh.FaceMesh(**self._face_mesh_options)
+        if self.features is not None:
+            self.features.reset()
+        self.last_face_points = None
+    
+    def detect_eye_points(self, frame, rgb=None):
+        """
+        Exécute Face Mesh et extrait les points des yeux, sans mise à jour d'état
+        
+        Args:
+            frame: Image OpenCV (BGR)
+            rgb: Version RGB de la frame si elle est déjà disponible
+            
+        Returns:
+            np.ndarray: Points (2, 6, 2) int32 [œil gauche, œil droit] du
+                        premier visage, ou None si aucun visage n'est détecté
+                        (en mode faible allocation: vue valide jusqu'à la
+                        frame suivante)
+        """
+        faces = self.detect_all_eye_points(frame, rgb)
+        return faces[0] if len(faces) else None
+    
+    def detect_all_eye_points(self, frame, rgb=None):
+        """
+        Exécute Face Mesh et extrait les points des yeux de chaque visage
+        
+        Args:
+            frame: Image OpenCV (BGR)
+            rgb: Version RGB de la frame si elle est déjà disponible
+            
+        Returns:
+            np.ndarray: Points (n_visages, 2, 6, 2) int32 (n_visages peut être 0);
+                        tous les landmarks du premier visage (landmark_idx)
+                        restent dans last_face_points
+        """
+        h, w = frame.shape[:2]
+        if rgb is None:
+            rgb = self._to_rgb(frame)
         
         # Détecte les landmarks faciaux
-        results = self.face_mesh.process(rgb_frame)
-        
-        result = {
-            'eyes_closed': False,
-            'left_ear': None,
-            'right_ear': None,
-            'ear_avg': None,
-            'ear_smooth': None,
-            'eyes_closed_frames': self.eyes_closed_frames,
-            'face_detected': False,
-            'frame': frame
-        }
+        results = self.face_mesh.process(rgb)
+        
+        faces = results.multi_face_landmarks
+        n = len(faces) if faces else 0
+        if self.reuse_buffers:
+            coords, points, eye_pts = self._coords[:n], self._points[:n], self._eye_pts[:n]
+        else:
+            coords = np.empty((n, len(self.landmark_idx), 2))
+            points = np.empty((n, len(self.landmark_idx), 2), dtype=np.int32)
+            eye_pts = points[:, :len(self.EYE_IDX)].reshape(n, 2, 6, 2)
+        self.last_face_points = points[0] if n else None
+        if not n:
+            return eye_pts
+        
+        # Seuls les landmarks utilisés (yeux, et bouche/pose si activés)
+        # sont convertis en pixels
+        for f, face in enumerate(faces):
+            landmarks = face.landmark
+            row = coords[f]
+            for k, i in enumerate(self.landmark_idx):
+                point = landmarks[i]
+                row[k, 0] = point.x
+                row[k, 1] = point.y
+        
+        self._scale[0] = w
+        self._scale[1] = h
+        np.multiply(coords, self._scale, out=coords)
+        np.copyto(points, coords, casting='unsafe')
+        return eye_pts
+    
+    def _to_rgb(self, frame):
+        """Conversion BGR -> RGB, dans un buffer persistant en mode faible allocation"""
+        if not self.reuse_buffers:
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        else:
+            if self._rgb is None or self._rgb.shape != frame.shape:
+                self._rgb = np.empty_like(frame)
+            self._rgb.flags.writeable = True
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
         
-        if results.multi_face_landmarks:
-            result['face_detected'] = True
+        # Image en lecture seule: MediaPipe la référence sans la copier
+        rgb.flags.writeable = False
+        return rgb
+    
+    def process_frame_multi(self, frame, rgb=None, draw=True):
+        """
+        Traite une frame en mode multi-visages
+        
+        Args:
+            frame: Image OpenCV (BGR)
+            rgb: Version RGB de la frame si elle est déjà disponible
+            draw: Dessiner les yeux et l'identifiant de chaque visage
             
-            # Extrait les landmarks du visage
-            pts = [(int(lm.x * w), int(lm.y * h)) for lm in results.multi_face_landmarks[0].landmark]
+        Returns:
+            dict: Voir process_eye_points_multi, plus 'eye_points'
+            (n_visages, 2, 6, 2) et 'frame'
+        """
+        eye_pts = self.detect_all_eye_points(frame, rgb)
+        result = self.process_eye_points_multi(eye_pts)
+        
+        if draw:
+            for pts, closed, track_id in zip(eye_pts, result['eyes_closed'], result['track_ids']):
+                eye_color = (0, 0, 255) if closed else (0, 255, 0)
+                cv2.polylines(frame, [pts[0], pts[1]], True, eye_color, 2)
+                cv2.putText(frame, f"#{track_id}", (int(pts[0, 0, 0]), int(pts[0, :, 1].min()) - 10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, eye_color, 1)
+        
+        result['eye_points'] = eye_pts
+        result['frame'] = frame
+        return result
+    
+    def summarize_multi(self, multi, timestamp=None):
+        """
+        Résultat multi-visages résumé au format de process_frame
+        
+        L'alarme est active si au moins un visage suivi est en alarme. Le
+        visage le plus somnolent (le plus de frames fermées, puis l'EAR
+        lissé le plus bas) représente la frame: ses EAR, ses points
+        (enregistrement, affichage), PERCLOS et clignements.
+        
+        Args:
+            multi: Résultat de process_frame_multi
+            timestamp: Horodatage de la frame (défaut: time.time())
+            
+        Returns:
+            DetectionResult: Voir process_frame (bouche et pose non calculées)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        kept = np.flatnonzero(multi['slots'] >= 0)
+        eye_pts = None
+        left_ear = right_ear = ear_avg = ear_smooth = None
+        eyes_closed, closed_frames = False, 0
+        if len(kept):
+            order = np.lexsort((multi['ear_smooth'][kept], -multi['eyes_closed_frames'][kept]))
+            i = kept[order[0]]
+            left_ear, right_ear = float(multi['left_ear'][i]), float(multi['right_ear'][i])
+            ear_avg, ear_smooth = float(multi['ear_avg'][i]), float(multi['ear_smooth'][i])
+            eyes_closed = bool(multi['eyes_closed'][i])
+            closed_frames = int(multi['eyes_closed_frames'][i])
+            if 'eye_points' in multi:
+                eye_pts = multi['eye_points'][i]
+        if self.recorder is not None:
+            self.recorder.append(timestamp, eye_pts)
+        
+        analytics = self.analytics
+        analytics.update(timestamp, ear_avg, self.multi_engine.eye_closed_threshold)
+        previous = self._alarm
+        self._alarm = bool(multi['any_alarm'])
+        
+        result = self._result if self.reuse_buffers else DetectionResult()
+        result.eyes_closed = eyes_closed
+        result.left_ear = left_ear
+        result.right_ear = right_ear
+        result.ear_avg = ear_avg
+        result.ear_smooth = ear_smooth
+        result.eyes_closed_frames = closed_frames
+        result.alarm = self._alarm
+        result.alarm_changed = self._alarm != previous
+        result.face_detected = bool(len(kept))
+        result.perclos = analytics.perclos
+        result.blink_rate = analytics.blink_rate
+        result.longest_closure = analytics.longest_closure
+        result.mar = None
+        result.yawning = False
+        result.head_pose = None
+        result.head_alarm = False
+        result.eye_points = eye_pts
+        result.frame = multi.get('frame')
+        return result
+    
+    def process_eye_points_multi(self, eye_pts):
+        """
+        Suit les visages et met à jour leur état en une passe vectorisée
+        
+        Args:
+            eye_pts: Points (n_visages, 2, 6, 2) de la frame
             
-            # Calcule l'EAR pour chaque œil
-            left_ear = eye_aspect_ratio(pts, self.LEFT_EYE_IDX)
-            right_ear = eye_aspect_ratio(pts, self.RIGHT_EYE_IDX)
+        Returns:
+            dict: Tableaux alignés sur les visages de la frame:
+                - slots, track_ids: slot et identifiant de piste (-1 si ignoré,
+                  plus de visages que de slots)
+                - left_ear, right_ear, ear_avg, ear_smooth
+                - eyes_closed, eyes_closed_frames, alarm
+                - any_alarm: bool (au moins une piste suivie en alarme)
+        """
+        eye_pts = np.asarray(eye_pts).reshape(-1, 2, 6, 2)
+        
+        # Paramètres courants du moteur principal (calibration, rechargement à chaud)
+        engine = self.multi_engine
+        engine.configure(self.engine.eye_closed_threshold, self.engine.closed_frames_threshold,
+                         self.engine.smoothing_window, self.engine.release_frames)
+        
+        slots, released = self.tracker.update(boxes_from_points(eye_pts))
+        self.multi_engine.reset(released)
+        
+        # EAR de tous les visages en une seule passe
+        ears = eye_aspect_ratios(eye_pts).reshape(-1, 2)
+        ear_avg = (ears[:, 0] + ears[:, 1]) / 2.0
+        
+        kept = slots >= 0
+        engine.update(slots[kept], ear_avg[kept])
+        
+        def per_face(values, fill):
+            out = np.full(len(slots), fill, dtype=values.dtype)
+            out[kept] = values[slots[kept]]
+            return out
+        
+        return {
+            'slots': slots,
+            'track_ids': per_face(self.tracker.track_ids, -1),
+            'left_ear': ears[:, 0],
+            'right_ear': ears[:, 1],
+            'ear_avg': ear_avg,
+            'ear_smooth': per_face(engine.ear_smooth, np.nan),
+            'eyes_closed': per_face(engine.eyes_closed, False),
+            'eyes_closed_frames': per_face(engine.eyes_closed_frames, 0),
+            'alarm': per_face(engine.alarm, False),
+            'any_alarm': bool(engine.alarm[self.tracker.active].any()),
+        }
+    
+    def process_eye_points(self, eye_pts, timestamp=None, face_points=None):
+        """
+        Calcule l'EAR et met à jour l'état à partir des points des yeux
+        
+        Args:
+            eye_pts: Tableau (2, 6, 2) des points [œil gauche, œil droit],
+                     ou None si aucun visage n'est détecté
+            timestamp: Horodatage de la frame (secondes)
+            face_points: Tous les landmarks du visage (landmark_idx); avec
+                         l'extracteur activé, EAR, MAR et pose sont calculés
+                         en un seul appel
             
-            result['left_ear'] = left_ear
-            result['right_ear'] = right_ear
+        Returns:
+            DetectionResult: Voir process_frame, avec 'frame' à None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if self.recorder is not None:
+            self.recorder.append(timestamp, eye_pts)
+        
+        if eye_pts is None:
+            if self.features is not None:
+                self.features.reset()
+            return self.update(None, None, timestamp)
+        
+        if face_points is not None and self.features is not None:
+            # EAR, MAR et pose en une passe (EAR identique au calcul ci-dessous)
+            left_ear, right_ear, mar, pitch, yaw, roll = self.features.extract(
+                face_points, self._scale[0], self._scale[1])
+            result = self.update(left_ear, right_ear, timestamp, mar,
+                                 None if pitch is None else (pitch, yaw, roll))
+            result.eye_points = eye_pts
+            return result
+        
+        if self.reuse_buffers:
+            left_ear, right_ear = self._eye_aspect_ratios_inplace(eye_pts)
+        else:
+            left_ear, right_ear = eye_aspect_ratios(eye_pts)
+        result = self.update(float(left_ear), float(right_ear), timestamp)
+        result.eye_points = eye_pts
+        return result
+    
+    def _eye_aspect_ratios_inplace(self, eye_pts):
+        """Même calcul que eye_aspect_ratios, dans des buffers persistants"""
+        pairs, diff, dist = self._ear_pairs, self._ear_diff, self._ear_dist
+        
+        # (p2, p3, p1) puis (p6, p5, p4) de chaque œil
+        np.take(eye_pts, self._EAR_POINTS, axis=1, out=pairs, mode='clip')
+        np.subtract(pairs[:, 0], pairs[:, 1], out=diff)
+        np.multiply(diff, diff, out=diff)
+        np.add(diff[..., 0], diff[..., 1], out=dist)
+        np.sqrt(dist, out=dist)
+        
+        ears = []
+        for vertical1, vertical2, horizontal in dist.tolist():
+            horizontal *= 2.0
+            ears.append(0.0 if horizontal == 0 else (vertical1 + vertical2) / horizontal)
+        return ears
+    
+    def update(self, left_ear, right_ear, timestamp=None, mar=None, head_pose=None):
+        """
+        Met à jour le lissage, les compteurs et l'alarme à partir des EAR
+        
+        C'est la logique de décision pure, sans MediaPipe: elle est partagée
+        entre le traitement en direct et le rejeu d'enregistrements.
+        
+        Args:
+            left_ear: EAR de l'œil gauche (None si aucun visage)
+            right_ear: EAR de l'œil droit (None si aucun visage)
+            timestamp: Horodatage de la frame (s) pour PERCLOS et les
+                       clignements (défaut: time.time())
+            mar: Ouverture de la bouche (None: non calculée)
+            head_pose: (tangage, lacet, roulis) en degrés (None: non calculée)
             
+        Returns:
+            DetectionResult: Voir process_frame, avec 'frame' à None (objet
+            réutilisé d'une frame à l'autre en mode faible allocation)
+        """
+        engine = self.engine
+        
+        if left_ear is None:
+            engine.update(None)
+            ear_avg = None
+        else:
             # Moyenne des deux yeux
             ear_avg = (left_ear + right_ear) / 2.0
-            result['ear_avg'] = ear_avg
-            
-            # Ajoute au buffer pour lissage
-            self.ear_buffer.append(ear_avg)
-            ear_smooth = np.mean(self.ear_buffer) if self.ear_buffer else ear_avg
-            result['ear_smooth'] = ear_smooth
-            
-            # Détecte si les yeux sont fermés
-            if ear_smooth < CONFIG['eye_closed_threshold']:
-                result['eyes_closed'] = True
-                self.eyes_closed_frames += 1
-                self.eyes_open_frames = 0
+            engine.update(ear_avg)
+        
+        analytics = self.analytics
+        analytics.update(time.time() if timestamp is None else timestamp, ear_avg, engine.eye_closed_threshold)
+        
+        # Indices complémentaires: la tête penchée déclenche aussi l'alarme
+        cues = self.cues
+        if cues is not None:
+            if not config_advanced.DETECT_YAWN:
+                mar = None
+            if head_pose is None or not config_advanced.DETECT_HEAD_MOVEMENT:
+                cues.update(mar)
             else:
-                self.eyes_open_frames += 1
-                self.eyes_closed_frames = 0
-            
-            result['eyes_closed_frames'] = self.eyes_closed_frames
-            
-            # Dessine les yeux pour debug
-            left_eye_pts = [pts[i] for i in self.LEFT_EYE_IDX]
-            right_eye_pts = [pts[i] for i in self.RIGHT_EYE_IDX]
-            
-            eye_color = (0, 0, 255) if result['eyes_closed'] else (0, 255, 0)
-            cv2.polylines(frame, [np.array(left_eye_pts)], True, eye_color, 2)
-            cv2.polylines(frame, [np.array(right_eye_pts)], True, eye_color, 2)
+                cues.update(mar, head_pose[0], head_pose[2])
+        previous = self._alarm
+        self._alarm = engine.alarm or (cues is not None and cues.head_alarm)
         
+        result = self._result if self.reuse_buffers else DetectionResult()
+        result.eyes_closed = engine.eyes_closed
+        result.left_ear = left_ear
+        result.right_ear = right_ear
+        result.ear_avg = ear_avg
+        result.ear_smooth = engine.ear_smooth
+        result.eyes_closed_frames = engine.eyes_closed_frames
+        result.alarm = self._alarm
+        result.alarm_changed = self._alarm != previous
+        result.face_detected = left_ear is not None
+        result.perclos = analytics.perclos
+        result.blink_rate = analytics.blink_rate
+        result.longest_closure = analytics.longest_closure
+        result.mar = mar
+        result.yawning = cues is not None and cues.yawning
+        result.head_pose = head_pose
+        result.head_alarm = cues is not None and cues.head_alarm
+        result.eye_points = None
+        result.frame = None
         return result
 
 
@@ -231,14 +753,14 @@ class ArduinoController:
             command: 'ON' pour activer, 'OFF' pour désactiver
         """
         if not self.connected:
-            print("✗ Arduino non connecté")
+            arduino_log.warning("✗ Arduino non connecté", extra={'fields': {'command': command}, 'rate_limit': True})
             return False
         
         try:
             self.ser.write((command + '\n').encode())
             return True
         except Exception as e:
-            print(f"✗ Erreur d'envoi: {e}")
+            arduino_log.error("✗ Erreur d'envoi: %s", e, extra={'fields': {'command': command}, 'rate_limit': True})
             return False
     
     def activate_alarm(self):
@@ -257,6 +779,17 @@ class ArduinoController:
             print("✓ Connexion Arduino fermée")
 
 
+def open_capture():
+    """Ouvre la webcam (dans un processus séparé si MULTIPROCESS_CAPTURE)"""
+    if config_advanced.MULTIPROCESS_CAPTURE:
+        return SharedFrameCapture(0, n_slots=config_advanced.SHARED_FRAME_SLOTS)
+    cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CONFIG['video_width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CONFIG['video_height'])
+    cap.set(cv2.CAP_PROP_FPS, CONFIG['video_fps'])
+    return cap
+
+
 def main():
     """Fonction principale"""
     
@@ -264,119 +797,277 @@ def main():
     print("  DÉTECTION YEUX FERMÉS + CONTRÔLE ARDUINO (LED & BUZZER)")
     print("=" * 70 + "\n")
     
-    # Vérifie que MediaPipe est installé
+    # Messages de la boucle: file + écriture en arrière-plan (console, JSON-lines)
+    log_listener = setup_logging()
+    if config_advanced.ENABLE_LOGGING:
+        print(f"✓ Journal: {config_advanced.LOG_FILE} (niveau {config_advanced.LOG_LEVEL})")
+    
+    # Threads OpenCV/BLAS et cœur de l'inférence, avant la création de
+    # MediaPipe (ses threads héritent de l'affinité de ce thread)
+    for warning in apply_thread_policy():
+        print(f"⚠️  Politique de threads: {warning}")
+    
+    # Vérifie que MediaPipe est installé (sinon: moteur de secours OpenCV)
+    from detecteur_secours import CascadeEyeDetector, EngineSelector, cascades_available
+    use_fallback = config_advanced.FALLBACK_DETECTOR and cascades_available()
+    multi_face = config_advanced.MULTI_FACE_MODE
     if mp_solutions is None:
-        print("✗ MediaPipe non disponible. Veuillez installer: pip install mediapipe")
-        sys.exit(1)
+        if not use_fallback:
+            print("✗ MediaPipe non disponible. Veuillez installer: pip install mediapipe")
+            sys.exit(1)
+        print("⚠️  MediaPipe non disponible - moteur de secours OpenCV (précision réduite)")
+        if multi_face:
+            print("⚠️  Mode multi-visages indisponible sans MediaPipe - un seul visage")
+            multi_face = False
+    
+    # Enregistrement optionnel des landmarks pour le rejeu hors-ligne
+    recorder = None
+    if config_advanced.RECORD_LANDMARKS:
+        recorder = LandmarkRecorder(
+            config_advanced.LANDMARKS_FILE,
+            EyeClosureDetector.LEFT_EYE_IDX + EyeClosureDetector.RIGHT_EYE_IDX,
+            chunk_frames=config_advanced.LANDMARKS_CHUNK_FRAMES
+        )
+        print(f"✓ Enregistrement des landmarks: {config_advanced.LANDMARKS_FILE}")
     
     # Initialise le détecteur et Arduino
+    selector = None
     try:
-        detector = EyeClosureDetector()
-        print("✓ Détecteur MediaPipe initialisé")
+        detector = None
+        if mp_solutions is not None:
+            max_faces = config_advanced.MAX_FACES if multi_face else 1
+            detector = EyeClosureDetector(recorder=recorder, reuse_buffers=config_advanced.REUSE_BUFFERS,
+                                          max_faces=max_faces)
+            print("✓ Détecteur MediaPipe initialisé" + (f" ({max_faces} visages max)" if multi_face else ""))
+        if use_fallback and not multi_face:
+            # L'état de décision (et l'enregistrement) reste dans MediaPipe s'il existe
+            fallback = CascadeEyeDetector(recorder=recorder if detector is None else None,
+                                          reuse_buffers=config_advanced.REUSE_BUFFERS)
+            detector = selector = EngineSelector(detector, fallback)
+            print(f"✓ Moteur de secours OpenCV prêt (Face Mesh > "
+                  f"{1000 * config_advanced.FALLBACK_LATENCY_BUDGET:.0f} ms)")
+        elif config_advanced.FALLBACK_DETECTOR and not multi_face:
+            print("⚠️  Cascades OpenCV introuvables - pas de moteur de secours")
     except Exception as e:
         print(f"✗ Erreur détecteur: {e}")
         sys.exit(1)
     
+    # Seuil personnel du conducteur (profil enregistré ou calibration)
+    calibration = None
+    if config_advanced.AUTO_CALIBRATION:
+        calibration = DriverCalibration()
+        if calibration.loaded:
+            detector.engine.eye_closed_threshold = calibration.threshold
+            print(f"✓ Profil '{calibration.driver}' chargé: seuil EAR {calibration.threshold:.3f}")
+        else:
+            print(f"✓ Calibration '{calibration.driver}': regardez la route les yeux ouverts "
+                  f"({calibration.duration}s)")
+    
+    # Rechargement à chaud: config.py et profil actif appliqués entre deux frames
+    watcher = None
+    if config_advanced.HOT_RELOAD:
+        try:
+            watcher = ConfigWatcher()
+            detector.engine.configure(**watcher.current.engine_params())
+            if calibration is not None and calibration.calibrated:
+                detector.engine.eye_closed_threshold = calibration.threshold
+            if hasattr(signal, "SIGHUP"):
+                signal.signal(signal.SIGHUP, lambda signum, frame: watcher.request_reload())
+            print(f"✓ Rechargement à chaud (profil '{watcher.current.profile}', kill -HUP {os.getpid()})")
+        except Exception as e:
+            print(f"✗ Erreur configuration: {e}")
+    
     arduino = ArduinoController()
     if not arduino.connected:
         print("⚠️  Arduino non connecté - mode simulation")
     
-    # Capture vidéo
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CONFIG['video_width'])
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CONFIG['video_height'])
-    cap.set(cv2.CAP_PROP_FPS, CONFIG['video_fps'])
+    # Capture vidéo (dans un processus séparé si demandé)
+    cap = open_capture()
     
     if not cap.isOpened():
         print("✗ Impossible d'ouvrir la webcam")
         arduino.close()
+        if recorder is not None:
+            recorder.close()
         return
     
     print("✓ Webcam ouverte")
     print(f"✓ Résolution: {CONFIG['video_width']}x{CONFIG['video_height']}")
     print(f"✓ Seuil EAR (yeux fermes): {CONFIG['eye_closed_threshold']}")
     print(f"✓ Frames consécutives requises: {CONFIG['eyes_closed_frames_threshold']}")
-    print("\nAppuyez sur 'q' pour quitter\n")
     
-    alarm_active = False
+    # Affichage: aucun dessin ni fenêtre en mode sans affichage
+    display = None
+    if config_advanced.HEADLESS:
+        print("✓ Mode sans affichage")
+    elif not display_available():
+        print("⚠️  Aucun écran détecté - mode sans affichage")
+    else:
+        display = OverlayDisplay("Detection Yeux Fermes + Arduino (Appuyez sur 'q' pour quitter)")
+        print(f"✓ Overlay: {config_advanced.OVERLAY_FPS} images/s max")
+    
+    # Aperçu MJPEG à distance (aucun coût tant que personne ne regarde)
+    preview = None
+    if config_advanced.PREVIEW_SERVER:
+        try:
+            preview = PreviewServer()
+            print(f"✓ Aperçu MJPEG: {preview.url}")
+        except OSError as e:
+            print(f"✗ Erreur serveur d'aperçu: {e}")
+    
+    # Clips autour des alarmes (les dernières secondes restent en mémoire)
+    clip_recorder = None
+    if config_advanced.EVENT_CLIPS:
+        clip_recorder = EventClipRecorder(fps=CONFIG['video_fps'])
+        print(f"✓ Clips des alarmes: {clip_recorder.output_dir} "
+              f"({config_advanced.CLIP_PRE_SECONDS}s avant, {config_advanced.CLIP_POST_SECONDS}s après)")
+    
+    # Export de frames pour l'entraînement (jamais bloquant)
+    exporter = None
+    if config_advanced.EXPORT_FRAMES:
+        exporter = FrameExporter()
+        print(f"✓ Export des frames ({exporter.mode}): {exporter.session_dir}")
+    
+    # Base d'événements (écriture en arrière-plan, par lots)
+    store = None
+    if config_advanced.USE_DATABASE:
+        if config_advanced.DATABASE_TYPE != "sqlite":
+            print(f"⚠️  Base '{config_advanced.DATABASE_TYPE}' non prise en charge (sqlite uniquement)")
+        else:
+            try:
+                store = EventStore()
+                print(f"✓ Base d'événements: {store.path}")
+            except Exception as e:
+                print(f"✗ Erreur base de données: {e}")
+    
+    # Bus d'événements: chaque abonné traite les transitions dans son thread
+    bus = EventBus()
+    
+    def on_serial(event):
+        # Fin de défaut: l'Arduino reprend l'état courant de l'alarme
+        if event.type == FAULT:
+            arduino.send_command('FAULT')
+        elif event.type == ALARM_ON or (event.type == FAULT_CLEARED and events.alarm):
+            arduino.activate_alarm()
+        else:
+            arduino.deactivate_alarm()
+    
+    bus.subscribe("serial", on_serial, types=(ALARM_ON, ALARM_OFF, FAULT, FAULT_CLEARED),
+                  queue_size=4, overflow="drop_old")
+    bus.subscribe("journal", log_event)
+    if clip_recorder is not None:
+        bus.subscribe("clips", lambda event: clip_recorder.trigger(), types=(ALARM_ON,))
+    notifier = None
+    if config_advanced.DESKTOP_NOTIFICATIONS:
+        if command_available():
+            notifier = DesktopNotifier()
+            bus.subscribe("notifications", notifier, types=DesktopNotifier.TYPES)
+            print(f"✓ Notifications: {config_advanced.NOTIFICATION_CMD}")
+        else:
+            print(f"⚠️  Notifications désactivées: '{config_advanced.NOTIFICATION_CMD}' introuvable")
+    audio = None
+    if config_advanced.LOCAL_SOUND:
+        if not audio_available():
+            print("⚠️  Son local désactivé: sounddevice/PortAudio non disponible")
+        else:
+            try:
+                audio = AudioAlert()
+                bus.subscribe("audio", audio, types=(ALARM_ON, ALARM_OFF), queue_size=4)
+                print(f"✓ Son d'alerte: {audio.path}")
+            except Exception as e:
+                print(f"✗ Erreur son d'alerte: {e}")
+    counters = EventCounters()
+    bus.subscribe("metrics", counters)
+    events = DetectionEvents(bus)
+    
+    # Chien de garde: un blocage de la boucle devient un défaut signalé
+    watchdog = None
+    if config_advanced.WATCHDOG:
+        watchdog = PipelineWatchdog(bus)
+        if config_advanced.MULTIPROCESS_CAPTURE:
+            watchdog.on_stall("capture", lambda: cap.interrupt())
+        deadlines = ", ".join(f"{stage} {limit}s" for stage, limit in watchdog.deadlines.items())
+        print(f"✓ Chien de garde: {deadlines}")
+    
+    # Threads d'entrées/sorties (déjà démarrés) et capture sur IO_CPUS
+    if config_advanced.IO_CPUS:
+        pids = [cap.process.pid] if config_advanced.MULTIPROCESS_CAPTURE else []
+        pinned = pin_threads(pids=pids)
+        print(f"✓ {pinned} thread(s)/processus d'entrées/sorties épinglé(s) sur {config_advanced.IO_CPUS}")
+    print_thread_report()
+    print("\nAppuyez sur 'q' pour quitter\n" if display else "\nCtrl+C pour quitter\n")
+    
     frame_count = 0
     prev_time = 0
     
     try:
         while True:
+            if watchdog is not None:
+                watchdog.enter("capture")
             ret, frame = cap.read()
+            while not ret and watchdog is not None:
+                # Source en panne: réouverture, le chien de garde signale le défaut
+                log.error("✗ Erreur lecture webcam: réouverture de la source", extra={'rate_limit': True})
+                cap.release()
+                time.sleep(1.0)
+                cap = open_capture()
+                ret, frame = cap.read() if cap.isOpened() else (False, None)
             if not ret:
-                print("✗ Erreur lecture webcam")
+                log.error("✗ Erreur lecture webcam")
                 break
             
             frame_count += 1
             
-            # Traite la frame
-            result = detector.process_frame(frame)
-            
-            # Variables
-            eyes_closed_count = result['eyes_closed_frames']
-            left_ear = result['left_ear']
-            right_ear = result['right_ear']
-            ear_avg = result['ear_avg']
-            ear_smooth = result['ear_smooth']
-            face_detected = result['face_detected']
-            
-            # Vérifie si les yeux sont fermés depuis assez longtemps
-            should_alarm = eyes_closed_count >= CONFIG['eyes_closed_frames_threshold']
-            
-            # Change l'état de l'alarme
-            if should_alarm and not alarm_active:
-                print(f"🔴 ALARME: Yeux fermes detectes ({eyes_closed_count} frames)!")
-                arduino.activate_alarm()
-                alarm_active = True
-            
-            elif not should_alarm and alarm_active:
-                print(f"🟢 Yeux ouverts: Alarme désactivee")
-                arduino.deactivate_alarm()
-                alarm_active = False
-            
-            # Affichage sur la frame
-            h, w = frame.shape[:2]
-            
-            # Infos EAR (haut à gauche)
-            if face_detected and ear_avg is not None:
-                info_text = f"EAR L:{left_ear:.2f} R:{right_ear:.2f} Moy:{ear_smooth:.2f}"
-                cv2.putText(frame, info_text, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            # Traite la frame (RGB déjà converti par le processus de capture);
+            # l'overlay est dessiné par l'affichage, à sa propre cadence
+            rgb = cap.rgb if config_advanced.MULTIPROCESS_CAPTURE else None
+            if watchdog is not None:
+                watchdog.enter("inference")
+            if multi_face:
+                # Alarme si un visage suivi est en alarme; le plus somnolent représente la frame
+                result = detector.summarize_multi(detector.process_frame_multi(frame, rgb=rgb, draw=False))
             else:
-                cv2.putText(frame, "Aucun visage détecte", (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                result = detector.process_frame(frame, rgb=rgb, draw=False)
             
-            # Statut alarme (haut à droite)
-            status_color = (0, 0, 255) if alarm_active else (0, 255, 0)
-            status_text = "ALARME ACTIVE!" if alarm_active else "NORMAL"
-            cv2.putText(frame, status_text, (w - 300, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, status_color, 3)
+            if watchdog is not None:
+                watchdog.enter("output")
+                # Reprise après un blocage: étape reconstruite entre deux frames
+                stage = watchdog.take_recovery()
+                if stage == "inference":
+                    log.warning("⚠️  Reconstruction du détecteur")
+                    detector.rebuild()
+                elif stage == "capture":
+                    log.warning("⚠️  Réouverture de la source")
+                    cap.release()
+                    cap = open_capture()
             
-            # Frames fermées (milieu à gauche)
-            frame_text = f"Frames fermees: {eyes_closed_count}/{CONFIG['eyes_closed_frames_threshold']}"
-            bar_color = (0, 0, 255) if should_alarm else (0, 255, 0)
-            cv2.putText(frame, frame_text, (10, 70),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, bar_color, 2)
+            if watcher is not None and watcher.pending is not None:
+                watcher.apply(detector.engine)
+                if calibration is not None and calibration.calibrated:
+                    detector.engine.eye_closed_threshold = calibration.threshold
+            # Calibration personnelle: un seul conducteur (pas en multi-visages)
+            if calibration is not None and not multi_face and calibration.update(result.ear_avg, result.alarm):
+                detector.engine.eye_closed_threshold = calibration.threshold
+            if clip_recorder is not None:
+                clip_recorder.push(frame)
+            if exporter is not None:
+                exporter.submit(frame, result)
+            if store is not None:
+                store.record_result(result)
             
-            # Barre de progression des frames fermées
-            bar_width = int((eyes_closed_count / max(CONFIG['eyes_closed_frames_threshold'], 1)) * 200)
-            cv2.rectangle(frame, (10, 90), (210, 110), (200, 200, 200), 2)
-            cv2.rectangle(frame, (10, 90), (10 + bar_width, 110), bar_color, -1)
+            # Transitions (alarme décidée par le moteur, visage) publiées sur le bus
+            events.update(result)
             
-            # FPS
+            # FPS de la détection
             curr_time = time.time()
             fps = 1 / (curr_time - prev_time) if prev_time != 0 else 0
             prev_time = curr_time
-            cv2.putText(frame, f"FPS: {int(fps)}", (10, h - 20),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
             
-            # Affiche la frame
-            cv2.imshow("Detection Yeux Fermes + Arduino (Appuyez sur 'q' pour quitter)", frame)
+            if preview is not None:
+                preview.submit(frame, result, fps)
             
-            # Quitter avec 'q'
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            # Affichage (rien en mode sans affichage); 'q' pour quitter
+            if display is not None and not display.submit(frame, result, fps):
                 break
     
     except KeyboardInterrupt:
@@ -386,10 +1077,64 @@ def main():
         # Nettoyage
         print("\n" + "=" * 70)
         print("Fermeture du programme...")
+        if watchdog is not None:
+            watchdog.pause()
+            watchdog.close()
+        events.close()
+        bus.close()
         arduino.deactivate_alarm()
         arduino.close()
+        if audio is not None:
+            audio.close()
+        if notifier is not None:
+            notifier.close()
+            stats = notifier.stats()
+            print(f"✓ {stats['sent']} notification(s), {stats['coalesced']} regroupée(s), "
+                  f"{stats['dropped']} écartée(s)")
+        if watcher is not None:
+            watcher.close()
+        if calibration is not None and calibration.calibrated:
+            calibration.save()
+            print(f"✓ Profil '{calibration.driver}' enregistré: seuil EAR {calibration.threshold:.3f}")
+        if recorder is not None:
+            recorder.close()
+            print(f"✓ {recorder.frames_written} frames de landmarks enregistrées")
         cap.release()
-        cv2.destroyAllWindows()
+        if display is not None:
+            display.close()
+        if preview is not None:
+            preview.close()
+        if clip_recorder is not None:
+            clip_recorder.close()
+            stats = clip_recorder.stats()
+            print(f"✓ {stats['clips']} clip(s) d'alarme, tampon {stats['peak_memory_mb']:.1f} Mo max")
+        if exporter is not None:
+            exporter.close()
+            stats = exporter.stats()
+            print(f"✓ {stats['exported']} frame(s) exportée(s), {stats['dropped']} écartée(s) (file pleine)")
+        if store is not None:
+            store.close()
+            stats = store.stats()
+            print(f"✓ Base: {stats['frames_written']} ligne(s), {stats['episodes_written']} épisode(s), "
+                  f"{stats['dropped']} écartée(s)")
+        analytics = detector.analytics.snapshot()
+        print(f"✓ PERCLOS {100 * analytics['perclos']:.1f}%, {analytics['blinks']} clignement(s) "
+              f"({analytics['blink_rate']:.1f}/min), plus longue fermeture {analytics['longest_closure_s']:.1f}s")
+        if detector.cues is not None:
+            print(f"✓ {detector.cues.yawns} bâillement(s)")
+        snapshot = counters.snapshot()
+        print(f"✓ {snapshot['alarm_on']} alarme(s), {snapshot['alarm_seconds']:.1f}s en alarme, "
+              f"{snapshot['face_lost']} perte(s) du visage")
+        if selector is not None:
+            stats = selector.stats()
+            print(f"✓ Moteurs: {stats['frames']['mediapipe']} frame(s) MediaPipe, "
+                  f"{stats['frames']['opencv']} frame(s) OpenCV, {stats['switches']} bascule(s)")
+        if watchdog is not None:
+            stats = watchdog.stats()
+            print(f"✓ Chien de garde: {stats['faults']} défaut(s), {stats['total_stall_s']:.1f}s bloqué, "
+                  f"plus long blocage {stats['longest_stall_s']:.1f}s")
+        bus.print_stats()
+        log_listener.stop()
         print("✓ Programme terminé")
         print("=" * 70 + "\n")
 
@@ -0,0 +1,405 @@
+"""
+ENREGISTREMENT ET REJEU DES LANDMARKS
+=====================================
+
+Enregistre, pour chaque frame, l'horodatage, la présence d'un visage et les
+points des yeux dans un fichier binaire compact, puis rejoue ces points dans
+la logique EAR/décision de EyeClosureDetector sans relancer MediaPipe.
+
+Retoucher EYE_CLOSED_THRESHOLD ou SMOOTHING_WINDOW ne nécessite alors plus
+de retraiter la vidéo: le rejeu d'une session complète prend quelques
+secondes.
+
+Format du fichier (little-endian):
+
+    En-tête:  b"SDLM" | version u16 | n_points u16 | indices u16[n_points]
+              (complété par des zéros jusqu'à un multiple de 8 octets)
+    Blocs:    b"CHNK" | n_frames u32
+              timestamps float64[n_frames]
+              face_detected uint8[n_frames]  (complété à un multiple de 8)
+              points float32[n_frames, n_points, 2]
+
+Chaque tableau est aligné sur 8 octets, ce qui permet de les ouvrir
+directement avec np.memmap. Un bloc tronqué (arrêt brutal) est ignoré à la
+lecture: seuls les blocs complets sont rejoués.
+
+Utilisation:
+    python enregistrement_landmarks.py record video.mp4 session.sdlm
+    python enregistrement_landmarks.py record 0 session.sdlm
+    python enregistrement_landmarks.py replay session.sdlm --threshold 0.22
+"""
+
+import argparse
+import struct
+import time
+
+import numpy as np
+
+from config import CONFIG
+
+
+MAGIC = b"SDLM"
+CHUNK_MAGIC = b"CHNK"
+FORMAT_VERSION = 1
+
+_CHUNK_HEADER = struct.Struct("<4sI")
+
+
+def _pad8(n: int) -> int:
+    """Arrondit n au multiple de 8 supérieur"""
+    return (n + 7) & ~7
+
+
+class LandmarkRecorder:
+    """Écrit les landmarks des yeux par blocs dans un fichier binaire"""
+
+    def __init__(self, path, indices, chunk_frames=1024):
+        """
+        Ouvre le fichier d'enregistrement
+
+        Args:
+            path: Fichier de sortie
+            indices: Indices MediaPipe des points enregistrés (ex: EYE_IDX)
+            chunk_frames: Nombre de frames par bloc
+        """
+        self.path = path
+        self.indices = list(indices)
+        self.n_points = len(self.indices)
+        self.chunk_frames = chunk_frames
+        self.frames_written = 0
+
+        # Buffers préalloués du bloc en cours
+        self._timestamps = np.zeros(chunk_frames, dtype=np.float64)
+        self._face = np.zeros(chunk_frames, dtype=np.uint8)
+        self._points = np.zeros((chunk_frames, self.n_points, 2), dtype=np.float32)
+        self._count = 0
+
+        self._file = open(path, "wb")
+        header = MAGIC + struct.pack("<HH", FORMAT_VERSION, self.n_points)
+        header += np.asarray(self.indices, dtype="<u2").tobytes()
+        self._file.write(header + b"\0" * (_pad8(len(header)) - len(header)))
+
+    def append(self, timestamp, points):
+        """
+        Ajoute une frame
+
+        Args:
+            timestamp: Horodatage (secondes)
+            points: Tableau reshapable en (n_points, 2), ou None si aucun visage
+        """
+        i = self._count
+        self._timestamps[i] = timestamp
+        if points is None:
+            self._face[i] = 0
+            self._points[i] = 0.0
+        else:
+            self._face[i] = 1
+            self._points[i] = np.reshape(points, (self.n_points, 2))
+
+        self._count += 1
+        if self._count == self.chunk_frames:
+            self.flush()
+
+    def __len__(self):
+        return self.frames_written + self._count
+
+    def flush(self):
+        """Écrit le bloc en cours sur le disque"""
+        n = self._count
+        if n == 0:
+            return
+
+        face = self._face[:n].tobytes()
+        self._file.write(_CHUNK_HEADER.pack(CHUNK_MAGIC, n))
+        self._file.write(self._timestamps[:n].tobytes())
+        self._file.write(face + b"\0" * (_pad8(n) - n))
+        self._file.write(self._points[:n].tobytes())
+        self._file.flush()
+
+        self.frames_written += n
+        self._count = 0
+
+    def close(self):
+        """Écrit le dernier bloc et ferme le fichier"""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LandmarkRecording:
+    """Lecture d'un enregistrement de landmarks via np.memmap"""
+
+    def __init__(self, path):
+        """
+        Ouvre un enregistrement et indexe ses blocs
+
+        Args:
+            path: Fichier .sdlm
+        """
+        self.path = path
+        self.chunks = []  # [(timestamps, face_detected, points), ...] vues memmap
+
+        with open(path, "rb") as f:
+            magic = f.read(4)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: fichier de landmarks invalide")
+            version, n_points = struct.unpack("<HH", f.read(4))
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path}: version de format non supportée ({version})")
+            self.indices = np.frombuffer(f.read(2 * n_points), dtype="<u2").tolist()
+            self.n_points = n_points
+
+            offset = _pad8(8 + 2 * n_points)
+            f.seek(0, 2)
+            file_size = f.tell()
+
+            # Parcourt les en-têtes de blocs sans lire les données
+            while offset + _CHUNK_HEADER.size <= file_size:
+                f.seek(offset)
+                chunk_magic, n = _CHUNK_HEADER.unpack(f.read(_CHUNK_HEADER.size))
+                if chunk_magic != CHUNK_MAGIC:
+                    break
+
+                ts_off = offset + _CHUNK_HEADER.size
+                face_off = ts_off + 8 * n
+                pts_off = face_off + _pad8(n)
+                end = pts_off + 8 * n_points * n
+                if end > file_size:
+                    break  # bloc tronqué
+
+                self.chunks.append((ts_off, face_off, pts_off, n))
+                offset = end
+
+        # Une seule projection mémoire du fichier, les blocs en sont des vues
+        if self.chunks:
+            data = np.memmap(path, dtype=np.uint8, mode="r", shape=(offset,))
+            self.chunks = [(
+                data[ts_off:face_off].view("<f8"),
+                data[face_off:face_off + n],
+                data[pts_off:pts_off + 8 * n_points * n].view("<f4").reshape(n, n_points, 2),
+            ) for ts_off, face_off, pts_off, n in self.chunks]
+
+    def __len__(self):
+        return sum(len(c[0]) for c in self.chunks)
+
+    def _concat(self, k):
+        if len(self.chunks) == 1:
+            return self.chunks[0][k]
+        if not self.chunks:
+            shape = (0, self.n_points, 2) if k == 2 else (0,)
+            return np.zeros(shape, dtype=(np.float64, np.uint8, np.float32)[k])
+        return np.concatenate([c[k] for c in self.chunks])
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Horodatages de toutes les frames"""
+        return self._concat(0)
+
+    @property
+    def face_detected(self) -> np.ndarray:
+        """Présence d'un visage pour chaque frame (bool)"""
+        return self._concat(1).astype(bool)
+
+    @property
+    def points(self) -> np.ndarray:
+        """Points enregistrés, forme (n_frames, n_points, 2)"""
+        return self._concat(2)
+
+    def eye_points(self, left_idx, right_idx) -> np.ndarray:
+        """
+        Extrait les points des yeux dans l'ordre attendu par eye_aspect_ratios
+
+        Args:
+            left_idx: Indices MediaPipe de l'œil gauche
+            right_idx: Indices MediaPipe de l'œil droit
+
+        Returns:
+            np.ndarray: Forme (n_frames, 2, 6, 2)
+        """
+        try:
+            cols = [self.indices.index(i) for i in list(left_idx) + list(right_idx)]
+        except ValueError:
+            raise ValueError("L'enregistrement ne contient pas tous les points des yeux")
+        return self.points[:, cols].reshape(-1, 2, 6, 2)
+
+    def ears(self, left_idx, right_idx) -> np.ndarray:
+        """
+        Calcule en une passe l'EAR de chaque œil pour toutes les frames
+
+        Returns:
+            np.ndarray: Forme (n_frames, 2) [gauche, droit], NaN sans visage
+        """
+        from detection_yeux_fermes_arduino import eye_aspect_ratios
+
+        ears = eye_aspect_ratios(self.eye_points(left_idx, right_idx))
+        ears[~self.face_detected] = np.nan
+        return ears
+
+
+def replay(recording, detector=None):
+    """
+    Rejoue un enregistrement dans la logique de décision du détecteur
+
+    Les EAR sont calculés en une passe vectorisée, puis chaque frame passe
+    par EyeClosureDetector.update(), exactement comme en direct.
+
+    Args:
+        recording: LandmarkRecording ou chemin de fichier
+        detector: EyeClosureDetector (défaut: nouveau détecteur sans MediaPipe)
+
+    Yields:
+        tuple: (timestamp, result) pour chaque frame
+    """
+    from detection_yeux_fermes_arduino import EyeClosureDetector
+
+    if not isinstance(recording, LandmarkRecording):
+        recording = LandmarkRecording(recording)
+    if detector is None:
+        detector = EyeClosureDetector(use_mediapipe=False)
+
+    ears = recording.ears(detector.LEFT_EYE_IDX, detector.RIGHT_EYE_IDX).tolist()
+    timestamps = recording.timestamps.tolist()
+
+    for timestamp, (left_ear, right_ear) in zip(timestamps, ears):
+        if left_ear != left_ear:  # NaN: aucun visage
+            yield timestamp, detector.update(None, None, timestamp)
+        else:
+            yield timestamp, detector.update(left_ear, right_ear, timestamp)
+
+
+def record_video(source, path, chunk_frames=1024, max_frames=None):
+    """
+    Enregistre les landmarks d'une vidéo ou d'une webcam, sans affichage
+
+    Args:
+        source: Fichier vidéo ou index de caméra
+        path: Fichier de sortie
+        chunk_frames: Nombre de frames par bloc
+        max_frames: Arrêt après N frames (None = jusqu'à la fin)
+
+    Returns:
+        int: Nombre de frames enregistrées
+    """
+    import cv2
+    from detection_yeux_fermes_arduino import EyeClosureDetector
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Impossible d'ouvrir la source vidéo: {source}")
+
+    is_file = not isinstance(source, int)
+    recorder = LandmarkRecorder(path, EyeClosureDetector.LEFT_EYE_IDX + EyeClosureDetector.RIGHT_EYE_IDX,
+                                chunk_frames=chunk_frames)
+    detector = EyeClosureDetector(recorder=recorder)
+
+    try:
+        while max_frames is None or len(recorder) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            # Pour un fichier, l'horodatage est la position dans la vidéo
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 if is_file else time.time()
+            detector.process_frame(frame, timestamp)
+    finally:
+        recorder.close()
+        cap.release()
+
+    return recorder.frames_written
+
+
+def replay_batch(recording, **params):
+    """
+    Rejoue un enregistrement en une passe vectorisée (moteur_decision)
+
+    Produit la même chronologie que replay(), sans boucle Python par frame.
+
+    Args:
+        recording: LandmarkRecording ou chemin de fichier
+        **params: Paramètres de decide_batch (défaut: config.py)
+
+    Returns:
+        dict: timestamps, ear et tableaux de decide_batch
+    """
+    from detection_yeux_fermes_arduino import EyeClosureDetector
+    from moteur_decision import decide_batch
+
+    if not isinstance(recording, LandmarkRecording):
+        recording = LandmarkRecording(recording)
+
+    ears = recording.ears(EyeClosureDetector.LEFT_EYE_IDX, EyeClosureDetector.RIGHT_EYE_IDX)
+    ear = (ears[:, 0] + ears[:, 1]) / 2.0
+    result = decide_batch(ear, **params)
+    result['timestamps'] = np.array(recording.timestamps)
+    result['ear'] = ear
+    return result
+
+
+def _summary(recording):
+    """Rejoue un enregistrement et affiche les épisodes d'alarme"""
+    from moteur_decision import alarm_episodes
+
+    start = time.perf_counter()
+    result = replay_batch(recording)
+    elapsed = time.perf_counter() - start
+
+    timestamps = result['timestamps']
+    n_frames = len(timestamps)
+    n_faces = int(np.count_nonzero(~np.isnan(result['ear'])))
+    episodes = alarm_episodes(result['alarm'])
+
+    print(f"✓ {n_frames} frames rejouées en {elapsed:.2f}s "
+          f"({n_frames / max(elapsed, 1e-9):.0f} frames/s)")
+    print(f"  Visage détecté: {n_faces}/{n_frames} frames")
+    print(f"  Seuil EAR: {CONFIG['eye_closed_threshold']}, "
+          f"lissage: {CONFIG['smoothing_window']}, "
+          f"frames: {CONFIG['eyes_closed_frames_threshold']}")
+    print(f"  Épisodes d'alarme: {len(episodes)}")
+    for first, end in episodes:
+        begin = timestamps[first]
+        finish = timestamps[min(end, n_frames - 1)]
+        print(f"    - {begin:.2f}s → {finish:.2f}s ({finish - begin:.2f}s)")
+
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Enregistrement et rejeu des landmarks des yeux")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Enregistre les landmarks d'une vidéo (ou d'une caméra)")
+    rec.add_argument("source", help="Fichier vidéo ou index de caméra (ex: 0)")
+    rec.add_argument("output", help="Fichier de sortie (.sdlm)")
+    rec.add_argument("--chunk-frames", type=int, default=1024)
+    rec.add_argument("--max-frames", type=int, default=None)
+
+    rep = sub.add_parser("replay", help="Rejoue un enregistrement avec d'autres paramètres")
+    rep.add_argument("input", help="Fichier d'enregistrement (.sdlm)")
+    rep.add_argument("--threshold", type=float, help="Seuil EAR (eye_closed_threshold)")
+    rep.add_argument("--smoothing", type=int, help="Fenêtre de lissage (smoothing_window)")
+    rep.add_argument("--frames", type=int, help="Frames consécutives (eyes_closed_frames_threshold)")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        source = int(args.source) if args.source.isdigit() else args.source
+        n = record_video(source, args.output, args.chunk_frames, args.max_frames)
+        print(f"✓ {n} frames enregistrées dans {args.output}")
+    else:
+        if args.threshold is not None:
+            CONFIG['eye_closed_threshold'] = args.threshold
+        if args.smoothing is not None:
+            CONFIG['smoothing_window'] = args.smoothing
+        if args.frames is not None:
+            CONFIG['eyes_closed_frames_threshold'] = args.frames
+        _summary(LandmarkRecording(args.input))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+ENREGISTREMENT DE CLIPS AUTOUR DES ALARMES
+==========================================
+
+Plutôt que d'écrire toute la session sur le disque, l'enregistreur garde
+les N dernières secondes en mémoire et n'écrit qu'un court clip autour de
+chaque alarme:
+
+    [ N s avant l'alarme | alarme | M s après ] -> clip_<date>_<label>.<ext>
+
+    - les frames vivent dans un nombre fixe de slots (mémoire bornée),
+      préalloués en brut ou compressés en JPEG (CLIP_JPEG_QUALITY) pour
+      tenir plus de secondes dans moins de mémoire (en brut, 5 s avant +
+      5 s après à 30 FPS en 640x480 réservent ~700 Mo: réduire les durées)
+    - en JPEG, la boucle de détection ne fait qu'une copie dans un petit
+      anneau de frames brutes préallouées; la compression se fait dans le
+      thread d'écriture
+    - une alarme pendant la fenêtre "après" prolonge le clip en cours
+    - l'écriture (VideoWriter, codec VIDEO_FORMAT, extension assortie) se
+      fait dans le même thread; les slots d'un clip sont rendus une fois
+      écrits
+    - si tous les slots sont pris (encodeur en retard), la frame n'est pas
+      gardée: push() ne bloque jamais (sauf au changement de taille des
+      frames: les écritures en cours sont terminées avant de réallouer)
+
+Utilisation:
+    recorder = EventClipRecorder(fps=30)
+    recorder.push(frame)              # à chaque frame
+    if result.alarm_changed and result.alarm:
+        recorder.trigger()            # ou depuis un autre thread (bus)
+    recorder.close()
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+import config_advanced
+from journalisation import get_logger
+
+
+log = get_logger("clips")
+
+
+# Extension des fichiers selon le codec (VIDEO_FORMAT)
+VIDEO_EXTENSIONS = {'mp4v': ".mp4", 'avc1': ".mp4", 'H264': ".mp4", 'X264': ".mkv",
+                    'MJPG': ".avi", 'XVID': ".avi", 'DIVX': ".avi"}
+
+
+def video_extension(fourcc=None):
+    """Extension de fichier du codec (défaut: VIDEO_FORMAT; inconnu: .avi)"""
+    return VIDEO_EXTENSIONS.get(fourcc or config_advanced.VIDEO_FORMAT, ".avi")
+
+
+class EventClipRecorder:
+    """Tampon circulaire de frames et écriture des clips en arrière-plan"""
+
+    def __init__(self, fps=30.0, pre_seconds=None, post_seconds=None, output_dir=None,
+                 jpeg_quality=None, max_clip_seconds=None, staging_frames=8):
+        """
+        Args:
+            fps: Cadence nominale des frames poussées
+            pre_seconds: Secondes gardées avant l'alarme (défaut: CLIP_PRE_SECONDS)
+            post_seconds: Secondes écrites après l'alarme (défaut: CLIP_POST_SECONDS)
+            output_dir: Dossier des clips (défaut: CLIPS_DIR)
+            jpeg_quality: Qualité JPEG du tampon, 0 = frames brutes
+                          (défaut: CLIP_JPEG_QUALITY)
+            max_clip_seconds: Durée max d'un clip si les alarmes s'enchaînent
+                              (défaut: avant + 2 x après)
+            staging_frames: Frames brutes en attente de compression (JPEG)
+        """
+        pre_seconds = config_advanced.CLIP_PRE_SECONDS if pre_seconds is None else pre_seconds
+        post_seconds = config_advanced.CLIP_POST_SECONDS if post_seconds is None else post_seconds
+        self.fps = fps
+        self.pre_frames = max(1, int(round(pre_seconds * fps)))
+        self.post_frames = max(1, int(round(post_seconds * fps)))
+        if max_clip_seconds is None:
+            max_clip_seconds = pre_seconds + 2 * post_seconds
+        self.max_clip_frames = max(self.pre_frames + self.post_frames, int(max_clip_seconds * fps))
+        self.output_dir = output_dir or config_advanced.CLIPS_DIR
+        quality = config_advanced.CLIP_JPEG_QUALITY if jpeg_quality is None else jpeg_quality
+        self.jpeg_params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if quality else None
+
+        # Slots: tampon "avant" + un clip complet + marge pour l'encodeur
+        self.capacity = self.pre_frames + self.max_clip_frames + self.pre_frames
+        self._raw = None
+        self._jpeg = [None] * self.capacity
+        self.staging_frames = staging_frames
+        self._staging = None
+        self._staging_free = deque(range(staging_frames))
+        self._jpeg_bytes = 0
+        self._refs = np.zeros(self.capacity, dtype=np.int32)
+        self._free = deque(range(self.capacity))
+        self._lock = threading.Lock()
+
+        # Tampon "avant": (slot, timestamp) des dernières frames
+        self._ring = deque()
+
+        # Demandes de clip (deque: trigger() peut venir d'un autre thread)
+        self._triggers = deque()
+
+        # Clip en cours de constitution
+        self._clip = None
+        self._post_left = 0
+
+        self.clips = []
+        self.dropped = 0
+        self.peak_memory = 0
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+
+    @property
+    def memory_bytes(self):
+        """Mémoire occupée par les frames en mémoire (octets)"""
+        if self.jpeg_params is None:
+            return 0 if self._raw is None else self._raw.nbytes
+        return self._jpeg_bytes + (0 if self._staging is None else self._staging.nbytes)
+
+    def _acquire(self):
+        """Slot libre (référencé une fois), ou None si tous sont pris"""
+        with self._lock:
+            if not self._free:
+                return None
+            slot = self._free.popleft()
+            self._refs[slot] = 1
+            return slot
+
+    def _release(self, slots):
+        with self._lock:
+            for slot in slots:
+                self._refs[slot] -= 1
+                if self._refs[slot] == 0:
+                    if self._jpeg[slot] is not None:
+                        self._jpeg_bytes -= len(self._jpeg[slot])
+                        self._jpeg[slot] = None
+                    self._free.append(slot)
+
+    def push(self, frame, timestamp=None):
+        """
+        Ajoute une frame au tampon (copie ou JPEG, jamais bloquant)
+
+        Args:
+            frame: Image BGR
+            timestamp: Horodatage (défaut: time.time())
+
+        Returns:
+            bool: False si la frame n'a pas pu être gardée (slots pleins)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        while self._triggers:
+            self._start_clip(self._triggers.popleft())
+        self._ensure_buffers(frame)
+
+        # Le tampon "avant" ne garde que pre_frames frames
+        if len(self._ring) >= self.pre_frames:
+            old, _ = self._ring.popleft()
+            self._release([old])
+
+        slot = self._acquire()
+        if slot is None:
+            self.dropped += 1
+            return False
+
+        if self.jpeg_params is None:
+            np.copyto(self._raw[slot], frame)
+        else:
+            # Copie brute seulement; le slot reste référencé jusqu'à sa compression
+            staging = self._staging_free.popleft() if self._staging_free else None
+            if staging is None:
+                self._release([slot])
+                self.dropped += 1
+                return False
+            np.copyto(self._staging[staging], frame)
+            with self._lock:
+                self._refs[slot] += 1
+            self._jobs.put(('jpeg', slot, staging))
+
+        self._ring.append((slot, timestamp))
+
+        if self._clip is not None:
+            with self._lock:
+                self._refs[slot] += 1
+            self._clip['frames'].append((slot, timestamp))
+            self._post_left -= 1
+            if self._post_left <= 0 or len(self._clip['frames']) >= self.max_clip_frames:
+                self._finish_clip()
+        return True
+
+    def _ensure_buffers(self, frame):
+        """Alloue les frames brutes à la taille de la frame (après vidage si elle change)"""
+        buffer = self._raw if self.jpeg_params is None else self._staging
+        if buffer is not None and buffer.shape[1:] == frame.shape and buffer.dtype == frame.dtype:
+            return
+        if buffer is not None:
+            self._drain()
+        n = self.capacity if self.jpeg_params is None else self.staging_frames
+        buffer = np.empty((n,) + frame.shape, dtype=frame.dtype)
+        if self.jpeg_params is None:
+            self._raw = buffer
+        else:
+            self._staging = buffer
+
+    def _drain(self):
+        """Termine le clip en cours et attend le thread d'écriture (plus aucun slot lu)"""
+        if self._clip is not None:
+            self._finish_clip()
+        self._jobs.join()
+        self._release([slot for slot, _ in self._ring])
+        self._ring.clear()
+
+    def trigger(self, label="alarme"):
+        """
+        Démarre un clip (ou prolonge le clip en cours) à la prochaine frame
+
+        Peut être appelé depuis n'importe quel thread (abonné du bus).
+
+        Args:
+            label: Étiquette ajoutée au nom du fichier
+        """
+        self._triggers.append(label)
+
+    def _start_clip(self, label):
+        if self._clip is not None:
+            self._post_left = self.post_frames
+            return
+
+        frames = list(self._ring)
+        with self._lock:
+            for slot, _ in frames:
+                self._refs[slot] += 1
+        self._clip = {'label': label, 'start': time.time(), 'frames': frames}
+        self._post_left = self.post_frames
+
+    def _finish_clip(self):
+        clip, self._clip = self._clip, None
+        if clip['frames']:
+            self._jobs.put(('clip', clip))
+
+    def _frame(self, slot):
+        if self.jpeg_params is None:
+            return self._raw[slot]
+        data = self._jpeg[slot]
+        return None if data is None else cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    def _encode_loop(self):
+        # Une seule file, dans l'ordre: les frames d'un clip sont compressées
+        # avant que le clip soit écrit
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    break
+                if job[0] == 'jpeg':
+                    self._compress(job[1], job[2])
+                else:
+                    self._write_job(job[1])
+            finally:
+                self._jobs.task_done()
+
+    def _compress(self, slot, staging):
+        try:
+            ok, buf = cv2.imencode(".jpg", self._staging[staging], self.jpeg_params)
+        except cv2.error as e:
+            ok = False
+            log.error("✗ Erreur de compression: %s", e, extra={'rate_limit': True})
+        self._staging_free.append(staging)
+        if ok:
+            with self._lock:
+                self._jpeg[slot] = buf.tobytes()
+                self._jpeg_bytes += len(buf)
+                self.peak_memory = max(self.peak_memory, self.memory_bytes)
+        self._release([slot])
+
+    def _write_job(self, clip):
+        slots = [slot for slot, _ in clip['frames']]
+        try:
+            self.clips.append(self._write_clip(clip))
+        except Exception as e:
+            log.error("✗ Erreur d'écriture du clip: %s", e)
+        finally:
+            self._release(slots)
+
+    def _write_clip(self, clip):
+        """Écrit un clip avec le codec VIDEO_FORMAT, à la cadence mesurée"""
+        frames = clip['frames']
+        duration = frames[-1][1] - frames[0][1]
+        fps = (len(frames) - 1) / duration if duration > 0 else self.fps
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(clip['start']))
+        path = os.path.join(self.output_dir, f"clip_{stamp}_{clip['label']}{video_extension()}")
+
+        out = None
+        try:
+            for slot, _ in frames:
+                frame = self._frame(slot)
+                if frame is None:
+                    continue
+                if out is None:
+                    h, w = frame.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*config_advanced.VIDEO_FORMAT)
+                    out = cv2.VideoWriter(path, fourcc, fps, (w, h))
+                out.write(frame)
+        finally:
+            if out is not None:
+                out.release()
+
+        log.info("✓ Clip enregistré: %s (%d frames, %.1fs)", path, len(frames), duration,
+                 extra={'fields': {'event': 'clip', 'path': path, 'frames': len(frames)}})
+        return path
+
+    def stats(self):
+        """
+        Compteurs de l'enregistreur
+
+        Returns:
+            dict: clips, dropped, memory_mb, peak_memory_mb, capacity
+        """
+        memory = self.memory_bytes
+        self.peak_memory = max(self.peak_memory, memory)
+        return {
+            'clips': len(self.clips),
+            'dropped': self.dropped,
+            'memory_mb': memory / 1e6,
+            'peak_memory_mb': self.peak_memory / 1e6,
+            'capacity': self.capacity,
+        }
+
+    def close(self):
+        """Termine le clip en cours et attend la fin des écritures"""
+        while self._triggers:
+            self._start_clip(self._triggers.popleft())
+        if self._clip is not None:
+            self._finish_clip()
+        self._jobs.put(None)
+        self._thread.join()
+        self._release([slot for slot, _ in self._ring])
+        self._ring.clear()
@@ -8,6 +8,7 @@ Montre comment utiliser les classes du projet de manière personnalisée
 import cv2
 import time
 from detection_yeux_fermes_arduino import EyeClosureDetector, ArduinoController
+from enregistreur_evenements import EventClipRecorder
 
 
 # ============= EXEMPLE 1: UTILISATION SIMPLE =============
@@ -27,10 +28,12 @@ def exemple_simple():
         
         result = detector.process_frame(frame)
         
-        if result['eyes_closed_frames'] > 10:
-            arduino.activate_alarm()
-        else:
-            arduino.deactivate_alarm()
+        # N'envoie une commande qu'aux changements d'état de l'alarme
+        if result['alarm_changed']:
+            if result['alarm']:
+                arduino.activate_alarm()
+            else:
+                arduino.deactivate_alarm()
         
         cv2.imshow("Simple", result['frame'])
         if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -55,6 +58,7 @@ def exemple_statistiques():
         'temps_total_fermes': 0,
         'max_consecutif': 0,
     }
+    previous_closed = 0
     
     print("Statistiques - Appuyez sur Q pour quitter et voir résultats")
     
@@ -67,18 +71,23 @@ def exemple_statistiques():
         
         stats['total_frames'] += 1
         
-        if result['eyes_closed_frames'] > 0:
+        closed = result['eyes_closed_frames']
+        if closed > 0:
             stats['eyes_closed_frames'] += 1
             stats['temps_total_fermes'] += 1
-            stats['max_consecutif'] = max(stats['max_consecutif'], result['eyes_closed_frames'])
-        else:
-            if detector.eyes_closed_frames > 10:
-                stats['yeux_fermes_episodes'] += 1
+            stats['max_consecutif'] = max(stats['max_consecutif'], closed)
+        elif previous_closed > 10:
+            # Le compteur vient de retomber à 0: l'épisode se termine
+            stats['yeux_fermes_episodes'] += 1
+        previous_closed = closed
         
         cv2.imshow("Statistiques", result['frame'])
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
     
+    # PERCLOS, clignements et fermetures, tenus à jour par le détecteur
+    analytics = detector.analytics.snapshot()
+    
     # Affiche les résultats
     print("\n" + "=" * 50)
     print("STATISTIQUES DE DÉTECTION")
@@ -88,6 +97,12 @@ def exemple_statistiques():
     print(f"Pourcentage: {stats['eyes_closed_frames']/max(1, stats['total_frames'])*100:.1f}%")
     print(f"Episodes détectés: {stats['yeux_fermes_episodes']}")
     print(f"Max consécutif: {stats['max_consecutif']} frames")
+    print(f"PERCLOS ({detector.analytics.window}s): {analytics['perclos']*100:.1f}%")
+    print(f"Clignements: {analytics['blinks']} ({analytics['blink_rate']:.1f}/min)")
+    print(f"Plus longue fermeture: {analytics['longest_closure_s']:.2f}s")
+    print("Durées des fermetures:")
+    for label, count in analytics['histogram'].items():
+        print(f"  {label:>10}: {count}")
     print("=" * 50)
     
     cap.release()
@@ -141,30 +156,56 @@ def exemple_alarme_progressive():
 
 # ============= EXEMPLE 4: DÉTECTION MULTI-FACES (AVANCÉ) =============
 def exemple_detection_multiple():
-    """Détecte les yeux fermés chez plusieurs personnes (théorique)"""
+    """Détecte les yeux fermés chez plusieurs personnes (bus, habitacle)"""
     
-    import mediapipe as mp
+    from config_advanced import MAX_FACES
     
-    print("Exemple détection multiple")
-    print("Note: Modifiez EyeClosureDetector pour max_num_faces > 1")
-    print("C'est un exemple théorique.")
+    detector = EyeClosureDetector(max_faces=MAX_FACES)
+    arduino = ArduinoController()
+    cap = cv2.VideoCapture(0)
+    
+    print(f"Détection multiple ({MAX_FACES} visages max) - Appuyez sur Q pour quitter")
+    
+    alarm_active = False
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        
+        result = detector.process_frame_multi(frame)
+        
+        # Une seule personne en alarme suffit à déclencher le buzzer
+        if result['any_alarm'] != alarm_active:
+            alarm_active = result['any_alarm']
+            if alarm_active:
+                arduino.activate_alarm()
+            else:
+                arduino.deactivate_alarm()
+        
+        n_closed = int(result['alarm'].sum())
+        cv2.putText(frame, f"Visages: {len(result['slots'])}  En alarme: {n_closed}", (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255) if n_closed else (0, 255, 0), 2)
+        
+        cv2.imshow("Detection multiple", result['frame'])
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+    
+    arduino.close()
+    cap.release()
+    cv2.destroyAllWindows()
 
 
-# ============= EXEMPLE 5: SAUVEGARDE VIDÉO =============
+# ============= EXEMPLE 5: CLIPS VIDÉO DES ALARMES =============
 def exemple_sauvegarde_video():
-    """Enregistre une vidéo avec la détection"""
+    """Enregistre un clip autour de chaque alarme (et non toute la session)"""
     
     detector = EyeClosureDetector()
     cap = cv2.VideoCapture(0)
     
-    # Configuration du codec vidéo
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    fps = 30.0
-    frame_size = (640, 480)
-    
-    out = cv2.VideoWriter('output_detection.mp4', fourcc, fps, frame_size)
+    # Tampon des dernières secondes en mémoire, clips écrits en arrière-plan
+    recorder = EventClipRecorder(fps=30.0)
     
-    print("Enregistrement vidéo - Appuyez sur Q pour arrêter")
+    print(f"Enregistrement des alarmes dans {recorder.output_dir} - Appuyez sur Q pour arrêter")
     
     frame_count = 0
     while True:
@@ -172,9 +213,6 @@ def exemple_sauvegarde_video():
         if not ret:
             break
         
-        # Redimensionne si nécessaire
-        frame = cv2.resize(frame, frame_size)
-        
         result = detector.process_frame(frame)
         frame_count += 1
         
@@ -182,15 +220,19 @@ def exemple_sauvegarde_video():
         cv2.putText(result['frame'], f"Frame: {frame_count}", (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
-        out.write(result['frame'])
+        recorder.push(result['frame'])
+        if result['alarm_changed'] and result['alarm']:
+            recorder.trigger()
         
         cv2.imshow("Enregistrement", result['frame'])
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
     
-    print(f"✓ Vidéo enregistrée: output_detection.mp4 ({frame_count} frames)")
+    recorder.close()
+    stats = recorder.stats()
+    print(f"✓ {stats['clips']} clip(s) enregistré(s) ({frame_count} frames traitées)")
+    print(f"  Mémoire du tampon: {stats['peak_memory_mb']:.1f} Mo max, {stats['dropped']} frame(s) non gardée(s)")
     
-    out.release()
     cap.release()
     cv2.destroyAllWindows()
 
@@ -203,8 +245,8 @@ if __name__ == "__main__":
     print("\n1. Exemple simple")
     print("2. Enregistrement statistiques")
     print("3. Alarme progressive")
-    print("4. Détection multiple (info)")
-    print("5. Sauvegarde vidéo")
+    print("4. Détection multiple")
+    print("5. Clips vidéo des alarmes")
     print("0. Quitter")
     print()
     
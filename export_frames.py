@@ -0,0 +1,240 @@
+"""
+EXPORT ASYNCHRONE DE FRAMES (EXPORT_FRAMES / EXPORT_DIR)
+========================================================
+
+Exporte des frames du terrain (données d'entraînement) sans jamais
+ralentir la détection:
+
+    - sélection dans la boucle (test d'entier): une frame sur N, toutes les
+      frames yeux fermés, ou les frames en alarme (EXPORT_MODE)
+    - la frame sélectionnée est copiée dans un buffer d'un pool fixe; si
+      aucun buffer n'est libre (disque ou encodeurs en retard), elle est
+      écartée et comptée: la file est bornée, submit() ne bloque jamais
+    - si la taille des frames change, un nouveau pool remplace l'ancien;
+      chaque frame en file garde son pool, dont les buffers ne retournent
+      que dans sa propre liste de buffers libres (aucun buffer donné deux
+      fois)
+    - un pool de threads encode (JPEG/PNG, cv2.imencode libère le GIL) et
+      écrit les frames par lots: chaque thread vide la file jusqu'à
+      EXPORT_BATCH images à la fois, les dossiers sont créés une fois par
+      lot de EXPORT_FILES_PER_DIR fichiers, et l'index CSV est complété
+      en une écriture par lot
+
+Arborescence:
+    EXPORT_DIR/<session>/index.csv          fichier, horodatage, EAR, étiquettes
+    EXPORT_DIR/<session>/0000/000000.jpg    ...
+"""
+
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import config_advanced
+from journalisation import get_logger
+
+
+log = get_logger("export")
+
+
+MODES = ("every_n", "closed", "alarm")
+
+
+class FrameExporter:
+    """Sélection des frames et export en arrière-plan"""
+
+    def __init__(self, output_dir=None, mode=None, every_n=None, image_format=None, quality=None,
+                 workers=None, queue_size=None, batch=None, files_per_dir=None):
+        """
+        Args:
+            output_dir: Dossier racine (défaut: EXPORT_DIR)
+            mode: "every_n", "closed" ou "alarm" (défaut: EXPORT_MODE)
+            every_n: Période du mode "every_n" (défaut: EXPORT_EVERY_N)
+            image_format: "jpg" ou "png" (défaut: EXPORT_FORMAT)
+            quality: Qualité JPEG 0-100 (défaut: EXPORT_JPEG_QUALITY)
+            workers: Threads d'encodage (défaut: EXPORT_WORKERS)
+            queue_size: Frames en attente max (défaut: EXPORT_QUEUE_SIZE)
+            batch: Frames traitées par lot par un thread (défaut: EXPORT_BATCH)
+            files_per_dir: Fichiers par sous-dossier (défaut: EXPORT_FILES_PER_DIR)
+        """
+        cfg = config_advanced
+        self.mode = mode or cfg.EXPORT_MODE
+        if self.mode not in MODES:
+            raise ValueError(f"Mode d'export inconnu: {self.mode} (choix: {', '.join(MODES)})")
+        self.every_n = max(1, every_n or cfg.EXPORT_EVERY_N)
+        self.ext = "." + (image_format or cfg.EXPORT_FORMAT).lower().lstrip(".")
+        quality = cfg.EXPORT_JPEG_QUALITY if quality is None else quality
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if self.ext in (".jpg", ".jpeg") else []
+        self.batch = max(1, batch or cfg.EXPORT_BATCH)
+        self.files_per_dir = max(1, files_per_dir or cfg.EXPORT_FILES_PER_DIR)
+        n_workers = workers or cfg.EXPORT_WORKERS
+        queue_size = queue_size or cfg.EXPORT_QUEUE_SIZE
+
+        self.session_dir = os.path.join(output_dir or cfg.EXPORT_DIR, time.strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(self.session_dir, exist_ok=True)
+        self._index = open(os.path.join(self.session_dir, "index.csv"), "w")
+        self._index.write("fichier,timestamp,ear,eyes_closed,alarm\n")
+
+        # Pool de buffers (buffers, buffers libres): borne la mémoire et la
+        # file d'attente; remplacé d'un bloc si la taille des frames change
+        self._pool = None
+        self._pool_size = queue_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dirs = set()
+
+        self.frames_seen = 0
+        self.selected = 0
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+        self._next_number = 0
+
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(n_workers)]
+        for t in self._threads:
+            t.start()
+
+    def _select(self, result):
+        if self.mode == "every_n":
+            return self.frames_seen % self.every_n == 0
+        if self.mode == "closed":
+            return bool(result['eyes_closed'])
+        return bool(result['alarm'])
+
+    def submit(self, frame, result, timestamp=None):
+        """
+        Propose une frame à l'export (appelé à chaque frame, jamais bloquant)
+
+        Args:
+            frame: Image BGR (copiée si sélectionnée)
+            result: Résultat de process_frame
+            timestamp: Horodatage (défaut: time.time())
+
+        Returns:
+            bool: True si la frame a été mise en file d'export
+        """
+        selected = self._select(result)
+        self.frames_seen += 1
+        if not selected:
+            return False
+        self.selected += 1
+
+        pool = self._pool
+        if pool is None or pool[0].shape[1:] != frame.shape or pool[0].dtype != frame.dtype:
+            pool = self._allocate(frame)
+        buffers, free = pool
+        try:
+            slot = free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+
+        np.copyto(buffers[slot], frame)
+        number = self._next_number
+        self._next_number += 1
+        ear = result['ear_avg']
+        self._queue.put((pool, slot, number, time.time() if timestamp is None else timestamp,
+                         ear, bool(result['eyes_closed']), bool(result['alarm'])))
+        return True
+
+    def _allocate(self, frame):
+        """
+        Nouveau pool à la taille des frames (première frame, changement de taille)
+
+        Les frames déjà en file gardent l'ancien pool jusqu'à leur écriture.
+        """
+        buffers = np.empty((self._pool_size,) + frame.shape, dtype=frame.dtype)
+        free = queue.SimpleQueue()
+        for slot in range(self._pool_size):
+            free.put(slot)
+        self._pool = (buffers, free)
+        return self._pool
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            # Vide la file par lots pour grouper les écritures
+            items = [item]
+            stop = False
+            while len(items) < self.batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+
+            self._write_batch(items)
+            if stop:
+                break
+
+    def _write_batch(self, items):
+        lines = []
+        errors = 0
+        for (buffers, free), slot, number, timestamp, ear, closed, alarm in items:
+            # Une erreur d'encodage ne coûte que cette frame: le slot est
+            # toujours rendu et le thread continue avec le reste du lot
+            try:
+                ok, buf = cv2.imencode(self.ext, buffers[slot], self.params)
+            except cv2.error as e:
+                ok = False
+                log.error("✗ Erreur d'encodage: %s", e, extra={'rate_limit': True})
+            finally:
+                free.put(slot)
+            if not ok:
+                errors += 1
+                continue
+
+            subdir = f"{number // self.files_per_dir:04d}"
+            if subdir not in self._dirs:
+                os.makedirs(os.path.join(self.session_dir, subdir), exist_ok=True)
+                self._dirs.add(subdir)
+            name = f"{subdir}/{number:06d}{self.ext}"
+            try:
+                with open(os.path.join(self.session_dir, name), "wb") as f:
+                    f.write(buf)
+            except OSError as e:
+                errors += 1
+                log.error("✗ Erreur d'export: %s", e)
+                continue
+
+            ear_text = "" if ear is None else f"{ear:.4f}"
+            lines.append(f"{name},{timestamp:.3f},{ear_text},{int(closed)},{int(alarm)}\n")
+
+        # Compteurs partagés par les threads d'encodage
+        with self._lock:
+            self.exported += len(lines)
+            self.errors += errors
+            self._index.write("".join(lines))
+            self._index.flush()
+
+    def stats(self):
+        """
+        Compteurs de l'export
+
+        Returns:
+            dict: selected, exported, dropped, errors, pending
+        """
+        return {
+            'selected': self.selected,
+            'exported': self.exported,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': self._queue.qsize(),
+        }
+
+    def close(self):
+        """Termine les exports en attente"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._index.close()
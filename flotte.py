@@ -0,0 +1,418 @@
+"""
+TRAITEMENT DE FLOTTE: PLUSIEURS CAMÉRAS OU FICHIERS DANS UN PROCESSUS
+=====================================================================
+
+Au lieu d'un main() (et donc d'un interpréteur, d'un graphe MediaPipe et
+d'un ArduinoController) par véhicule, un seul processus répartit N sources
+vidéo sur un pool fixe de détecteurs:
+
+    - ordonnancement "round-robin" (chaque flux à tour de rôle) ou
+      "deadline" (le flux le plus en retard sur son horloge vidéo d'abord)
+    - au plus une frame en cours par flux: l'état de chaque flux (moteur de
+      décision) est mis à jour dans l'ordre des frames, sans verrou
+    - chaque source est lue par son propre thread dans une petite file
+      bornée; l'ordonnanceur ne fait que des relevés non bloquants: une
+      caméra lente ou un fichier lu à sa cadence réelle ne retarde pas les
+      autres flux
+    - un récepteur d'alarme par flux (affichage, Arduino, ...)
+    - base d'événements SQLite optionnelle commune à tous les flux
+    - métriques par flux et globales (frames/s, latence, alarmes)
+
+Les détecteurs du pool traitent des frames de flux différents à la suite:
+Face Mesh est donc utilisé en mode image statique (pas de suivi d'une frame
+à l'autre), l'état temporel restant porté par le moteur de chaque flux.
+
+Pour tester en local, des fichiers vidéo remplacent les caméras:
+    python flotte.py bus1.mp4 bus2.mp4 bus3.mp4 --workers 2
+    python flotte.py 0 1 --policy round-robin
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+import cv2
+
+from analyse_clignements import BlinkAnalytics
+from base_evenements import EventStore
+from detection_yeux_fermes_arduino import EyeClosureDetector, eye_aspect_ratios, mp_solutions
+from moteur_decision import DecisionEngine
+
+
+def print_sink(name, alarm, timestamp):
+    """Récepteur d'alarme par défaut: affiche les transitions"""
+    if alarm:
+        print(f"🔴 [{name}] ALARME: Yeux fermes detectes ({timestamp:.1f}s)")
+    else:
+        print(f"🟢 [{name}] Yeux ouverts: Alarme désactivee ({timestamp:.1f}s)")
+
+
+def arduino_sink(controller):
+    """Récepteur d'alarme pilotant un ArduinoController"""
+    def sink(name, alarm, timestamp):
+        if alarm:
+            controller.activate_alarm()
+        else:
+            controller.deactivate_alarm()
+    return sink
+
+
+class FrameSource:
+    """Source vidéo (fichier ou caméra) d'un flux, lue par un thread dédié"""
+
+    def __init__(self, source, realtime=False, buffer_frames=2, on_frame=None):
+        """
+        Args:
+            source: Fichier vidéo ou index de caméra
+            realtime: Fichier lu au rythme de sa cadence (simulation caméra)
+            buffer_frames: Frames lues d'avance (file bornée)
+            on_frame: Appelé (thread de lecture) à chaque frame déposée
+        """
+        self.source = source
+        self.is_camera = isinstance(source, int)
+        self.realtime = realtime
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Impossible d'ouvrir la source vidéo: {source}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self._on_frame = on_frame
+
+        # Caméra: file pleine -> la plus ancienne frame est remplacée (pas de
+        # retard); fichier: la lecture attend (aucune frame perdue)
+        self._frames = queue.Queue(maxsize=max(1, buffer_frames))
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def _read_loop(self):
+        start = time.perf_counter()
+        while not self._stopped.is_set():
+            if self.realtime and not self.is_camera:
+                delay = start + self.frames_read / self.fps - time.perf_counter()
+                if delay > 0 and self._stopped.wait(delay):
+                    break
+
+            ret, frame = self.cap.read()
+            timestamp = time.time() if self.is_camera else self.frames_read / self.fps
+            self.frames_read += 1
+            self._put((ret, frame if ret else None, timestamp))
+            if not ret:
+                break
+
+    def _put(self, item):
+        if self.is_camera and item[0]:
+            while True:
+                try:
+                    self._frames.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        self._frames.get_nowait()
+                        self.frames_dropped += 1
+                    except queue.Empty:
+                        pass
+        else:
+            while not self._stopped.is_set():
+                try:
+                    self._frames.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        if self._on_frame is not None:
+            self._on_frame()
+
+    def poll(self):
+        """
+        Frame suivante si elle est déjà lue (jamais bloquant)
+
+        Returns:
+            tuple: (ok, frame, timestamp en secondes), ou None si aucune
+            frame n'attend; ok = False en fin de source
+        """
+        try:
+            return self._frames.get_nowait()
+        except queue.Empty:
+            return None
+
+    def read(self):
+        """
+        Lit la frame suivante (attend qu'elle soit lue)
+
+        Returns:
+            tuple: (ok, frame, timestamp en secondes)
+        """
+        return self._frames.get()
+
+    def close(self):
+        """Arrête la lecture et libère la source"""
+        self._stopped.set()
+        self._thread.join(timeout=2.0)
+        self.cap.release()
+
+
+class StreamState:
+    """État et métriques d'un flux"""
+
+    def __init__(self, name, source, sink):
+        self.name = name
+        self.source = source
+        self.sink = sink
+        self.engine = DecisionEngine()
+        self.analytics = BlinkAnalytics(fps=source.fps)
+
+        self.busy = False
+        self.finished = False
+        self.next_item = None
+        self.dispatched = 0
+        self.deadline = 0.0
+
+        self.processed = 0
+        self.no_face = 0
+        self.alarms = 0
+        self.latency_total = 0.0
+
+
+class FleetRunner:
+    """Répartit plusieurs flux sur un pool fixe de détecteurs"""
+
+    POLICIES = ("deadline", "round-robin")
+
+    def __init__(self, sources, workers=2, policy="deadline", sinks=None, realtime=False,
+                 detector_factory=None, store=None):
+        """
+        Args:
+            sources: {nom: fichier vidéo ou index de caméra}
+            workers: Nombre de détecteurs (threads) du pool
+            policy: "deadline" ou "round-robin"
+            sinks: {nom: récepteur(nom, alarme, timestamp)} (défaut: print_sink)
+            realtime: Lire les fichiers à leur cadence réelle
+            detector_factory: Fabrique de détecteur (défaut: Face Mesh statique)
+            store: EventStore optionnel (frames et épisodes de tous les flux)
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Politique inconnue: {policy} (choix: {', '.join(self.POLICIES)})")
+
+        # Les threads de lecture réveillent l'ordonnanceur à chaque frame
+        self._cond = threading.Condition()
+        sinks = sinks or {}
+        self.streams = [StreamState(name, FrameSource(src, realtime, on_frame=self._wake),
+                                    sinks.get(name, print_sink))
+                        for name, src in sources.items()]
+        self.n_workers = workers
+        self.policy = policy
+        self.detector_factory = detector_factory or (
+            lambda: EyeClosureDetector(static_image_mode=True, reuse_buffers=True))
+
+        self.store = store
+        self._jobs = queue.Queue(maxsize=workers)
+        self._rr_next = 0
+        self._start = None
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify()
+
+    def _pick(self, ready):
+        """Choisit le prochain flux à servir parmi les flux libres"""
+        if self.policy == "deadline":
+            return min(ready, key=lambda s: s.deadline)
+
+        n = len(self.streams)
+        for k in range(n):
+            stream = self.streams[(self._rr_next + k) % n]
+            if stream in ready:
+                self._rr_next = (self._rr_next + k + 1) % n
+                return stream
+
+    def _worker(self, detector):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            stream, frame, timestamp, t_dispatch = job
+
+            try:
+                self._process(detector, stream, frame, timestamp)
+                stream.processed += 1
+                stream.latency_total += time.perf_counter() - t_dispatch
+            except Exception as e:
+                print(f"✗ [{stream.name}] Erreur détecteur: {e}")
+            finally:
+                with self._cond:
+                    stream.busy = False
+                    self._cond.notify()
+
+    def _process(self, detector, stream, frame, timestamp):
+        """Détection puis mise à jour de l'état du flux"""
+        eye_pts = detector.detect_eye_points(frame)
+        if eye_pts is None:
+            ear = None
+            stream.no_face += 1
+        else:
+            left_ear, right_ear = eye_aspect_ratios(eye_pts)
+            ear = (float(left_ear) + float(right_ear)) / 2.0
+
+        engine = stream.engine
+        engine.update(ear)
+        stream.analytics.update(timestamp, ear, engine.eye_closed_threshold)
+        if self.store is not None:
+            self.store.record(stream.name, timestamp, ear, engine.eyes_closed, engine.alarm)
+        if engine.alarm_changed:
+            stream.alarms += engine.alarm
+            stream.sink(stream.name, engine.alarm, timestamp)
+
+    def run(self, report_every=5.0):
+        """
+        Traite tous les flux jusqu'à la fin des fichiers (ou Ctrl+C)
+
+        Args:
+            report_every: Intervalle d'affichage des métriques (s, 0 = jamais)
+
+        Returns:
+            dict: Métriques finales (voir metrics())
+        """
+        # Détecteurs créés ici: une erreur de la fabrique remonte à l'appelant
+        # au lieu de tuer les threads du pool (et de bloquer l'ordonnanceur)
+        try:
+            detectors = [self.detector_factory() for _ in range(self.n_workers)]
+        except Exception:
+            for stream in self.streams:
+                stream.source.close()
+            raise
+
+        threads = [threading.Thread(target=self._worker, args=(detector,), daemon=True)
+                   for detector in detectors]
+        for t in threads:
+            t.start()
+
+        self._start = time.perf_counter()
+        last_report = self._start
+
+        try:
+            while True:
+                with self._cond:
+                    active = [s for s in self.streams if not s.finished]
+                    if not active:
+                        break
+                    # Flux libres dont la frame suivante est déjà lue
+                    for s in active:
+                        if not s.busy and s.next_item is None:
+                            s.next_item = s.source.poll()
+                    ready = [s for s in active if not s.busy and s.next_item is not None]
+                    if not ready:
+                        self._cond.wait(timeout=0.1)
+                        continue
+                    stream = self._pick(ready)
+                    (ok, frame, timestamp), stream.next_item = stream.next_item, None
+                    if not ok:
+                        stream.finished = True
+                        continue
+                    stream.busy = True
+
+                # Échéance = position dans l'horloge vidéo du flux
+                stream.dispatched += 1
+                stream.deadline = stream.dispatched / stream.source.fps
+                self._jobs.put((stream, frame, timestamp, time.perf_counter()))
+
+                now = time.perf_counter()
+                if report_every and now - last_report >= report_every:
+                    last_report = now
+                    self.print_metrics()
+
+        except KeyboardInterrupt:
+            print("\n⚠️  Interruption utilisateur")
+
+        finally:
+            for _ in threads:
+                self._jobs.put(None)
+            for t in threads:
+                t.join()
+            for stream in self.streams:
+                stream.source.close()
+
+        return self.metrics()
+
+    def metrics(self):
+        """
+        Métriques par flux et globales
+
+        Returns:
+            dict: {'streams': {nom: {...}}, 'total_fps': float, 'elapsed_s': float}
+        """
+        elapsed = max(time.perf_counter() - self._start, 1e-9) if self._start else 1e-9
+        streams = {}
+        for s in self.streams:
+            streams[s.name] = {
+                'frames': s.processed,
+                'fps': s.processed / elapsed,
+                'latency_ms': 1000 * s.latency_total / max(s.processed, 1),
+                'no_face': s.no_face,
+                'alarms': s.alarms,
+                'perclos': s.analytics.perclos,
+                'blink_rate': s.analytics.blink_rate,
+                'longest_closure_s': s.analytics.longest_closure,
+            }
+        total = sum(s.processed for s in self.streams)
+        return {'streams': streams, 'total_fps': total / elapsed, 'elapsed_s': elapsed}
+
+    def print_metrics(self):
+        """Affiche les métriques courantes"""
+        m = self.metrics()
+        print(f"\n{'Flux':<20} {'Frames':>8} {'FPS':>7} {'Latence':>9} {'Alarmes':>8} {'PERCLOS':>8}")
+        for name, s in m['streams'].items():
+            print(f"{name:<20} {s['frames']:>8} {s['fps']:>7.1f} {s['latency_ms']:>7.1f}ms {s['alarms']:>8} "
+                  f"{100 * s['perclos']:>7.1f}%")
+        print(f"{'TOTAL':<20} {'':>8} {m['total_fps']:>7.1f}  ({m['elapsed_s']:.1f}s)")
+
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Traitement de plusieurs flux vidéo dans un processus")
+    parser.add_argument("sources", nargs="+", help="Fichiers vidéo ou index de caméras")
+    parser.add_argument("--workers", type=int, default=2, help="Détecteurs dans le pool")
+    parser.add_argument("--policy", choices=FleetRunner.POLICIES, default="deadline")
+    parser.add_argument("--realtime", action="store_true", help="Lire les fichiers à leur cadence réelle")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Intervalle des métriques (s)")
+    parser.add_argument("--db", default=None, help="Base SQLite des frames et épisodes")
+    args = parser.parse_args()
+
+    if mp_solutions is None:
+        print("✗ MediaPipe non disponible. Veuillez installer: pip install mediapipe")
+        sys.exit(1)
+
+    sources = {}
+    for src in args.sources:
+        if src.isdigit():
+            sources[f"cam{src}"] = int(src)
+        else:
+            name = os.path.splitext(os.path.basename(src))[0]
+            while name in sources:
+                name += "_"
+            sources[name] = src
+
+    print("\n" + "=" * 60)
+    print(f"FLOTTE: {len(sources)} flux, {args.workers} détecteur(s), politique {args.policy}")
+    print("=" * 60)
+
+    store = EventStore(args.db) if args.db else None
+    runner = FleetRunner(sources, workers=args.workers, policy=args.policy, realtime=args.realtime,
+                         store=store)
+    try:
+        runner.run(report_every=args.report_every)
+    finally:
+        if store is not None:
+            store.close()
+            stats = store.stats()
+            print(f"✓ Base {args.db}: {stats['frames_written']} ligne(s), "
+                  f"{stats['episodes_written']} épisode(s), {stats['dropped']} écartée(s)")
+    runner.print_metrics()
+
+
+if __name__ == "__main__":
+    main()
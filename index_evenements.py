@@ -0,0 +1,284 @@
+"""
+INDEX D'ÉVÉNEMENTS ET ACCÈS DIRECT AUX ÉPISODES
+===============================================
+
+Construit, à partir des résultats d'analyse_video.py, un index annexe
+(<video>.events.json) qui associe chaque épisode à ses numéros de frame et
+horodatages:
+
+    - "alarm":     épisode ayant déclenché l'alarme
+    - "near_miss": yeux fermés assez longtemps pour approcher le seuil
+                   (>= near_miss_ratio x eyes_closed_frames_threshold),
+                   sans déclencher l'alarme
+
+Le lecteur et l'exporteur se positionnent directement sur l'épisode avec
+CAP_PROP_POS_FRAMES: seules les quelques secondes autour de l'événement
+sont décodées, jamais le fichier entier.
+
+Utilisation:
+    python index_evenements.py index trajet.analyse.npz
+    python index_evenements.py view trajet.events.json
+    python index_evenements.py export trajet.events.json --output-dir extraits
+"""
+
+import argparse
+import json
+import math
+import os
+
+import cv2
+import numpy as np
+
+import config_advanced
+from config import CONFIG
+from enregistreur_evenements import video_extension
+
+
+# Fraction du seuil de frames à partir de laquelle on parle de "near miss"
+NEAR_MISS_RATIO = 0.5
+
+
+def find_events(eyes_closed_frames, alarm, fps, closed_frames_threshold=None,
+                near_miss_ratio=NEAR_MISS_RATIO):
+    """
+    Extrait les épisodes d'alarme et les "near miss" d'une chronologie
+
+    Args:
+        eyes_closed_frames: Compteur de frames fermées par frame
+        alarm: État de l'alarme par frame
+        fps: Cadence de la vidéo
+        closed_frames_threshold: Seuil de l'alarme (défaut: config.py)
+        near_miss_ratio: Fraction du seuil pour un "near miss"
+
+    Returns:
+        list: [{'type', 'start_frame', 'end_frame', 'start_s', 'end_s',
+                'peak_closed_frames'}, ...] triés par frame
+    """
+    if closed_frames_threshold is None:
+        closed_frames_threshold = CONFIG['eyes_closed_frames_threshold']
+
+    counts = np.asarray(eyes_closed_frames)
+    alarm = np.asarray(alarm, dtype=bool)
+
+    # Une suite de fermeture = frames où le compteur est non nul
+    edges = np.diff(np.concatenate(([0], (counts > 0).astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return []
+
+    # Réductions bornées à [début, fin) de chaque suite: indices début/fin
+    # entrelacés, un résultat sur deux (une frame ajoutée: fin = len possible)
+    bounds = np.empty(2 * len(starts), dtype=np.intp)
+    bounds[0::2] = starts
+    bounds[1::2] = ends
+    peaks = np.maximum.reduceat(np.append(counts, 0), bounds)[0::2]
+    if len(alarm):
+        alarmed = np.logical_or.reduceat(np.append(alarm, False), bounds)[0::2]
+    else:
+        alarmed = np.zeros(len(starts), bool)
+    near_miss_frames = math.ceil(near_miss_ratio * closed_frames_threshold)
+
+    events = []
+    for start, end, peak, is_alarm in zip(starts.tolist(), ends.tolist(), peaks.tolist(), alarmed.tolist()):
+        if not is_alarm and peak < near_miss_frames:
+            continue
+        events.append({
+            'type': 'alarm' if is_alarm else 'near_miss',
+            'start_frame': start,
+            'end_frame': end,
+            'start_s': round(start / fps, 3),
+            'end_s': round(end / fps, 3),
+            'peak_closed_frames': int(peak),
+        })
+    return events
+
+
+def build_index(results_path, index_path=None, near_miss_ratio=NEAR_MISS_RATIO):
+    """
+    Construit l'index annexe à partir d'un fichier de résultats
+
+    Args:
+        results_path: Fichier .analyse.npz produit par analyse_video.py
+        index_path: Fichier de sortie (défaut: <video>.events.json)
+        near_miss_ratio: Fraction du seuil pour un "near miss"
+
+    Returns:
+        str: Chemin de l'index écrit
+    """
+    data = np.load(results_path)
+    fps = float(data['fps'])
+    source = str(data['source'])
+
+    events = find_events(data['eyes_closed_frames'], data['alarm'], fps,
+                         near_miss_ratio=near_miss_ratio)
+
+    if index_path is None:
+        index_path = results_path.replace('.analyse.npz', '') + '.events.json'
+
+    with open(index_path, 'w') as f:
+        json.dump({'video': source, 'fps': fps, 'events': events}, f, indent=1)
+    return index_path
+
+
+def load_index(index_path):
+    """Charge un index annexe"""
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def read_event_frames(cap, event, fps, pre_seconds=1.0, post_seconds=1.0):
+    """
+    Lit uniquement les frames autour d'un événement
+
+    Args:
+        cap: cv2.VideoCapture ouvert sur la vidéo
+        event: Entrée de l'index
+        fps: Cadence de la vidéo
+        pre_seconds: Contexte avant l'épisode
+        post_seconds: Contexte après l'épisode
+
+    Yields:
+        tuple: (numéro de frame, frame)
+    """
+    first = max(0, event['start_frame'] - int(pre_seconds * fps))
+    last = event['end_frame'] + int(post_seconds * fps)
+
+    # Accès direct: pas de décodage depuis le début du fichier
+    cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+    for index in range(first, last):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield index, frame
+
+
+def export_clips(index_path, output_dir, pre_seconds=1.0, post_seconds=1.0, types=None):
+    """
+    Extrait un court clip par événement
+
+    Args:
+        index_path: Index annexe (.events.json)
+        output_dir: Dossier des clips
+        pre_seconds, post_seconds: Contexte autour de l'épisode
+        types: Types d'événements à extraire (défaut: tous)
+
+    Returns:
+        list: Chemins des clips écrits
+    """
+    index = load_index(index_path)
+    fps = index['fps']
+    os.makedirs(output_dir, exist_ok=True)
+
+    cap = cv2.VideoCapture(index['video'])
+    if not cap.isOpened():
+        raise RuntimeError(f"Impossible d'ouvrir la vidéo: {index['video']}")
+
+    fourcc = cv2.VideoWriter_fourcc(*config_advanced.VIDEO_FORMAT)
+    base = os.path.splitext(os.path.basename(index['video']))[0]
+    clips = []
+
+    try:
+        for n, event in enumerate(index['events']):
+            if types and event['type'] not in types:
+                continue
+
+            path = os.path.join(output_dir, f"{base}_{n:04d}_{event['type']}_{event['start_s']:.0f}s{video_extension()}")
+            out = None
+            for _, frame in read_event_frames(cap, event, fps, pre_seconds, post_seconds):
+                if out is None:
+                    h, w = frame.shape[:2]
+                    out = cv2.VideoWriter(path, fourcc, fps, (w, h))
+                out.write(frame)
+            if out is not None:
+                out.release()
+                clips.append(path)
+    finally:
+        cap.release()
+
+    return clips
+
+
+def view_events(index_path, pre_seconds=1.0, post_seconds=1.0):
+    """
+    Parcourt les événements dans une fenêtre OpenCV
+
+    Touches: 'n' suivant, 'p' précédent, 'r' rejouer, 'q' quitter
+    """
+    index = load_index(index_path)
+    events = index['events']
+    fps = index['fps']
+    if not events:
+        print("Aucun événement dans l'index")
+        return
+
+    cap = cv2.VideoCapture(index['video'])
+    delay = max(1, int(1000 / fps))
+    current = 0
+
+    try:
+        while True:
+            event = events[current]
+            key = -1
+            for frame_index, frame in read_event_frames(cap, event, fps, pre_seconds, post_seconds):
+                inside = event['start_frame'] <= frame_index < event['end_frame']
+                color = (0, 0, 255) if inside else (200, 200, 200)
+                label = f"[{current + 1}/{len(events)}] {event['type']} {frame_index / fps:.1f}s"
+                cv2.putText(frame, label, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+                cv2.imshow("Evenements (n: suivant, p: precedent, r: rejouer, q: quitter)", frame)
+                key = cv2.waitKey(delay) & 0xFF
+                if key in (ord('n'), ord('p'), ord('r'), ord('q')):
+                    break
+
+            if key not in (ord('n'), ord('p'), ord('r'), ord('q')):
+                key = cv2.waitKey(0) & 0xFF
+
+            if key == ord('q'):
+                break
+            elif key == ord('n'):
+                current = min(current + 1, len(events) - 1)
+            elif key == ord('p'):
+                current = max(current - 1, 0)
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Index et accès direct aux épisodes de somnolence")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    idx = sub.add_parser("index", help="Construit l'index depuis un .analyse.npz")
+    idx.add_argument("results", help="Résultats d'analyse_video.py")
+    idx.add_argument("--near-miss-ratio", type=float, default=NEAR_MISS_RATIO)
+
+    view = sub.add_parser("view", help="Parcourt les événements")
+    view.add_argument("index", help="Index annexe (.events.json)")
+
+    exp = sub.add_parser("export", help="Extrait un clip par événement")
+    exp.add_argument("index", help="Index annexe (.events.json)")
+    exp.add_argument("--output-dir", default=config_advanced.EXPORT_DIR)
+    exp.add_argument("--type", choices=["alarm", "near_miss"], default=None)
+
+    for p in (view, exp):
+        p.add_argument("--pre", type=float, default=1.0, help="Contexte avant l'épisode (s)")
+        p.add_argument("--post", type=float, default=1.0, help="Contexte après l'épisode (s)")
+
+    args = parser.parse_args()
+
+    if args.command == "index":
+        path = build_index(args.results, near_miss_ratio=args.near_miss_ratio)
+        index = load_index(path)
+        n_alarm = sum(e['type'] == 'alarm' for e in index['events'])
+        print(f"✓ {n_alarm} alarme(s), {len(index['events']) - n_alarm} near miss → {path}")
+    elif args.command == "view":
+        view_events(args.index, args.pre, args.post)
+    else:
+        clips = export_clips(args.index, args.output_dir, args.pre, args.post,
+                             [args.type] if args.type else None)
+        print(f"✓ {len(clips)} clip(s) extrait(s) dans {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+JOURNALISATION ASYNCHRONE (ENABLE_LOGGING / LOG_FILE / LOG_LEVEL)
+=================================================================
+
+Les messages émis pendant la boucle de détection (transitions d'alarme,
+erreurs série, "Arduino non connecté", ...) passent par le logger
+"safedrive" au lieu de print():
+
+    - le thread de détection ne fait que filtrer et déposer l'entrée dans
+      une file (put_nowait, entrée écartée et comptée si la file est pleine)
+    - un QueueListener écrit en arrière-plan: console (message seul) et,
+      si ENABLE_LOGGING, fichier JSON-lines LOG_FILE avec rotation par
+      taille (LOG_MAX_BYTES, LOG_BACKUP_COUNT)
+    - les messages répétitifs marqués (erreurs série, "Arduino non
+      connecté", lecture webcam, ...) sont limités à une occurrence toutes
+      les LOG_RATE_LIMIT_SECONDS par format de message; l'occurrence
+      suivante indique combien ont été supprimées. Les autres messages, et
+      toujours les événements du bus (transitions d'alarme, épisodes, ...),
+      passent tous
+
+Champs structurés: logger.warning("...", extra={'fields': {'ear': 0.12}}).
+Limitation: logger.error("...", extra={'rate_limit': True}).
+
+Une ligne du fichier:
+    {"ts": 1700000000.123, "level": "WARNING", "logger": "safedrive",
+     "msg": "🔴 ALARME: ...", "closed_frames": 12}
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+import config_advanced
+
+
+LOGGER_NAME = "safedrive"
+
+
+def get_logger(name=None):
+    """Logger du projet (ou un sous-logger: get_logger("arduino"))"""
+    return logging.getLogger(LOGGER_NAME if name is None else f"{LOGGER_NAME}.{name}")
+
+
+class JsonFormatter(logging.Formatter):
+    """Une entrée JSON par ligne"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Message seul, comme les print() d'origine"""
+
+    def format(self, record):
+        msg = record.getMessage()
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            msg += f" ({suppressed} répétition(s) supprimée(s))"
+        return msg
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Laisse passer un message marqué rate_limit au plus une fois par intervalle
+
+    La clé est le format du message (record.msg), pas le texte formaté: une
+    erreur série dont le détail varie reste limitée. Les entrées des
+    événements du bus (champ 'event') ne sont jamais limitées.
+    """
+
+    def __init__(self, interval, max_keys=256):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._seen = {}
+
+    def filter(self, record):
+        if self.interval <= 0 or not getattr(record, 'rate_limit', False):
+            return True
+        fields = getattr(record, 'fields', None)
+        if fields and 'event' in fields:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        entry = self._seen.get(key)
+        if entry is not None and now < entry[0]:
+            entry[1] += 1
+            return False
+
+        record.suppressed = entry[1] if entry is not None else 0
+        if entry is None and len(self._seen) >= self.max_keys:
+            self._prune(now)
+        self._seen[key] = [now + self.interval, 0]
+        return True
+
+    def _prune(self, now):
+        # Intervalles écoulés d'abord, puis les plus anciennes clés
+        for key in [k for k, entry in self._seen.items() if now >= entry[0]]:
+            del self._seen[key]
+        while len(self._seen) >= self.max_keys:
+            del self._seen[next(iter(self._seen))]
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui écarte (et compte) les entrées quand la file est pleine"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(enabled=None, log_file=None, level=None, console=True):
+    """
+    Configure le logger "safedrive" (file + écriture en arrière-plan)
+
+    Args:
+        enabled: Écrire le fichier JSON-lines (défaut: ENABLE_LOGGING)
+        log_file: Fichier de log (défaut: LOG_FILE)
+        level: Niveau minimal (défaut: LOG_LEVEL)
+        console: Recopier les messages sur la console
+
+    Returns:
+        logging.handlers.QueueListener: Démarré; appeler stop() en fin de
+        programme pour écrire les dernières entrées
+    """
+    cfg = config_advanced
+    enabled = cfg.ENABLE_LOGGING if enabled is None else enabled
+    level = (level or cfg.LOG_LEVEL).upper()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(ConsoleFormatter())
+        handlers.append(stream)
+    if enabled:
+        rotating = logging.handlers.RotatingFileHandler(
+            log_file or cfg.LOG_FILE, maxBytes=cfg.LOG_MAX_BYTES,
+            backupCount=cfg.LOG_BACKUP_COUNT, encoding="utf-8")
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=cfg.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(RateLimitFilter(cfg.LOG_RATE_LIMIT_SECONDS))
+    logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,422 @@
+"""
+MOTEUR DE DÉCISION (DIRECT ET HORS-LIGNE)
+=========================================
+
+Regroupe en un seul endroit la logique qui transforme une série EAR en
+alarmes: lissage par moyenne mobile, compteurs de frames fermées/ouvertes
+et hystérésis de l'alarme.
+
+Deux API produisent exactement la même chronologie d'alarmes:
+    - DecisionEngine.update(): une frame à la fois, pour le direct
+    - decide_batch(): tableaux en entrée et en sortie, pour le hors-ligne
+
+Règles (identiques au comportement historique de main()):
+    - une frame sans visage (EAR None/NaN) ne touche ni le lissage ni les
+      compteurs, et l'alarme garde son état
+    - la frame est "fermée" si l'EAR lissé < eye_closed_threshold
+    - l'alarme s'active quand eyes_closed_frames >= closed_frames_threshold
+    - l'alarme se coupe après release_frames frames ouvertes consécutives
+
+Le lissage additionne les valeurs du buffer dans le même ordre dans les
+deux API, ce qui garantit des résultats identiques au bit près.
+"""
+
+from collections import deque
+
+import numpy as np
+
+import config_advanced
+from config import CONFIG
+
+
+class DecisionEngine:
+    """Décision frame par frame (yeux fermés, compteurs, alarme)"""
+
+    def __init__(self, eye_closed_threshold=None, closed_frames_threshold=None,
+                 smoothing_window=None, release_frames=None):
+        """
+        Initialise le moteur (valeurs par défaut: config.py)
+
+        Args:
+            eye_closed_threshold: Seuil EAR en dessous duquel l'œil est fermé
+            closed_frames_threshold: Frames fermées consécutives pour l'alarme
+            smoothing_window: Taille de la moyenne mobile
+            release_frames: Frames ouvertes consécutives pour couper l'alarme
+        """
+        self.eye_closed_threshold = (CONFIG['eye_closed_threshold']
+                                     if eye_closed_threshold is None else eye_closed_threshold)
+        self.closed_frames_threshold = (CONFIG['eyes_closed_frames_threshold']
+                                        if closed_frames_threshold is None else closed_frames_threshold)
+        self.smoothing_window = (CONFIG['smoothing_window']
+                                 if smoothing_window is None else smoothing_window)
+        self.release_frames = (CONFIG['eyes_open_frames_release']
+                               if release_frames is None else release_frames)
+        self.reset()
+
+    def reset(self):
+        """Remet l'état à zéro"""
+        self.ear_buffer = deque(maxlen=self.smoothing_window)
+        self.ear_smooth = None
+        self.eyes_closed = False
+        self.eyes_closed_frames = 0
+        self.eyes_open_frames = 0
+        self.alarm = False
+        self.alarm_changed = False
+
+    def update(self, ear):
+        """
+        Traite une frame
+
+        Args:
+            ear: EAR moyen de la frame, None (ou NaN) si aucun visage
+
+        Returns:
+            bool: État de l'alarme après cette frame (voir aussi les attributs
+                  ear_smooth, eyes_closed, eyes_closed_frames, alarm_changed)
+        """
+        previous = self.alarm
+
+        if ear is None or ear != ear:
+            self.ear_smooth = None
+            self.eyes_closed = False
+        else:
+            self.ear_buffer.append(ear)
+
+            # Somme séquentielle: même ordre d'addition que decide_batch()
+            total = 0.0
+            for value in self.ear_buffer:
+                total += value
+            self.ear_smooth = total / len(self.ear_buffer)
+
+            if self.ear_smooth < self.eye_closed_threshold:
+                self.eyes_closed = True
+                self.eyes_closed_frames += 1
+                self.eyes_open_frames = 0
+                if self.eyes_closed_frames >= self.closed_frames_threshold:
+                    self.alarm = True
+            else:
+                self.eyes_closed = False
+                self.eyes_open_frames += 1
+                self.eyes_closed_frames = 0
+                if self.eyes_open_frames >= self.release_frames:
+                    self.alarm = False
+
+        self.alarm_changed = self.alarm != previous
+        return self.alarm
+
+    def configure(self, eye_closed_threshold=None, closed_frames_threshold=None,
+                  smoothing_window=None, release_frames=None):
+        """
+        Change les paramètres entre deux frames en gardant l'état en cours
+
+        Les compteurs et l'alarme sont conservés; si la fenêtre de lissage
+        change, le buffer garde ses valeurs les plus récentes.
+
+        Args:
+            Voir __init__ (None = inchangé)
+        """
+        if eye_closed_threshold is not None:
+            self.eye_closed_threshold = eye_closed_threshold
+        if closed_frames_threshold is not None:
+            self.closed_frames_threshold = closed_frames_threshold
+        if release_frames is not None:
+            self.release_frames = release_frames
+        if smoothing_window is not None and smoothing_window != self.smoothing_window:
+            self.smoothing_window = smoothing_window
+            self.ear_buffer = deque(self.ear_buffer, maxlen=smoothing_window)
+
+    def run_batch(self, ear):
+        """decide_batch() avec les paramètres de ce moteur"""
+        return decide_batch(ear, self.eye_closed_threshold, self.closed_frames_threshold,
+                            self.smoothing_window, self.release_frames)
+
+
+class CueEngine:
+    """
+    Indices complémentaires à l'EAR: tête penchée et bâillements
+
+    Alimenté par caracteristiques_visage.py. Comme pour DecisionEngine, une
+    frame sans visage (ou sans pose) ne touche pas les compteurs.
+        - tête penchée: tangage ou roulis > max_head_angle pendant
+          head_frames frames consécutives -> head_alarm (coupée dès que la
+          tête revient dans la plage)
+        - bâillement: MAR > yawn_threshold pendant yawn_frames frames
+          consécutives; compté une fois par ouverture de la bouche
+    """
+
+    def __init__(self, max_head_angle=None, head_frames=None, yawn_threshold=None, yawn_frames=None):
+        """
+        Args:
+            max_head_angle: Angle max toléré (degrés) (défaut: MAX_HEAD_ANGLE)
+            head_frames: Frames tête penchée pour l'alarme (défaut: HEAD_DOWN_FRAMES)
+            yawn_threshold: MAR bouche grande ouverte (défaut: YAWN_MAR_THRESHOLD)
+            yawn_frames: Frames bouche ouverte pour un bâillement (défaut: YAWN_MIN_FRAMES)
+        """
+        cfg = config_advanced
+        self.max_head_angle = cfg.MAX_HEAD_ANGLE if max_head_angle is None else max_head_angle
+        self.head_frames = cfg.HEAD_DOWN_FRAMES if head_frames is None else head_frames
+        self.yawn_threshold = cfg.YAWN_MAR_THRESHOLD if yawn_threshold is None else yawn_threshold
+        self.yawn_frames = cfg.YAWN_MIN_FRAMES if yawn_frames is None else yawn_frames
+        self.reset()
+
+    def reset(self):
+        """Remet l'état à zéro"""
+        self.head_down = False
+        self.head_down_frames = 0
+        self.head_alarm = False
+        self.mouth_open_frames = 0
+        self.yawning = False
+        self.yawn_started = False
+        self.yawns = 0
+
+    def update(self, mar=None, pitch=None, roll=None):
+        """
+        Traite une frame
+
+        Args:
+            mar: Mouth Aspect Ratio (None: pas de visage ou bâillements ignorés)
+            pitch, roll: Angles de la tête en degrés (None: pose indisponible)
+        """
+        self.yawn_started = False
+        if mar is not None:
+            if mar > self.yawn_threshold:
+                self.mouth_open_frames += 1
+                if self.mouth_open_frames >= self.yawn_frames and not self.yawning:
+                    self.yawning = True
+                    self.yawn_started = True
+                    self.yawns += 1
+            else:
+                self.mouth_open_frames = 0
+                self.yawning = False
+
+        if pitch is not None:
+            self.head_down = abs(pitch) > self.max_head_angle or abs(roll) > self.max_head_angle
+            if self.head_down:
+                self.head_down_frames += 1
+                if self.head_down_frames >= self.head_frames:
+                    self.head_alarm = True
+            else:
+                self.head_down_frames = 0
+                self.head_alarm = False
+
+
+class MultiDecisionEngine:
+    """
+    Même logique que DecisionEngine pour plusieurs visages à la fois
+
+    L'état de chaque visage vit dans des tableaux de taille fixe indexés par
+    slot (voir FaceTracker dans suivi_visages.py): une frame met à jour
+    tous les visages présents en une seule passe vectorisée.
+    """
+
+    def __init__(self, max_faces, eye_closed_threshold=None, closed_frames_threshold=None,
+                 smoothing_window=None, release_frames=None):
+        """
+        Args:
+            max_faces: Nombre de slots
+            Autres paramètres: voir DecisionEngine (défaut: config.py)
+        """
+        reference = DecisionEngine(eye_closed_threshold, closed_frames_threshold,
+                                   smoothing_window, release_frames)
+        self.eye_closed_threshold = reference.eye_closed_threshold
+        self.closed_frames_threshold = reference.closed_frames_threshold
+        self.smoothing_window = reference.smoothing_window
+        self.release_frames = reference.release_frames
+
+        self.max_faces = max_faces
+        self.ear_buffer = np.zeros((max_faces, self.smoothing_window))
+        self.buffer_fill = np.zeros(max_faces, dtype=np.int64)
+        self.ear_smooth = np.full(max_faces, np.nan)
+        self.eyes_closed = np.zeros(max_faces, dtype=bool)
+        self.eyes_closed_frames = np.zeros(max_faces, dtype=np.int64)
+        self.eyes_open_frames = np.zeros(max_faces, dtype=np.int64)
+        self.alarm = np.zeros(max_faces, dtype=bool)
+
+    def reset(self, slots):
+        """Remet à zéro l'état des slots donnés (visage perdu)"""
+        self.ear_buffer[slots] = 0.0
+        self.buffer_fill[slots] = 0
+        self.ear_smooth[slots] = np.nan
+        self.eyes_closed[slots] = False
+        self.eyes_closed_frames[slots] = 0
+        self.eyes_open_frames[slots] = 0
+        self.alarm[slots] = False
+
+    def configure(self, eye_closed_threshold=None, closed_frames_threshold=None,
+                  smoothing_window=None, release_frames=None):
+        """
+        Voir DecisionEngine.configure (tous les slots à la fois)
+
+        Si la fenêtre de lissage change, chaque buffer garde ses valeurs
+        les plus récentes.
+        """
+        if eye_closed_threshold is not None:
+            self.eye_closed_threshold = eye_closed_threshold
+        if closed_frames_threshold is not None:
+            self.closed_frames_threshold = closed_frames_threshold
+        if release_frames is not None:
+            self.release_frames = release_frames
+        if smoothing_window is not None and smoothing_window != self.smoothing_window:
+            keep = min(smoothing_window, self.smoothing_window)
+            buffer = np.zeros((self.max_faces, smoothing_window))
+            buffer[:, smoothing_window - keep:] = self.ear_buffer[:, self.smoothing_window - keep:]
+            self.ear_buffer = buffer
+            self.buffer_fill = np.minimum(self.buffer_fill, smoothing_window)
+            self.smoothing_window = smoothing_window
+
+    def update(self, slots, ear):
+        """
+        Traite une frame pour les visages présents
+
+        Les slots absents de la frame gardent leur état, comme une frame
+        sans visage pour DecisionEngine.
+
+        Args:
+            slots: Slots des visages présents (n,)
+            ear: EAR moyen de chaque visage (n,)
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        if not len(slots):
+            self.eyes_closed[:] = False
+            return
+
+        # Buffer décalé: colonne 0 = plus ancienne valeur, zéros en tête
+        rows = self.ear_buffer[slots]
+        rows[:, :-1] = rows[:, 1:]
+        rows[:, -1] = ear
+        self.ear_buffer[slots] = rows
+        fill = np.minimum(self.buffer_fill[slots] + 1, self.smoothing_window)
+        self.buffer_fill[slots] = fill
+
+        # Somme séquentielle: même ordre d'addition que DecisionEngine
+        total = np.zeros(len(slots))
+        for k in range(self.smoothing_window):
+            total += rows[:, k]
+        smooth = total / fill
+
+        closed = smooth < self.eye_closed_threshold
+        closed_frames = np.where(closed, self.eyes_closed_frames[slots] + 1, 0)
+        open_frames = np.where(closed, 0, self.eyes_open_frames[slots] + 1)
+
+        alarm = self.alarm[slots]
+        alarm = np.where(closed_frames >= self.closed_frames_threshold, True, alarm)
+        alarm = np.where(open_frames >= self.release_frames, False, alarm)
+
+        self.eyes_closed[:] = False
+        self.ear_smooth[slots] = smooth
+        self.eyes_closed[slots] = closed
+        self.eyes_closed_frames[slots] = closed_frames
+        self.eyes_open_frames[slots] = open_frames
+        self.alarm[slots] = alarm
+
+
+def smooth_batch(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Moyenne mobile causale, identique au buffer de DecisionEngine
+
+    Args:
+        values: EAR des frames avec visage (sans NaN)
+        window: Taille de la fenêtre
+
+    Returns:
+        np.ndarray: EAR lissé, même longueur que values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    total = np.zeros(n)
+
+    # Ajoute les valeurs de la plus ancienne à la plus récente
+    for lag in range(min(window, n) - 1, -1, -1):
+        total[lag:] += values[:n - lag]
+
+    count = np.minimum(np.arange(1, n + 1), window)
+    return total / count
+
+
+def _run_length(mask: np.ndarray) -> np.ndarray:
+    """Longueur de la suite de True en cours à chaque position (0 si False)"""
+    idx = np.arange(len(mask))
+    last_false = np.maximum.accumulate(np.where(mask, -1, idx))
+    return np.where(mask, idx - last_false, 0)
+
+
+def decide_batch(ear, eye_closed_threshold=None, closed_frames_threshold=None,
+                 smoothing_window=None, release_frames=None):
+    """
+    Applique la logique de DecisionEngine à une série complète
+
+    Args:
+        ear: EAR moyen par frame, NaN quand aucun visage n'est détecté
+        eye_closed_threshold, closed_frames_threshold, smoothing_window,
+        release_frames: Voir DecisionEngine (défaut: config.py)
+
+    Returns:
+        dict: Tableaux de même longueur que ear:
+            - ear_smooth: float (NaN sans visage)
+            - eyes_closed: bool
+            - eyes_closed_frames: int
+            - alarm: bool
+    """
+    if eye_closed_threshold is None:
+        eye_closed_threshold = CONFIG['eye_closed_threshold']
+    if closed_frames_threshold is None:
+        closed_frames_threshold = CONFIG['eyes_closed_frames_threshold']
+    if smoothing_window is None:
+        smoothing_window = CONFIG['smoothing_window']
+    if release_frames is None:
+        release_frames = CONFIG['eyes_open_frames_release']
+
+    ear = np.asarray(ear, dtype=np.float64)
+    n = len(ear)
+    face = ~np.isnan(ear)
+
+    # Série compressée: seules les frames avec visage font évoluer l'état
+    smooth = smooth_batch(ear[face], smoothing_window)
+    closed = smooth < eye_closed_threshold
+    closed_count = _run_length(closed)
+    open_count = _run_length(~closed)
+
+    # Bascule set/reset: la dernière frame décisive fixe l'état de l'alarme
+    set_alarm = closed_count >= closed_frames_threshold
+    decisive = set_alarm | (open_count >= release_frames)
+    last = np.maximum.accumulate(np.where(decisive, np.arange(len(closed)), -1))
+    alarm = (last >= 0) & set_alarm[np.maximum(last, 0)]
+
+    # Retour à la série complète: une frame sans visage garde l'état précédent
+    pos = np.cumsum(face) - 1
+    has_state = pos >= 0
+    pos = np.maximum(pos, 0)
+
+    out_smooth = np.full(n, np.nan)
+    out_smooth[face] = smooth
+    out_closed = np.zeros(n, dtype=bool)
+    out_closed[face] = closed
+
+    if len(closed):
+        out_count = np.where(has_state, closed_count[pos], 0)
+        out_alarm = has_state & alarm[pos]
+    else:
+        out_count = np.zeros(n, dtype=np.int64)
+        out_alarm = np.zeros(n, dtype=bool)
+
+    return {
+        'ear_smooth': out_smooth,
+        'eyes_closed': out_closed,
+        'eyes_closed_frames': out_count,
+        'alarm': out_alarm,
+    }
+
+
+def alarm_episodes(alarm: np.ndarray) -> np.ndarray:
+    """
+    Épisodes d'alarme d'une chronologie
+
+    Args:
+        alarm: Tableau booléen par frame
+
+    Returns:
+        np.ndarray: Forme (n, 2) [première frame, frame de fin exclue]
+    """
+    edges = np.diff(np.concatenate(([0], np.asarray(alarm, dtype=np.int8), [0])))
+    return np.stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)], axis=1)
+
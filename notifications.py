@@ -0,0 +1,205 @@
+"""
+NOTIFICATIONS DE BUREAU (DESKTOP_NOTIFICATIONS / NOTIFICATION_CMD)
+==================================================================
+
+Affiche une notification (notify-send, ...) à chaque alarme, sans lancer
+de processus depuis la boucle de détection:
+
+    - notify() ne fait que noter la demande sous un verrou
+    - un thread dédié regroupe les demandes rapprochées d'un même type:
+      la première d'une rafale attend NOTIFICATION_DEBOUNCE s, les suivantes
+      remplacent le message ("... (3 alertes)"); une alarme qui clignote ne
+      lance donc qu'un seul processus. Les types ne se remplacent pas entre
+      eux: un défaut en attente n'est jamais écrasé par une perte du visage
+    - deux notifications d'un même type sont espacées d'au moins
+      NOTIFICATION_MIN_INTERVAL s; quand plusieurs types sont prêts, le
+      défaut passe d'abord, puis l'alarme, puis la perte du visage
+    - la commande tourne dans un petit pool (NOTIFICATION_WORKERS processus
+      au plus); elle est tuée après NOTIFICATION_TIMEOUT s. Si tout le pool
+      est occupé, la demande reste en attente (au plus une par type) et
+      continue d'absorber les demandes suivantes de son type
+
+La commande reçoit le titre et le message en derniers arguments:
+    notify-send "SafeDrive - ALARME" "Yeux fermés détectés"
+
+Pour les tests, n'importe quelle commande convient (voir la vérification
+"Notifications" de test_diagnostic.py), par exemple:
+    DesktopNotifier(command=[sys.executable, "-c", "import time; time.sleep(5)"])
+"""
+
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config_advanced
+from bus_evenements import ALARM_ON, FACE_LOST, FAULT
+from journalisation import get_logger
+
+
+log = get_logger("notifications")
+
+
+MESSAGES = {
+    ALARM_ON: ("SafeDrive - ALARME", "Yeux fermés détectés"),
+    FACE_LOST: ("SafeDrive", "Visage du conducteur perdu"),
+    FAULT: ("SafeDrive - DÉFAUT", "Détection interrompue"),
+}
+
+# Ordre d'envoi quand plusieurs types sont prêts (autres types: après)
+PRIORITY = {FAULT: 0, ALARM_ON: 1, FACE_LOST: 2}
+
+
+def command_available(command=None):
+    """True si la commande de notification est installée"""
+    command = command or config_advanced.NOTIFICATION_CMD
+    args = shlex.split(command) if isinstance(command, str) else list(command)
+    return bool(args) and shutil.which(args[0]) is not None
+
+
+class DesktopNotifier:
+    """Notifications regroupées et limitées, lancées en arrière-plan"""
+
+    TYPES = tuple(MESSAGES)
+
+    def __init__(self, command=None, debounce=None, min_interval=None, timeout=None, workers=None):
+        """
+        Args:
+            command: Commande (chaîne ou liste) (défaut: NOTIFICATION_CMD)
+            debounce: Regroupement des demandes rapprochées (s) (défaut: NOTIFICATION_DEBOUNCE)
+            min_interval: Écart min entre deux notifications (s) (défaut: NOTIFICATION_MIN_INTERVAL)
+            timeout: Durée max de la commande (s) (défaut: NOTIFICATION_TIMEOUT)
+            workers: Processus simultanés max (défaut: NOTIFICATION_WORKERS)
+        """
+        cfg = config_advanced
+        command = command or cfg.NOTIFICATION_CMD
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.debounce = cfg.NOTIFICATION_DEBOUNCE if debounce is None else debounce
+        self.min_interval = cfg.NOTIFICATION_MIN_INTERVAL if min_interval is None else min_interval
+        self.timeout = cfg.NOTIFICATION_TIMEOUT if timeout is None else timeout
+        self.workers = max(1, workers or cfg.NOTIFICATION_WORKERS)
+
+        # Demandes en attente par type: clé -> [titre, message, nombre, première demande]
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._last_sent = {}
+        self._running = 0
+        self._closed = False
+
+        self.requested = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.errors = 0
+
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="notify")
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def __call__(self, event):
+        """Abonné du bus: notifie les types présents dans MESSAGES"""
+        message = MESSAGES.get(event.type)
+        if message is not None:
+            self.notify(*message, key=event.type)
+
+    def notify(self, title, message, key=None):
+        """
+        Demande une notification (jamais bloquant)
+
+        Args:
+            title: Titre
+            message: Texte
+            key: Type de la demande: seules les demandes d'un même type se
+                 regroupent (défaut: le titre)
+        """
+        key = title if key is None else key
+        with self._cond:
+            self.requested += 1
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [title, message, 1, time.monotonic()]
+            else:
+                self.coalesced += 1
+                entry[0], entry[1] = title, message
+                entry[2] += 1
+            self._cond.notify()
+
+    def _next(self, now):
+        """(type à envoyer, attente en s): le plus tôt prêt, puis le plus prioritaire"""
+        best = None
+        for key, (_, _, _, first) in self._pending.items():
+            ready = max(first + self.debounce, self._last_sent.get(key, float('-inf')) + self.min_interval)
+            rank = (max(ready - now, 0.0), PRIORITY.get(key, len(PRIORITY)), first)
+            if best is None or rank < best[0]:
+                best = (rank, key)
+        return best[1], best[0][0]
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                # Regroupement, espacement minimal (par type), processus libre
+                while not self._closed:
+                    if self._running >= self.workers:
+                        self._cond.wait()
+                        continue
+                    key, delay = self._next(time.monotonic())
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if self._closed:
+                    self.dropped += len(self._pending)
+                    return
+
+                title, message, count, _ = self._pending.pop(key)
+                if count > 1:
+                    message = f"{message} ({count} alertes)"
+                self._last_sent[key] = time.monotonic()
+                self._running += 1
+            self._pool.submit(self._run, title, message)
+
+    def _run(self, title, message):
+        outcome = 'errors'
+        try:
+            subprocess.run(self.command + [title, message], timeout=self.timeout,
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            outcome = 'sent'
+        except subprocess.TimeoutExpired:
+            outcome = 'timeouts'
+            log.warning("⚠️  Notification: '%s' a dépassé %.1fs", self.command[0], self.timeout)
+        except OSError as e:
+            log.error("✗ Erreur notification: %s", e)
+        finally:
+            # Compteurs partagés par les processus du pool
+            with self._cond:
+                setattr(self, outcome, getattr(self, outcome) + 1)
+                self._running -= 1
+                self._cond.notify()
+
+    def stats(self):
+        """
+        Compteurs des notifications
+
+        Returns:
+            dict: requested, coalesced, sent, dropped, timeouts, errors
+        """
+        return {
+            'requested': self.requested,
+            'coalesced': self.coalesced,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+        }
+
+    def close(self):
+        """Abandonne les demandes en attente et attend les commandes en cours (timeout borné)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
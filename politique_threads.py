@@ -0,0 +1,176 @@
+"""
+POLITIQUE DE THREADS ET DE CŒURS (NUM_THREADS)
+==============================================
+
+Sans politique, le pool interne d'OpenCV, les threads BLAS de NumPy et
+MediaPipe se disputent les mêmes cœurs avec la capture et les threads
+d'entrées/sorties (bus, écritures, aperçu). Au démarrage:
+
+    - set_blas_env(): OMP/OpenBLAS/MKL/... limités à NUM_THREADS; à appeler
+      avant le premier import de numpy (les bibliothèques BLAS lisent ces
+      variables au chargement; une valeur déjà définie est respectée)
+    - apply_thread_policy(): cv2.setNumThreads(NUM_THREADS), limite BLAS à
+      chaud si threadpoolctl est installé, et épinglage du thread
+      d'inférence sur INFERENCE_CPUS (Linux). À appeler avant de créer le
+      détecteur: les threads de MediaPipe héritent de l'affinité du thread
+      qui les crée
+    - pin_threads(): une fois les threads d'entrées/sorties démarrés, les
+      épingle sur IO_CPUS (processus de capture compris)
+    - thread_report() / print_thread_report(): configuration effective
+
+numpy et cv2 sont importés dans les fonctions: ce module doit pouvoir être
+importé avant eux. benchmark_threads (test_performance.py) compare
+plusieurs réglages sur la machine cible.
+"""
+
+import os
+import threading
+
+import config_advanced
+
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+
+# Variables lues par les bibliothèques BLAS / OpenMP au chargement
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def affinity_available():
+    """True si l'épinglage sur des cœurs est possible (Linux)"""
+    return hasattr(os, "sched_setaffinity")
+
+
+def set_blas_env(num_threads=None):
+    """
+    Limite les threads BLAS / OpenMP (avant le premier import de numpy)
+
+    Args:
+        num_threads: Threads max (défaut: NUM_THREADS; 0 = valeurs par défaut)
+    """
+    num_threads = config_advanced.NUM_THREADS if num_threads is None else num_threads
+    if num_threads <= 0:
+        return
+    for var in BLAS_ENV_VARS:
+        os.environ.setdefault(var, str(num_threads))
+
+
+def apply_thread_policy(num_threads=None, inference_cpus=None):
+    """
+    Applique la politique au processus et au thread courant (inférence)
+
+    Args:
+        num_threads: Threads OpenCV et BLAS (défaut: NUM_THREADS; 0 = inchangé)
+        inference_cpus: Cœurs du thread courant (défaut: INFERENCE_CPUS;
+                        None = tous)
+
+    Returns:
+        list: Avertissements (épinglage impossible, ...)
+    """
+    import cv2
+
+    cfg = config_advanced
+    num_threads = cfg.NUM_THREADS if num_threads is None else num_threads
+    inference_cpus = cfg.INFERENCE_CPUS if inference_cpus is None else inference_cpus
+    warnings = []
+
+    if num_threads > 0:
+        cv2.setNumThreads(num_threads)
+        # numpy déjà chargé: l'environnement ne vaut que pour les processus
+        # lancés ensuite (capture), threadpoolctl limite les pools existants
+        set_blas_env(num_threads)
+        if threadpoolctl is not None:
+            threadpoolctl.threadpool_limits(num_threads)
+
+    if inference_cpus:
+        if not affinity_available():
+            warnings.append("épinglage non disponible sur ce système")
+        else:
+            try:
+                os.sched_setaffinity(0, inference_cpus)
+            except (OSError, ValueError) as e:
+                warnings.append(f"épinglage de l'inférence sur {tuple(inference_cpus)}: {e}")
+    return warnings
+
+
+def pin_threads(cpus=None, pids=(), include_current=False):
+    """
+    Épingle les threads Python déjà démarrés (et des processus) sur des cœurs
+
+    Args:
+        cpus: Cœurs (défaut: IO_CPUS; None = rien à faire)
+        pids: Processus à épingler aussi (ex: processus de capture)
+        include_current: Épingler aussi le thread courant
+
+    Returns:
+        int: Nombre de threads et processus épinglés
+    """
+    cpus = config_advanced.IO_CPUS if cpus is None else cpus
+    if not cpus or not affinity_available():
+        return 0
+
+    ids = [t.native_id for t in threading.enumerate()
+           if t.native_id is not None and (include_current or t is not threading.current_thread())]
+    pinned = 0
+    for native_id in ids + list(pids):
+        try:
+            os.sched_setaffinity(native_id, cpus)
+            pinned += 1
+        except OSError:
+            pass  # thread terminé entre-temps
+    return pinned
+
+
+def thread_report():
+    """
+    Configuration effective des threads
+
+    Returns:
+        dict: cpu_count, available_cpus, cv2_threads, blas_env {variable: valeur},
+              blas_pools [(bibliothèque, threads)] (None sans threadpoolctl),
+              threads [(nom, cœurs)] des threads Python
+    """
+    import cv2
+
+    def affinity(native_id):
+        if not affinity_available() or native_id is None:
+            return None
+        try:
+            return tuple(sorted(os.sched_getaffinity(native_id)))
+        except OSError:
+            return None
+
+    blas_pools = None
+    if threadpoolctl is not None:
+        blas_pools = [(info.get('internal_api'), info.get('num_threads'))
+                      for info in threadpoolctl.threadpool_info()]
+
+    return {
+        'cpu_count': os.cpu_count(),
+        'available_cpus': affinity(0),
+        'cv2_threads': cv2.getNumThreads(),
+        'blas_env': {var: os.environ.get(var) for var in BLAS_ENV_VARS},
+        'blas_pools': blas_pools,
+        'threads': [(t.name, affinity(t.native_id)) for t in threading.enumerate()],
+    }
+
+
+def print_thread_report(report=None):
+    """Affiche la configuration effective des threads"""
+    report = report or thread_report()
+
+    def cpus(value):
+        return "tous" if value is None else ",".join(map(str, value))
+
+    blas = set(report['blas_env'].values())
+    print(f"✓ Threads: OpenCV {report['cv2_threads']}, "
+          f"BLAS {'/'.join(sorted(v or 'défaut' for v in blas))}, {report['cpu_count']} cœur(s)")
+    if report['blas_pools'] is not None:
+        pools = ", ".join(f"{api} {n}" for api, n in report['blas_pools']) or "aucun"
+        print(f"  Pools BLAS chargés: {pools}")
+    print(f"  Cœurs disponibles (thread courant): {cpus(report['available_cpus'])}")
+    for name, affinity in report['threads']:
+        print(f"  {name:<20} cœurs {cpus(affinity)}")
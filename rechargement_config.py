@@ -0,0 +1,240 @@
+"""
+RECHARGEMENT À CHAUD DE LA CONFIGURATION (HOT_RELOAD)
+=====================================================
+
+Modifier config.py ou ACTIVE_PROFILE / PROFILES dans config_advanced.py
+ne demande plus de redémarrer (rechargement de MediaPipe, 2 s de reset
+de l'Arduino, réouverture de la caméra: conducteur non protégé):
+
+    - un thread surveille les deux fichiers (date et taille, toutes les
+      HOT_RELOAD_INTERVAL s) ou attend une demande explicite (SIGHUP,
+      request_reload())
+    - les fichiers sont relus dans un espace de noms neuf (runpy): les
+      modules config et config_advanced déjà importés ne changent pas
+    - les valeurs sont validées; un fichier invalide est signalé et la
+      configuration en cours est gardée
+    - la nouvelle configuration est un objet RuntimeSettings figé, publié
+      par une seule affectation (atomique); la boucle l'applique entre
+      deux frames au moteur de décision, dont les attributs restent de
+      simples attributs: aucun coût par frame hors du test "pending"
+
+Valeurs rechargées: seuil EAR, frames fermées pour l'alarme, fenêtre de
+lissage, frames de relâchement (config.py), surchargées par le profil
+actif (PROFILES[ACTIVE_PROFILE]).
+
+Utilisation:
+    watcher = ConfigWatcher()
+    ...
+    if watcher.pending is not None:      # à chaque frame
+        watcher.apply(detector.engine)
+"""
+
+import os
+import runpy
+import threading
+
+import config
+import config_advanced
+from journalisation import get_logger
+
+
+log = get_logger("config")
+
+
+class RuntimeSettings:
+    """Instantané validé des paramètres de décision (non modifiable)"""
+
+    __slots__ = ('eye_closed_threshold', 'closed_frames_threshold', 'smoothing_window',
+                 'release_frames', 'profile', 'version')
+
+    def __init__(self, eye_closed_threshold, closed_frames_threshold, smoothing_window,
+                 release_frames, profile, version=0):
+        for name, value in zip(self.__slots__, (eye_closed_threshold, closed_frames_threshold,
+                                                smoothing_window, release_frames, profile, version)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RuntimeSettings est figé: créer un nouvel instantané")
+
+    def engine_params(self):
+        """Arguments de DecisionEngine.configure()"""
+        return {
+            'eye_closed_threshold': self.eye_closed_threshold,
+            'closed_frames_threshold': self.closed_frames_threshold,
+            'smoothing_window': self.smoothing_window,
+            'release_frames': self.release_frames,
+        }
+
+    def __repr__(self):
+        return (f"RuntimeSettings(profil={self.profile!r}, seuil={self.eye_closed_threshold}, "
+                f"frames={self.closed_frames_threshold}, lissage={self.smoothing_window}, "
+                f"relâchement={self.release_frames}, v{self.version})")
+
+
+def _int_at_least(values, key, minimum=1):
+    value = values[key]
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f"{key} doit être un entier >= {minimum} (reçu {value!r})")
+    return value
+
+
+def load_settings(config_path=None, advanced_path=None, version=0):
+    """
+    Relit et valide config.py et config_advanced.py
+
+    Args:
+        config_path: Chemin de config.py (défaut: module importé)
+        advanced_path: Chemin de config_advanced.py (défaut: module importé)
+        version: Numéro de l'instantané
+
+    Returns:
+        RuntimeSettings
+
+    Raises:
+        ValueError: Valeur invalide ou profil inconnu
+        Exception: Erreur de syntaxe ou d'exécution des fichiers
+    """
+    base = runpy.run_path(config_path or config.__file__)
+    advanced = runpy.run_path(advanced_path or config_advanced.__file__)
+
+    values = {
+        'EYE_CLOSED_THRESHOLD': base['EYE_CLOSED_THRESHOLD'],
+        'EYES_CLOSED_FRAMES_THRESHOLD': base['EYES_CLOSED_FRAMES_THRESHOLD'],
+        'SMOOTHING_WINDOW': base['SMOOTHING_WINDOW'],
+        'EYES_OPEN_FRAMES_RELEASE': base['EYES_OPEN_FRAMES_RELEASE'],
+    }
+
+    # Le profil actif surcharge config.py
+    profile = advanced.get('ACTIVE_PROFILE', 'default')
+    profiles = advanced.get('PROFILES', {})
+    if profile not in profiles:
+        raise ValueError(f"Profil inconnu: {profile!r} (choix: {', '.join(profiles)})")
+    overrides = {
+        'eye_closed_threshold': 'EYE_CLOSED_THRESHOLD',
+        'eyes_closed_frames_threshold': 'EYES_CLOSED_FRAMES_THRESHOLD',
+        'smoothing_window': 'SMOOTHING_WINDOW',
+        'eyes_open_frames_release': 'EYES_OPEN_FRAMES_RELEASE',
+    }
+    for key, value in profiles[profile].items():
+        if key not in overrides:
+            raise ValueError(f"Clé inconnue dans le profil {profile!r}: {key}")
+        values[overrides[key]] = value
+
+    threshold = values['EYE_CLOSED_THRESHOLD']
+    if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 < threshold < 1:
+        raise ValueError(f"EYE_CLOSED_THRESHOLD doit être entre 0 et 1 (reçu {threshold!r})")
+
+    return RuntimeSettings(
+        eye_closed_threshold=float(threshold),
+        closed_frames_threshold=_int_at_least(values, 'EYES_CLOSED_FRAMES_THRESHOLD'),
+        smoothing_window=_int_at_least(values, 'SMOOTHING_WINDOW'),
+        release_frames=_int_at_least(values, 'EYES_OPEN_FRAMES_RELEASE'),
+        profile=profile,
+        version=version,
+    )
+
+
+class ConfigWatcher:
+    """Surveille les fichiers de configuration et prépare l'instantané suivant"""
+
+    def __init__(self, config_path=None, advanced_path=None, interval=None):
+        """
+        Args:
+            config_path: Chemin de config.py (défaut: module importé)
+            advanced_path: Chemin de config_advanced.py (défaut: module importé)
+            interval: Période de surveillance (s) (défaut: HOT_RELOAD_INTERVAL)
+
+        Raises:
+            ValueError: Configuration de départ invalide
+        """
+        self.paths = (config_path or config.__file__, advanced_path or config_advanced.__file__)
+        self.interval = config_advanced.HOT_RELOAD_INTERVAL if interval is None else interval
+
+        # Instantané courant et instantané à appliquer (affectations atomiques)
+        self.current = load_settings(*self.paths)
+        self.pending = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.errors = 0
+
+        self._signatures = self._stat()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def _stat(self):
+        signatures = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                signatures.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signatures.append(None)
+        return signatures
+
+    def request_reload(self):
+        """Demande une relecture immédiate (commande locale, SIGHUP)"""
+        self._signatures = None
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped:
+                break
+            signatures = self._stat()
+            if signatures == self._signatures:
+                continue
+            self._signatures = signatures
+            self.reload()
+
+    def reload(self):
+        """
+        Relit et valide la configuration (thread de surveillance)
+
+        Returns:
+            bool: True si un nouvel instantané attend d'être appliqué
+        """
+        with self._lock:
+            latest = self.pending or self.current
+        try:
+            settings = load_settings(*self.paths, version=latest.version + 1)
+        except Exception as e:
+            self.errors += 1
+            log.error("✗ Configuration invalide, valeurs en cours gardées: %s", e)
+            return False
+        if settings.engine_params() == latest.engine_params() and settings.profile == latest.profile:
+            return False
+        with self._lock:
+            self.pending = settings
+        return True
+
+    def apply(self, engine):
+        """
+        Applique l'instantané en attente au moteur (entre deux frames)
+
+        Args:
+            engine: DecisionEngine
+
+        Returns:
+            RuntimeSettings: Instantané appliqué, None si rien n'attendait
+        """
+        with self._lock:
+            settings, self.pending = self.pending, None
+        if settings is None:
+            return None
+        engine.configure(**settings.engine_params())
+        previous, self.current = self.current, settings
+        self.reloads += 1
+        log.info("✓ Configuration rechargée: %r", settings,
+                 extra={'fields': {'event': 'config_reload', 'profile': settings.profile,
+                                   'previous_profile': previous.profile, **settings.engine_params()}})
+        return settings
+
+    def close(self):
+        """Arrête la surveillance"""
+        self._stopped = True
+        self._wake.set()
+        self._thread.join()
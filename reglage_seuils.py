@@ -0,0 +1,262 @@
+"""
+RÉGLAGE DES SEUILS PAR BALAYAGE VECTORISÉ
+=========================================
+
+Évalue une grille complète (seuil EAR, frames consécutives, fenêtre de
+lissage) sur des séries EAR enregistrées et des épisodes de fermeture
+annotés, pour choisir les valeurs des PROFILES de config_advanced.py.
+
+Toutes les combinaisons de seuils sont évaluées en une passe NumPy par
+fenêtre de lissage: les suites de frames "fermées" sont extraites une seule
+fois pour tous les seuils, puis chaque durée se réduit à un filtrage des
+suites assez longues. Aucune configuration n'est rejouée frame par frame.
+
+Métriques par point de la grille:
+    - precision: alarmes tombant dans un épisode annoté / alarmes
+    - recall: épisodes annotés ayant déclenché au moins une alarme
+    - false_alarms_per_hour: alarmes hors épisode, par heure enregistrée
+    - latency_s: délai moyen entre le début de l'épisode et l'alarme
+
+Les séries EAR viennent d'un enregistrement de landmarks (.sdlm) ou d'un
+fichier .npz contenant 'timestamps' et 'ear' (NaN = aucun visage). Les
+épisodes annotés sont un CSV "debut,fin" en secondes, dans la même base de
+temps que les horodatages de l'enregistrement.
+
+Utilisation:
+    python reglage_seuils.py session.sdlm episodes.csv --output grille.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from moteur_decision import smooth_batch
+
+
+# Colonnes du tableau de résultats
+RESULT_DTYPE = np.dtype([
+    ('smoothing_window', np.int32),
+    ('threshold', np.float64),
+    ('closed_frames', np.int32),
+    ('alarms', np.int32),
+    ('true_alarms', np.int32),
+    ('precision', np.float64),
+    ('recall', np.float64),
+    ('false_alarms_per_hour', np.float64),
+    ('latency_s', np.float64),
+])
+
+
+def load_ear_series(path):
+    """
+    Charge une série EAR moyenne (deux yeux) et ses horodatages
+
+    Args:
+        path: Enregistrement de landmarks (.sdlm) ou fichier .npz
+
+    Returns:
+        tuple: (timestamps, ear) avec NaN pour les frames sans visage
+    """
+    if str(path).endswith('.npz'):
+        data = np.load(path)
+        return np.asarray(data['timestamps'], dtype=np.float64), np.asarray(data['ear'], dtype=np.float64)
+
+    from detection_yeux_fermes_arduino import EyeClosureDetector
+    from enregistrement_landmarks import LandmarkRecording
+
+    recording = LandmarkRecording(path)
+    ears = recording.ears(EyeClosureDetector.LEFT_EYE_IDX, EyeClosureDetector.RIGHT_EYE_IDX)
+    return np.array(recording.timestamps, dtype=np.float64), (ears[:, 0] + ears[:, 1]) / 2.0
+
+
+def load_events(path) -> np.ndarray:
+    """
+    Charge les épisodes de fermeture annotés
+
+    Args:
+        path: CSV "debut,fin" (secondes), lignes '#' ignorées
+
+    Returns:
+        np.ndarray: Forme (n, 2), trié par début
+    """
+    events = np.loadtxt(path, delimiter=',', comments='#', ndmin=2)
+    return events[np.argsort(events[:, 0])]
+
+
+def sweep(timestamps, ear, events, thresholds, closed_frames, smoothing_windows, tolerance=1.0):
+    """
+    Évalue toutes les combinaisons de la grille
+
+    Les alarmes sont celles de moteur_decision avec release_frames = 1
+    (coupure dès la réouverture des yeux).
+
+    Args:
+        timestamps: Horodatages des frames (secondes)
+        ear: EAR moyen par frame, NaN quand aucun visage n'est détecté
+        events: Épisodes annotés (n, 2) [debut, fin], triés et disjoints
+        thresholds: Seuils EAR à tester
+        closed_frames: Nombres de frames consécutives à tester
+        smoothing_windows: Fenêtres de lissage à tester
+        tolerance: Marge (s) après la fin d'un épisode pour compter l'alarme
+
+    Returns:
+        np.ndarray: Tableau structuré (RESULT_DTYPE), une ligne par combinaison
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    ear = np.asarray(ear, dtype=np.float64)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    closed_frames = np.asarray(closed_frames, dtype=np.int64)
+    events = np.asarray(events, dtype=np.float64).reshape(-1, 2)
+
+    n_thr = len(thresholds)
+    n_ev = len(events)
+    hours = max((timestamps[-1] - timestamps[0]) / 3600.0, 1e-9) if len(timestamps) else 1e-9
+
+    # Comme en direct: les frames sans visage ne touchent ni le lissage
+    # ni le compteur, on travaille donc sur la série compressée
+    face = ~np.isnan(ear)
+    face_ear = ear[face]
+    face_t = timestamps[face]
+    m = len(face_ear)
+
+    ev_start = events[:, 0]
+    ev_end = events[:, 1] + tolerance
+
+    # Clé (ligne, temps) strictement croissante pour chercher toutes les
+    # lignes de seuil en un seul searchsorted. Les bornes des épisodes sont
+    # ramenées dans l'enregistrement pour ne pas déborder sur la ligne
+    # voisine (épisode commencé avant t0 ou fini après la dernière frame)
+    t0 = timestamps[0] if len(timestamps) else 0.0
+    t_last = timestamps[-1] if len(timestamps) else 0.0
+    span = (t_last - t0) + tolerance + 1.0
+    row_base = np.arange(n_thr)[:, None] * span
+    q_start = (row_base + (np.maximum(ev_start, t0) - t0)[None, :]).ravel()
+    q_end = (row_base + (np.minimum(ev_end, t_last + tolerance) - t0)[None, :]).ravel()
+    q_event = (row_base + (ev_start - t0)[None, :]).ravel()
+
+    out = np.zeros(len(smoothing_windows) * n_thr * len(closed_frames), dtype=RESULT_DTYPE)
+    k = 0
+
+    for window in smoothing_windows:
+        smooth = smooth_batch(face_ear, window)
+
+        # Suites de frames fermées pour tous les seuils à la fois
+        padded = np.zeros((n_thr, m + 2), dtype=np.int8)
+        padded[:, 1:-1] = smooth[None, :] < thresholds[:, None]
+        edges = np.diff(padded, axis=1)
+        run_row, run_start = np.nonzero(edges == 1)
+        _, run_end = np.nonzero(edges == -1)
+        run_len = run_end - run_start
+
+        for n_frames in closed_frames:
+            # L'alarme part à la n-ième frame fermée de chaque suite assez longue
+            ok = run_len >= n_frames
+            rows = run_row[ok]
+            t_on = face_t[run_start[ok] + n_frames - 1]
+            n_on = len(t_on)
+
+            alarms = np.bincount(rows, minlength=n_thr)
+
+            # Alarmes tombant dans un épisode annoté
+            if n_ev and n_on:
+                j = np.searchsorted(ev_end, t_on)
+                jc = np.minimum(j, n_ev - 1)
+                hit = (j < n_ev) & (t_on >= ev_start[jc])
+                true_alarms = np.bincount(rows, weights=hit, minlength=n_thr)
+
+                # Première alarme après le début de chaque épisode
+                key = rows * span + (t_on - t0)
+                i = np.searchsorted(key, q_start)
+                ic = np.minimum(i, n_on - 1)
+                found = (i < n_on) & (key[ic] <= q_end)
+                latency = np.where(found, key[ic] - q_event, 0.0).reshape(n_thr, n_ev)
+                detected = found.reshape(n_thr, n_ev).sum(axis=1)
+            else:
+                true_alarms = np.zeros(n_thr)
+                latency = np.zeros((n_thr, max(n_ev, 1)))
+                detected = np.zeros(n_thr, dtype=np.int64)
+
+            block = out[k:k + n_thr]
+            block['smoothing_window'] = window
+            block['threshold'] = thresholds
+            block['closed_frames'] = n_frames
+            block['alarms'] = alarms
+            block['true_alarms'] = true_alarms
+            block['precision'] = np.divide(true_alarms, alarms, out=np.zeros(n_thr), where=alarms > 0)
+            block['recall'] = detected / n_ev if n_ev else 0.0
+            block['false_alarms_per_hour'] = (alarms - true_alarms) / hours
+            block['latency_s'] = np.divide(latency.sum(axis=1), detected,
+                                           out=np.full(n_thr, np.nan), where=detected > 0)
+            k += n_thr
+
+    return out
+
+
+def save_results(results, path):
+    """Écrit le tableau de résultats en CSV"""
+    np.savetxt(path, results, delimiter=',', header=','.join(results.dtype.names), comments='',
+               fmt=['%d', '%.4f', '%d', '%d', '%d', '%.4f', '%.4f', '%.3f', '%.3f'])
+
+
+def print_best(results, top=10, max_false_alarms=None):
+    """Affiche les meilleures combinaisons (F1 décroissant)"""
+    p, r = results['precision'], results['recall']
+    f1 = np.divide(2 * p * r, p + r, out=np.zeros(len(results)), where=(p + r) > 0)
+
+    candidates = np.arange(len(results))
+    if max_false_alarms is not None:
+        candidates = candidates[results['false_alarms_per_hour'] <= max_false_alarms]
+    best = candidates[np.argsort(-f1[candidates], kind='stable')[:top]]
+
+    print(f"{'lissage':>8} {'seuil':>7} {'frames':>7} {'précision':>10} {'rappel':>7} "
+          f"{'FA/h':>7} {'latence':>8}")
+    for i in best:
+        row = results[i]
+        print(f"{row['smoothing_window']:>8d} {row['threshold']:>7.3f} {row['closed_frames']:>7d} "
+              f"{row['precision']:>10.2f} {row['recall']:>7.2f} "
+              f"{row['false_alarms_per_hour']:>7.2f} {row['latency_s']:>7.2f}s")
+
+
+def _parse_range(text, cast):
+    """'debut:fin:pas' -> np.arange, sinon liste 'a,b,c'"""
+    if ':' in text:
+        start, stop, step = (cast(v) for v in text.split(':'))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([cast(v) for v in text.split(',')])
+
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Balayage vectorisé des seuils de détection")
+    parser.add_argument("series", help="Enregistrement de landmarks (.sdlm) ou série EAR (.npz)")
+    parser.add_argument("events", help="CSV des épisodes annotés (debut,fin en secondes)")
+    parser.add_argument("--thresholds", default="0.12:0.32:0.005", help="Seuils EAR (debut:fin:pas ou liste)")
+    parser.add_argument("--frames", default="3:45:1", help="Frames consécutives (debut:fin:pas ou liste)")
+    parser.add_argument("--smoothing", default="1:10:1", help="Fenêtres de lissage (debut:fin:pas ou liste)")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Marge après la fin d'un épisode (s)")
+    parser.add_argument("--max-false-alarms", type=float, default=None, help="FA/h maximum pour le classement")
+    parser.add_argument("--output", default=None, help="CSV de la grille complète")
+    args = parser.parse_args()
+
+    timestamps, ear = load_ear_series(args.series)
+    events = load_events(args.events)
+    thresholds = _parse_range(args.thresholds, float)
+    frames = _parse_range(args.frames, int)
+    windows = _parse_range(args.smoothing, int)
+
+    start = time.perf_counter()
+    results = sweep(timestamps, ear, events, thresholds, frames, windows, args.tolerance)
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ {len(results)} configurations évaluées sur {len(ear)} frames en {elapsed:.2f}s")
+    print(f"  Épisodes annotés: {len(events)}\n")
+    print_best(results, max_false_alarms=args.max_false_alarms)
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"\n✓ Grille complète: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+SUIVI DE VISAGES MULTIPLES
+==========================
+
+Associe les visages détectés d'une frame à l'autre pour que chaque
+personne garde son propre état (lissage, compteurs, alarme).
+
+Le suivi est volontairement simple et peu coûteux: IoU des boîtes entre la
+frame précédente et la frame courante, avec repli sur la distance entre
+centres quand les boîtes ne se recouvrent plus (mouvement rapide). Toutes
+les données vivent dans des tableaux NumPy de taille fixe indexés par
+"slot", ce qui permet de stocker l'état de décision de chaque visage dans
+des tableaux parallèles (voir MultiDecisionEngine dans moteur_decision.py).
+"""
+
+import numpy as np
+
+
+def boxes_from_points(points: np.ndarray) -> np.ndarray:
+    """
+    Boîtes englobantes (x1, y1, x2, y2) de groupes de points
+
+    Args:
+        points: Tableau (n, ..., 2)
+
+    Returns:
+        np.ndarray: Forme (n, 4)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if not len(points):
+        return np.zeros((0, 4))
+    flat = points.reshape(len(points), -1, 2)
+    return np.concatenate([flat.min(axis=1), flat.max(axis=1)], axis=1)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU entre chaque boîte de a (n, 4) et chaque boîte de b (m, 4)"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+class FaceTracker:
+    """Suivi IoU/centroïde avec un nombre fixe de slots"""
+
+    def __init__(self, max_faces, max_missed=15, min_iou=0.1, max_distance=80.0):
+        """
+        Args:
+            max_faces: Nombre de slots (visages suivis simultanément)
+            max_missed: Frames sans correspondance avant de libérer un slot
+            min_iou: IoU minimale pour associer deux boîtes
+            max_distance: Distance max (pixels) entre centres en repli
+        """
+        self.max_faces = max_faces
+        self.max_missed = max_missed
+        self.min_iou = min_iou
+        self.max_distance = max_distance
+
+        self.boxes = np.zeros((max_faces, 4))
+        self.active = np.zeros(max_faces, dtype=bool)
+        self.missed = np.zeros(max_faces, dtype=np.int32)
+        self.track_ids = np.full(max_faces, -1, dtype=np.int64)
+        self._next_id = 0
+
+    def update(self, boxes):
+        """
+        Associe les boîtes de la frame courante aux slots
+
+        Args:
+            boxes: Boîtes détectées (n, 4)
+
+        Returns:
+            tuple: (slots, released)
+                - slots: slot de chaque boîte (n,), -1 si aucun slot libre
+                - released: slots libérés à cette frame (état à réinitialiser)
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        n = len(boxes)
+        slots = np.full(n, -1, dtype=np.int64)
+        active = np.flatnonzero(self.active)
+
+        if n and len(active):
+            # Score: IoU, ou à défaut proximité des centres (toujours < min_iou)
+            iou = iou_matrix(self.boxes[active], boxes)
+            prev_c = (self.boxes[active, :2] + self.boxes[active, 2:]) / 2
+            curr_c = (boxes[:, :2] + boxes[:, 2:]) / 2
+            dist = np.linalg.norm(prev_c[:, None, :] - curr_c[None, :, :], axis=2)
+            near = np.clip(1.0 - dist / self.max_distance, 0.0, None) * self.min_iou
+            score = np.where(iou >= self.min_iou, iou, near)
+
+            # Association gloutonne par score décroissant
+            taken_track = np.zeros(len(active), dtype=bool)
+            for flat in np.argsort(-score, axis=None):
+                t, d = divmod(int(flat), n)
+                if score[t, d] <= 0:
+                    break
+                if taken_track[t] or slots[d] >= 0:
+                    continue
+                taken_track[t] = True
+                slots[d] = active[t]
+
+        # Nouvelles pistes dans les slots libres
+        free = list(np.flatnonzero(~self.active))
+        for d in np.flatnonzero(slots < 0):
+            if not free:
+                break
+            slot = free.pop(0)
+            slots[d] = slot
+            self.active[slot] = True
+            self.track_ids[slot] = self._next_id
+            self._next_id += 1
+
+        matched = slots[slots >= 0]
+        self.boxes[matched] = boxes[slots >= 0]
+        self.missed[matched] = 0
+
+        # Pistes non vues: vieillissement puis libération
+        unseen = np.setdiff1d(np.flatnonzero(self.active), matched)
+        self.missed[unseen] += 1
+        released = unseen[self.missed[unseen] > self.max_missed]
+        self.active[released] = False
+        self.track_ids[released] = -1
+        self.missed[released] = 0
+
+        return slots, released
@@ -219,6 +219,124 @@ def test_files():
     return all_present
 
 
+def test_journal_evenements(n_transitions=5):
+    """Vérifie que chaque transition d'alarme arrive dans le journal"""
+    print_header("8. JOURNAL DES ÉVÉNEMENTS")
+    
+    try:
+        import json
+        import os
+        import tempfile
+        from bus_evenements import ALARM_OFF, ALARM_ON, EPISODE, EventBus, log_event
+        from journalisation import setup_logging
+        
+        # Transitions identiques à la suite, comme une série d'alarmes réelles
+        log_file = os.path.join(tempfile.mkdtemp(), "journal.jsonl")
+        listener = setup_logging(enabled=True, log_file=log_file, level="INFO", console=False)
+        bus = EventBus()
+        bus.subscribe("journal", log_event)
+        for _ in range(n_transitions):
+            bus.publish(ALARM_ON, closed_frames=10)
+            bus.publish(ALARM_OFF)
+            bus.publish(EPISODE, duration_s=1.0, frames=30)
+        bus.close()
+        listener.stop()
+        
+        with open(log_file, encoding="utf-8") as f:
+            events = [json.loads(line).get('event') for line in f]
+        success = True
+        for event_type in (ALARM_ON, ALARM_OFF, EPISODE):
+            count = events.count(event_type)
+            ok = count == n_transitions
+            print_status(ok, f"{event_type}: {count}/{n_transitions} ligne(s)")
+            success = success and ok
+        return success
+    
+    except Exception as e:
+        print_status(False, f"Erreur journal: {e}")
+        return False
+
+
+def test_notifications():
+    """Vérifie les notifications avec des commandes factices (lente, bloquée, journal)"""
+    print_header("9. NOTIFICATIONS")
+    
+    try:
+        import os
+        import tempfile
+        import time
+        from bus_evenements import ALARM_ON, FACE_LOST, FAULT, Event
+        from notifications import DesktopNotifier
+        
+        success = True
+        
+        # Commande bloquée: notify() rend la main tout de suite, la commande est tuée
+        hanging = [sys.executable, "-c", "import time; time.sleep(30)"]
+        notifier = DesktopNotifier(command=hanging, debounce=0.0, min_interval=0.0, timeout=0.5, workers=1)
+        start = time.perf_counter()
+        for _ in range(20):
+            notifier.notify("SafeDrive", "test")
+        worst = time.perf_counter() - start
+        time.sleep(1.5)
+        notifier.notify("SafeDrive", "test")
+        notifier.close()
+        stats = notifier.stats()
+        ok = worst < 0.05
+        print_status(ok, f"notify() x20 avec commande bloquée: {worst * 1000:.1f} ms")
+        success = success and ok
+        ok = stats['timeouts'] >= 1
+        print_status(ok, f"Commande bloquée tuée: {stats['timeouts']} dépassement(s)")
+        success = success and ok
+        
+        # Types distincts en rafale: aucun n'écrase l'autre, le défaut passe d'abord
+        journal = os.path.join(tempfile.mkdtemp(), "notifications.txt")
+        writer = [sys.executable, "-c", f"import sys; open({journal!r}, 'a').write(sys.argv[1] + '\\n')"]
+        notifier = DesktopNotifier(command=writer, debounce=0.3, min_interval=0.0, timeout=5.0, workers=1)
+        for event_type in (FAULT, FACE_LOST, ALARM_ON, ALARM_ON):
+            notifier(Event(event_type, time.time(), "test", {}))
+        time.sleep(3.0)
+        notifier.close()
+        with open(journal, encoding="utf-8") as f:
+            titles = f.read().splitlines()
+        ok = len(titles) == 3 and titles[0] == "SafeDrive - DÉFAUT"
+        print_status(ok, f"Rafale FAULT, FACE_LOST, 2 x ALARM_ON: {titles}")
+        success = success and ok
+        return success
+    
+    except Exception as e:
+        print_status(False, f"Erreur notifications: {e}")
+        return False
+
+
+def test_reglage_seuils():
+    """Vérifie le balayage des seuils sur des épisodes hors de l'enregistrement"""
+    print_header("10. RÉGLAGE DES SEUILS")
+    
+    try:
+        import numpy as np
+        from reglage_seuils import sweep
+        
+        # 10 s à 30 FPS; chaque cas: (EAR, seuils, épisode annoté)
+        t = np.arange(300) / 30.0
+        cases = {
+            "épisode fini après la dernière frame": (np.full(300, 0.3), [0.2, 0.35], [[9.5, 20.0]]),
+            "épisode commencé avant la première frame": (np.where(t < 8.0, 0.4, 0.3), [0.35, 0.2], [[-5.0, -0.5]]),
+        }
+        success = True
+        for label, (ear, thresholds, events) in cases.items():
+            # Aucune alarme dans l'épisode: une ligne voisine ne doit pas le détecter
+            results = sweep(t, ear, np.array(events), thresholds, [3], [1])
+            ok = bool((results['recall'] == 0).all())
+            recalls = ", ".join(f"{r['threshold']:.2f}: {r['recall']:.1f}" for r in results)
+            print_status(ok, f"{label}: rappel {recalls}")
+            success = success and ok
+        return success
+    
+    except Exception as e:
+        print_status(False, f"Erreur réglage des seuils: {e}")
+        return False
+
+
 def main():
     """Fonction principale de test"""
     
@@ -237,6 +355,9 @@ def main():
         "Webcam": test_webcam(),
         "MediaPipe": test_mediapipe(),
         "Fichiers": test_files(),
+        "Journal": test_journal_evenements(),
+        "Notifications": test_notifications(),
+        "Seuils": test_reglage_seuils(),
     }
     
     # Résumé
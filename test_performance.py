@@ -7,7 +7,14 @@ Teste la caméra et analyse les performances du système
 """
 
 import cv2
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import time
+import tracemalloc
 import numpy as np
 
 
@@ -167,7 +174,7 @@ def test_serial():
 
 
 def benchmark_mediapipe():
-    """Benchmark MediaPipe"""
+    """Benchmark MediaPipe (retourne le temps moyen par frame en secondes, None si indisponible)"""
     
     print("\n" + "=" * 60)
     print("BENCHMARK MEDIAPIPE")
@@ -208,6 +215,448 @@ def benchmark_mediapipe():
         print(f"  Min: {np.min(times)*1000:.1f}ms")
         print(f"  Max: {np.max(times)*1000:.1f}ms")
         print(f"  FPS moyen: {1/np.mean(times):.1f}")
+        return float(np.mean(times))
+        
+    except Exception as e:
+        print(f"✗ Erreur: {e}")
+
+
+def benchmark_face_mesh_visages(max_faces, n_frames=30):
+    """
+    Coût de Face Mesh par visage supplémentaire
+    
+    Une frame de la caméra (un visage) est répétée en mosaïque 1..max_faces
+    fois; Face Mesh (max_num_faces = nombre de copies) traite chaque
+    mosaïque n_frames fois.
+    
+    Returns:
+        list: [(copies, visages trouvés, temps moyen s)], None si indisponible
+    """
+    from detection_yeux_fermes_arduino import mp_solutions
+    if mp_solutions is None:
+        print("⚠️  MediaPipe non disponible: coût de Face Mesh non mesuré")
+        return None
+    
+    cap = cv2.VideoCapture(0)
+    ret, frame = cap.read() if cap.isOpened() else (False, None)
+    cap.release()
+    if not ret:
+        print("⚠️  Caméra non accessible: coût de Face Mesh non mesuré")
+        return None
+    
+    rows = []
+    for n_faces in range(1, max_faces + 1):
+        cols = int(np.ceil(np.sqrt(n_faces)))
+        grid = np.zeros((int(np.ceil(n_faces / cols)) * frame.shape[0], cols * frame.shape[1], 3), np.uint8)
+        for k in range(n_faces):
+            r, c = divmod(k, cols)
+            grid[r * frame.shape[0]:(r + 1) * frame.shape[0], c * frame.shape[1]:(c + 1) * frame.shape[1]] = frame
+        rgb = cv2.cvtColor(grid, cv2.COLOR_BGR2RGB)
+        
+        face_mesh = mp_solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=n_faces,
+                                                    refine_landmarks=True, min_detection_confidence=0.5)
+        found = 0
+        face_mesh.process(rgb)  # chargement du graphe
+        start = time.perf_counter()
+        for _ in range(n_frames):
+            results = face_mesh.process(rgb)
+            found = len(results.multi_face_landmarks or ())
+        rows.append((n_faces, found, (time.perf_counter() - start) / n_frames))
+        face_mesh.close()
+    return rows
+
+
+def benchmark_multi_visages():
+    """Coût de Face Mesh, du suivi et de la décision par visage supplémentaire"""
+    
+    print("\n" + "=" * 60)
+    print("BENCHMARK MULTI-VISAGES (Face Mesh + post-traitement)")
+    print("=" * 60)
+    
+    try:
+        from config_advanced import MAX_FACES
+        from detection_yeux_fermes_arduino import EyeClosureDetector
+        
+        rng = np.random.default_rng(0)
+        base = np.array([[0, 0], [10, -6], [20, -6], [30, 0], [20, 6], [10, 6]])
+        n_frames = 500
+        faces_range = list(range(1, MAX_FACES + 1))
+        costs = []
+        
+        for n_faces in faces_range:
+            detector = EyeClosureDetector(use_mediapipe=False, max_faces=MAX_FACES)
+            
+            # Visages alignés horizontalement, légère agitation d'une frame à l'autre
+            offsets = np.stack([np.arange(n_faces) * 120 + 40, np.full(n_faces, 200)], axis=1)
+            faces = np.stack([base, base + [50, 0]])[None] + offsets[:, None, None, :]
+            jitter = rng.integers(-2, 3, size=(n_frames,) + faces.shape)
+            
+            start = time.perf_counter()
+            for i in range(n_frames):
+                detector.process_eye_points_multi(faces + jitter[i])
+            costs.append((time.perf_counter() - start) / n_frames)
+        
+        print("Post-traitement (suivi + décision):")
+        print(f"{'Visages':>8} {'Temps/frame':>14}")
+        for n_faces, cost in zip(faces_range, costs):
+            print(f"{n_faces:>8} {cost * 1e6:>11.1f} µs")
+        
+        per_face = np.polyfit(faces_range, costs, 1)[0] if len(costs) > 1 else None
+        if per_face is not None:
+            print(f"\n✓ Post-traitement par visage supplémentaire: {per_face * 1e6:.1f} µs")
+        
+        mesh = benchmark_face_mesh_visages(MAX_FACES)
+        if mesh:
+            print("\nFace Mesh (mosaïque de la frame caméra):")
+            print(f"{'Copies':>8} {'Trouvés':>8} {'Temps/frame':>14}")
+            for n_faces, found, cost in mesh:
+                print(f"{n_faces:>8} {found:>8} {cost * 1000:>11.1f} ms")
+            # Régression sur le nombre de visages réellement trouvés
+            found = [row[1] for row in mesh]
+            if len(set(found)) < 2:
+                print("⚠️  Même nombre de visages trouvés partout: coût par visage non estimé")
+            else:
+                mesh_per_face = np.polyfit(found, [row[2] for row in mesh], 1)[0]
+                print(f"\n✓ Face Mesh par visage supplémentaire: {mesh_per_face * 1000:.1f} ms")
+                if per_face is not None:
+                    print(f"✓ Total par visage supplémentaire: {(mesh_per_face + per_face) * 1000:.2f} ms")
+        
+    except Exception as e:
+        print(f"✗ Erreur: {e}")
+
+
+def benchmark_caracteristiques(inference_time=None, n_frames=1000):
+    """Coût de l'extracteur EAR + MAR + pose par rapport à l'EAR seul et à l'inférence"""
+    
+    print("\n" + "=" * 60)
+    print("BENCHMARK CARACTÉRISTIQUES DU VISAGE (EAR, MAR, POSE)")
+    print("=" * 60)
+    
+    try:
+        from caracteristiques_visage import FeatureExtractor, POSE_MODEL
+        from detection_yeux_fermes_arduino import EyeClosureDetector, eye_aspect_ratios
+        
+        # Visage synthétique: points de pose projetés, tête qui oscille en tangage
+        extractor = FeatureExtractor(EyeClosureDetector.LEFT_EYE_IDX + EyeClosureDetector.RIGHT_EYE_IDX)
+        width, height = 640, 480
+        camera = np.array([[width, 0, width / 2], [0, width, height / 2], [0, 0, 1.0]])
+        rng = np.random.default_rng(0)
+        points = rng.uniform(200, 400, size=(n_frames, len(extractor.landmark_idx), 2))
+        for i in range(n_frames):
+            rvec = np.array([np.radians(20 * np.sin(i / 30)), 0.0, 0.0])
+            projected = cv2.projectPoints(POSE_MODEL, rvec, np.array([0.0, 0.0, 1500.0]), camera, None)[0]
+            points[i, extractor._pose] = projected.reshape(-1, 2)
+        points = np.rint(points).astype(np.int32)
+        eye_pts = points[:, :12].reshape(n_frames, 2, 6, 2)
+        
+        start = time.perf_counter()
+        for i in range(n_frames):
+            eye_aspect_ratios(eye_pts[i])
+        ear_only = (time.perf_counter() - start) / n_frames
+        
+        start = time.perf_counter()
+        for i in range(n_frames):
+            extractor.extract(points[i], width, height)
+        fused = (time.perf_counter() - start) / n_frames
+        
+        start = time.perf_counter()
+        for i in range(n_frames):
+            extractor.reset()
+            extractor.extract(points[i], width, height)
+        cold = (time.perf_counter() - start) / n_frames
+        
+        print(f"{'Étape':<34} {'Temps/frame':>12}")
+        print(f"{'EAR seul (eye_aspect_ratios)':<34} {ear_only * 1e6:>9.1f} µs")
+        print(f"{'EAR + MAR + pose (pose précédente)':<34} {fused * 1e6:>9.1f} µs")
+        print(f"{'EAR + MAR + pose (sans pose init.)':<34} {cold * 1e6:>9.1f} µs")
+        if inference_time:
+            print(f"\n✓ Surcoût: {100 * (fused - ear_only) / inference_time:.2f}% "
+                  f"du temps d'inférence ({inference_time * 1000:.1f}ms)")
+        else:
+            print("\n⚠️  Temps d'inférence inconnu (MediaPipe ou caméra indisponible)")
+        
+    except Exception as e:
+        print(f"✗ Erreur: {e}")
+
+
+def benchmark_watchdog(stalls=(("inference", 0.6), ("capture", 0.9), ("output", 0.4)), frame_time=0.02):
+    """Blocages injectés dans une boucle simulée: détection, durée mesurée, coût de enter()"""
+    
+    print("\n" + "=" * 60)
+    print("BENCHMARK CHIEN DE GARDE (blocages injectés)")
+    print("=" * 60)
+    
+    try:
+        from bus_evenements import EventBus, FAULT
+        from chien_de_garde import PipelineWatchdog
+        
+        bus = EventBus()
+        faults = []
+        bus.subscribe("faults", lambda event: faults.append(time.monotonic()), types=(FAULT,))
+        deadlines = {'capture': 0.3, 'inference': 0.2, 'output': 0.2}
+        watchdog = PipelineWatchdog(bus, deadlines=deadlines, interval=0.02, startup_grace=0.0)
+        
+        # Une frame = capture, inférence, sorties; un blocage injecté toutes les 20 frames
+        starts = []
+        for i in range(20 * (len(stalls) + 1)):
+            if i % 20 == 10 and len(starts) < len(stalls):
+                stage, duration = stalls[len(starts)]
+                watchdog.inject_stall(stage, duration)
+                starts.append(time.monotonic())
+            for stage in ("capture", "inference", "output"):
+                watchdog.enter(stage)
+                time.sleep(frame_time / 3)
+        watchdog.pause()
+        
+        n = 100000
+        start = time.perf_counter()
+        for _ in range(n):
+            watchdog.enter("inference")
+        enter_cost = (time.perf_counter() - start) / n
+        watchdog.pause()
+        watchdog.close()
+        bus.close()
+        
+        print(f"{'Étape':<10} {'Injecté':>9} {'Mesuré':>9} {'Détection':>11}")
+        for (stage, duration), injected_at, (_, measured), fault_at in zip(stalls, starts, watchdog.stalls, faults):
+            delay = fault_at - injected_at - deadlines[stage]
+            print(f"{stage:<10} {duration:>8.2f}s {measured:>8.2f}s {delay * 1000:>8.0f} ms")
+        
+        stats = watchdog.stats()
+        print(f"\n✓ {stats['faults']}/{len(stalls)} blocage(s) détecté(s), "
+              f"retard de détection = au-delà de la limite de l'étape")
+        print(f"✓ Coût de enter(): {enter_cost * 1e9:.0f} ns par étape")
+        
+    except Exception as e:
+        print(f"✗ Erreur: {e}")
+
+
+def _threads_worker(num_threads, inference_cpus, io_cpus, n_frames=150):
+    """
+    Mesure d'un réglage dans un processus neuf (lancé par benchmark_threads)
+    
+    Boucle d'inférence (Face Mesh, ou traitement OpenCV/NumPy équivalent si
+    MediaPipe est indisponible) pendant qu'un thread d'entrées/sorties
+    encode des JPEG, comme l'aperçu ou l'export.
+    """
+    from politique_threads import apply_thread_policy, pin_threads
+    
+    warnings = apply_thread_policy(num_threads, inference_cpus)
+    
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    try:
+        import mediapipe as mp
+        face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True)
+        engine = "mediapipe"
+    except Exception:
+        face_mesh = None
+        engine = "opencv"
+    weights = rng.standard_normal((256, 256))
+    
+    # Thread d'entrées/sorties concurrent
+    stop = threading.Event()
+    encoded = [0]
+    
+    def io_load():
+        while not stop.is_set():
+            cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            encoded[0] += 1
+    
+    io_thread = threading.Thread(target=io_load, name="io-load", daemon=True)
+    io_thread.start()
+    if io_cpus:
+        pin_threads(io_cpus)
+    
+    times = []
+    start_all = time.perf_counter()
+    for _ in range(n_frames):
+        start = time.perf_counter()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if face_mesh is not None:
+            face_mesh.process(rgb)
+        else:
+            small = cv2.resize(rgb, (320, 240), interpolation=cv2.INTER_AREA)
+            gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_RGB2GRAY), (5, 5), 0)
+            cv2.equalizeHist(gray)
+            weights @ weights
+        times.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - start_all
+    stop.set()
+    io_thread.join()
+    
+    times = np.array(times)
+    print(json.dumps({
+        'engine': engine,
+        'mean_ms': float(times.mean() * 1000),
+        'p95_ms': float(np.percentile(times, 95) * 1000),
+        'io_per_s': encoded[0] / elapsed,
+        'warnings': warnings,
+    }))
+
+
+def benchmark_threads(settings=None, n_frames=150):
+    """
+    Compare des réglages NUM_THREADS / INFERENCE_CPUS / IO_CPUS
+    
+    Chaque réglage tourne dans un processus neuf: les threads BLAS ne se
+    règlent qu'avant le chargement de numpy.
+    
+    Args:
+        settings: Liste de (num_threads, inference_cpus, io_cpus) (défaut:
+                  1, 2 et tous les threads, avec et sans séparation des cœurs)
+        n_frames: Frames mesurées par réglage
+    """
+    
+    print("\n" + "=" * 60)
+    print("BENCHMARK THREADS ET CŒURS")
+    print("=" * 60)
+    
+    try:
+        from politique_threads import BLAS_ENV_VARS, affinity_available
+        
+        cpus = sorted(os.sched_getaffinity(0)) if affinity_available() else []
+        if settings is None:
+            counts = sorted({1, 2, os.cpu_count() or 1})
+            layouts = [(None, None)]
+            if len(cpus) >= 2:
+                layouts.append((tuple(cpus[1:]), tuple(cpus[:1])))
+            settings = [(n, inference, io) for n in counts for inference, io in layouts]
+        
+        def cores(value):
+            return "tous" if not value else ",".join(map(str, value))
+        
+        print(f"{'Threads':>7} {'Inférence':>10} {'E/S':>6} {'Moyenne':>9} {'p95':>9} {'JPEG/s':>8}")
+        best = None
+        for num_threads, inference_cpus, io_cpus in settings:
+            env = dict(os.environ)
+            for var in BLAS_ENV_VARS:
+                env[var] = str(num_threads)
+            code = (f"import test_performance; test_performance._threads_worker("
+                    f"{num_threads!r}, {inference_cpus!r}, {io_cpus!r}, {n_frames!r})")
+            out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)), timeout=300)
+            lines = out.stdout.strip().splitlines()
+            if out.returncode != 0 or not lines:
+                print(f"✗ Réglage {num_threads}/{cores(inference_cpus)}/{cores(io_cpus)}: "
+                      f"{out.stderr.strip().splitlines()[-1:] or 'sans sortie'}")
+                continue
+            r = json.loads(lines[-1])
+            print(f"{num_threads:>7} {cores(inference_cpus):>10} {cores(io_cpus):>6} "
+                  f"{r['mean_ms']:>7.2f}ms {r['p95_ms']:>7.2f}ms {r['io_per_s']:>8.0f}")
+            for warning in r['warnings']:
+                print(f"  ⚠️  {warning}")
+            if best is None or r['p95_ms'] < best[0]:
+                best = (r['p95_ms'], num_threads, inference_cpus, io_cpus, r['engine'])
+        
+        if best is not None:
+            _, num_threads, inference_cpus, io_cpus, engine = best
+            print(f"\n✓ Meilleur p95 ({engine}): NUM_THREADS = {num_threads}, "
+                  f"INFERENCE_CPUS = {inference_cpus}, IO_CPUS = {io_cpus}")
+        
+    except Exception as e:
+        print(f"✗ Erreur: {e}")
+
+
+def benchmark_allocations(n_frames=120, warmup=20):
+    """Mémoire allouée par frame dans process_frame, avec et sans réutilisation des buffers"""
+    
+    print("\n" + "=" * 60)
+    print("BENCHMARK ALLOCATIONS PAR FRAME")
+    print("=" * 60)
+    
+    try:
+        from detection_yeux_fermes_arduino import EyeClosureDetector
+        
+        # Frames de la caméra si disponible, sinon image synthétique
+        frames = []
+        cap = cv2.VideoCapture(0)
+        while cap.isOpened() and len(frames) < 30:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            print("⚠️  Caméra non accessible: image synthétique (sans visage)")
+            frames = [np.full((480, 640, 3), 128, dtype=np.uint8)]
+        
+        print(f"{'Mode':<22} {'Pic/frame':>12} {'Net/frame':>12} {'Temps':>10}")
+        for reuse in (False, True):
+            detector = EyeClosureDetector(reuse_buffers=reuse)
+            for i in range(warmup):
+                detector.process_frame(frames[i % len(frames)])
+            
+            # Pic = mémoire allouée pendant la frame, au-delà de l'état de départ
+            tracemalloc.start()
+            peaks = []
+            start_mem = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            for i in range(n_frames):
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                detector.process_frame(frames[i % len(frames)])
+                peaks.append(tracemalloc.get_traced_memory()[1] - base)
+            elapsed = time.perf_counter() - start
+            net = (tracemalloc.get_traced_memory()[0] - start_mem) / n_frames
+            tracemalloc.stop()
+            
+            label = "buffers réutilisés" if reuse else "allocation par frame"
+            print(f"{label:<22} {np.mean(peaks) / 1024:>9.1f} Ko {net:>10.0f} o "
+                  f"{elapsed / n_frames * 1000:>7.1f}ms")
+        
+    except Exception as e:
+        print(f"✗ Erreur: {e}")
+
+
+def benchmark_base_evenements(stream_counts=(1, 4, 8), seconds=20, fps=30):
+    """Débit d'EventStore avec plusieurs flux à 30 FPS qui écrivent en même temps"""
+    
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK BASE D'ÉVÉNEMENTS ({fps} FPS par flux, une ligne par frame)")
+    print("=" * 60)
+    
+    try:
+        from base_evenements import EventStore
+        
+        n_frames = seconds * fps
+        print(f"{'Flux':>5} {'Requis':>10} {'Débit':>12} {'record()':>10} {'Écartées':>9} {'Épisodes':>9}")
+        for n_streams in stream_counts:
+            with tempfile.TemporaryDirectory() as tmp:
+                # Échantillonnage à la cadence des flux: chaque frame devient une ligne (pire cas)
+                store = EventStore(os.path.join(tmp, "bench.db"), sample_hz=fps,
+                                   queue_size=n_streams * n_frames)
+                costs = [0.0] * n_streams
+                
+                def produce(index):
+                    # Horodatages simulés à 30 FPS; une alarme de 2 s toutes les 10 s
+                    stream = f"cam{index}"
+                    start = time.perf_counter()
+                    for i in range(n_frames):
+                        alarm = (i // fps) % 10 >= 8
+                        store.record(stream, i / fps, None if alarm else 0.3, alarm, alarm)
+                    costs[index] = (time.perf_counter() - start) / n_frames
+                
+                threads = [threading.Thread(target=produce, args=(i,)) for i in range(n_streams)]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                store.close()
+                elapsed = time.perf_counter() - start
+                
+                stats = store.stats()
+                written = len(store.query_frames(float('-inf'), float('inf')))
+                episodes = len(store.query_episodes())
+            
+            required = n_streams * fps
+            rate = written / elapsed
+            symbol = "✓" if rate >= required and stats['dropped'] == 0 else "✗"
+            print(f"{n_streams:>5} {required:>6} l/s {rate:>8.0f} l/s {np.mean(costs) * 1e6:>7.1f}µs "
+                  f"{stats['dropped']:>9} {episodes:>9} {symbol}")
+        
+        print("\n✓ Débit = lignes écrites / temps total (production et écriture concurrentes)")
         
     except Exception as e:
         print(f"✗ Erreur: {e}")
@@ -233,7 +682,13 @@ def main():
     print("\n" + "=" * 60)
     print("BENCHMARK")
     print("=" * 60)
-    benchmark_mediapipe()
+    inference_time = benchmark_mediapipe()
+    benchmark_caracteristiques(inference_time)
+    benchmark_watchdog()
+    benchmark_threads()
+    benchmark_allocations()
+    benchmark_multi_visages()
+    benchmark_base_evenements()
     
     # Résumé
     print("\n" + "=" * 60)
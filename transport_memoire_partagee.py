@@ -0,0 +1,272 @@
+"""
+TRANSPORT DE FRAMES EN MÉMOIRE PARTAGÉE
+=======================================
+
+Sépare la capture et l'inférence dans deux processus sans copier les
+frames: le processus de capture écrit directement chaque image dans un
+anneau de slots multiprocessing.shared_memory, et le processus d'inférence
+les lit comme des vues NumPy. Seuls l'indice du slot, un numéro de séquence
+et l'horodatage passent par la file (quelques octets au lieu de ~900 Ko
+picklés par frame 640x480).
+
+Le processus de capture fait aussi la conversion BGR -> RGB dans le slot:
+décodage, conversion et inférence tournent ainsi sur des cœurs différents.
+
+Cycle de vie d'un slot:
+    libre -> rempli par la capture -> lu par l'inférence -> rendu (libre)
+
+Si l'inférence est en retard et qu'aucun slot n'est libre, la capture lit
+quand même la caméra (pour rester à jour) et écarte la frame; le nombre de
+frames écartées est remonté avec chaque frame. Pour un fichier vidéo, la
+capture attend au contraire qu'un slot se libère.
+
+SharedFrameCapture s'utilise comme cv2.VideoCapture (read/isOpened/
+release); la frame renvoyée par read() reste valide jusqu'à l'appel suivant.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from config import CONFIG
+
+
+class SharedFrameRing:
+    """Anneau de slots (BGR + RGB) dans un bloc de mémoire partagée"""
+
+    def __init__(self, shape, n_slots=4, name=None):
+        """
+        Args:
+            shape: Forme d'une frame (hauteur, largeur, 3)
+            n_slots: Nombre de slots de l'anneau
+            name: Nom du bloc existant à ouvrir (None = création)
+        """
+        self.shape = tuple(shape)
+        self.n_slots = n_slots
+        size = n_slots * 2 * int(np.prod(self.shape))
+
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.name = self.shm.name
+
+        planes = np.ndarray((n_slots, 2) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.bgr = planes[:, 0]
+        self.rgb = planes[:, 1]
+
+    def close(self):
+        """Détache le bloc (et le supprime si ce processus l'a créé)"""
+        # Les vues doivent disparaître avant la fermeture du bloc; une vue
+        # encore tenue par l'appelant empêche seulement le détachement
+        del self.bgr, self.rgb
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+def _capture_loop(source, ring_name, shape, n_slots, fps, free_q, ready_q, stop_event):
+    """Processus de capture: remplit les slots libres de l'anneau"""
+    ring = SharedFrameRing(shape, n_slots, name=ring_name)
+    cap = cv2.VideoCapture(source)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, shape[1])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, shape[0])
+    cap.set(cv2.CAP_PROP_FPS, fps)
+
+    ready_q.put(('opened', cap.isOpened()))
+    live = isinstance(source, int)
+    scratch = np.empty(shape, dtype=np.uint8)
+    free = []
+    dst = frame = None
+    seq = 0
+    dropped = 0
+
+    try:
+        while cap.isOpened() and not stop_event.is_set():
+            # Récupère les slots rendus sans bloquer
+            try:
+                while True:
+                    free.append(free_q.get_nowait())
+            except queue.Empty:
+                pass
+
+            # Un fichier n'est pas "en direct": on attend un slot plutôt
+            # que d'écarter la frame, sans ignorer une demande d'arrêt
+            if not free and not live:
+                while not stop_event.is_set():
+                    try:
+                        free.append(free_q.get(timeout=0.1))
+                        break
+                    except queue.Empty:
+                        pass
+                if not free:
+                    break
+
+            slot = free.pop(0) if free else None
+            dst = ring.bgr[slot] if slot is not None else scratch
+
+            # Décodage directement dans le slot quand la taille correspond
+            ok, frame = cap.read(dst)
+            if not ok:
+                break
+            if frame.shape != ring.shape:
+                cv2.resize(frame, (shape[1], shape[0]), dst=dst)
+            elif not np.shares_memory(frame, dst):
+                np.copyto(dst, frame)
+
+            if slot is None:
+                dropped += 1
+                continue
+
+            cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=ring.rgb[slot])
+            ready_q.put((slot, seq, time.time(), dropped))
+            seq += 1
+    finally:
+        dst = frame = None
+        cap.release()
+        ready_q.put(None)
+        ring.close()
+
+
+class SharedFrameCapture:
+    """Capture dans un processus dédié, lecture sans copie (API type VideoCapture)"""
+
+    def __init__(self, source=0, n_slots=4, shape=None, fps=None, drop_stale=False, open_timeout=10.0):
+        """
+        Args:
+            source: Index de caméra ou fichier vidéo
+            n_slots: Nombre de slots de l'anneau
+            shape: Forme des frames (défaut: résolution de config.py)
+            fps: Cadence demandée à la caméra (défaut: config.py)
+            drop_stale: Ne traiter que la frame la plus récente disponible
+            open_timeout: Délai max d'ouverture de la source (s)
+        """
+        if shape is None:
+            shape = (CONFIG['video_height'], CONFIG['video_width'], 3)
+        self.drop_stale = drop_stale
+
+        context = multiprocessing.get_context("spawn")
+        self.ring = SharedFrameRing(shape, n_slots)
+        self.free_q = context.Queue()
+        self.ready_q = context.Queue()
+        self.stop_event = context.Event()
+        for slot in range(n_slots):
+            self.free_q.put(slot)
+
+        self.process = context.Process(
+            target=_capture_loop,
+            args=(source, self.ring.name, shape, n_slots, fps or CONFIG['video_fps'],
+                  self.free_q, self.ready_q, self.stop_event),
+            daemon=True,
+        )
+        self.process.start()
+
+        # Attend que la source soit ouverte (ou en échec)
+        try:
+            _, self._opened = self.ready_q.get(timeout=open_timeout)
+        except queue.Empty:
+            self._opened = False
+
+        self._current = None
+        self.rgb = None
+        self.timestamp = None
+        self.seq = -1
+        self.dropped = 0
+        self.skipped = 0
+        # Demande d'interruption d'un read() en cours (chien de garde);
+        # un drapeau plutôt qu'une valeur dans ready_q, qui resterait en file
+        self._interrupt = threading.Event()
+
+    def isOpened(self):
+        """Vrai si la source a pu être ouverte par le processus de capture"""
+        return self._opened
+
+    def read(self):
+        """
+        Renvoie la frame suivante (vue BGR dans la mémoire partagée)
+
+        La vue RGB correspondante est disponible dans self.rgb. Les deux
+        restent valides jusqu'au prochain appel à read() ou release().
+
+        Returns:
+            tuple: (ok, frame)
+        """
+        self._release_current()
+
+        # Une interruption arrivée après la fin du read() précédent ne
+        # concerne pas celui-ci
+        self._interrupt.clear()
+        item = self._wait_item()
+        if item is False:
+            self._opened = False
+            return False, None
+
+        if self.drop_stale:
+            # Rend les frames en attente plus anciennes que la dernière
+            while item is not None:
+                try:
+                    newer = self.ready_q.get_nowait()
+                except queue.Empty:
+                    break
+                self.free_q.put(item[0])
+                self.skipped += 1
+                item = newer
+
+        if item is None:
+            self._opened = False
+            return False, None
+
+        slot, self.seq, self.timestamp, self.dropped = item
+        self._current = slot
+        self.rgb = self.ring.rgb[slot]
+        return True, self.ring.bgr[slot]
+
+    def _wait_item(self):
+        """Attend l'élément suivant de ready_q (False si interrompu)"""
+        while not self._interrupt.is_set():
+            try:
+                return self.ready_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._interrupt.clear()
+        return False
+
+    def interrupt(self):
+        """
+        Débloque un read() en attente d'une frame qui ne vient pas
+
+        Appelable depuis un autre thread (chien de garde): read() renvoie
+        (False, None) et la source est considérée comme fermée. Sans read()
+        en cours, la demande est ignorée par le read() suivant.
+        """
+        self._interrupt.set()
+
+    def _release_current(self):
+        if self._current is not None:
+            self.free_q.put(self._current)
+            self._current = None
+            self.rgb = None
+
+    def release(self):
+        """Arrête le processus de capture et libère la mémoire partagée"""
+        self._release_current()
+        self.stop_event.set()
+
+        # Vide la file pour débloquer le processus de capture
+        deadline = time.time() + 5.0
+        while self.process.is_alive() and time.time() < deadline:
+            try:
+                self.ready_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+
+        self.ring.close()